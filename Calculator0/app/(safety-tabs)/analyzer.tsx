@@ -6,6 +6,7 @@ import { GoogleGenerativeAI } from '@google/generative-ai';
 import { auth, db } from '@/config/firebase';
 import { doc, getDoc, setDoc } from 'firebase/firestore';
 import * as DocumentPicker from 'expo-document-picker';
+import { api } from '@/services/api';
 
 const GEMINI_API_KEY = process.env.EXPO_PUBLIC_GEMINI_API_KEY || "";
 const delay = (ms: number) => new Promise(res => setTimeout(res, ms));
@@ -186,8 +187,23 @@ export default function Analyzer() {
 
       // Execute prompts sequentially
       console.log('Analyzing for financial abuse...');
-      const abuseRes = await model.generateContent(abusePrompt);
-      setAbuseAnalysis(abuseRes.response.text());
+      // Backend caches by transaction fingerprint; fall back to calling Gemini directly
+      let backendAnalysis: string | null = null;
+      try {
+        const res = await api.runAnalysis(userFinanceData);
+        if (res.success) {
+          backendAnalysis = res.analysis;
+          console.log(res.cached ? 'Analysis served from cache' : 'Analysis computed by backend');
+        }
+      } catch (e) {
+        console.warn('Backend analysis unavailable, calling Gemini directly');
+      }
+      if (backendAnalysis !== null) {
+        setAbuseAnalysis(backendAnalysis);
+      } else {
+        const abuseRes = await model.generateContent(abusePrompt);
+        setAbuseAnalysis(abuseRes.response.text());
+      }
 
       await delay(2000);
 
@@ -0,0 +1,222 @@
+"""
+Admission control for the auth endpoints
+Per-user and per-IP token buckets plus a global concurrency cap with a bounded
+wait queue. Work that can't be admitted is rejected fast with a Retry-After hint
+instead of piling up on SQLite.
+"""
+
+import asyncio
+import math
+import os
+import threading
+import time
+from collections import OrderedDict
+from contextlib import asynccontextmanager, contextmanager
+
+# Requests per second and burst size for each bucket
+AUTH_IP_RATE = float(os.getenv("AUTH_IP_RATE", "5"))
+AUTH_IP_BURST = int(os.getenv("AUTH_IP_BURST", "20"))
+AUTH_USER_RATE = float(os.getenv("AUTH_USER_RATE", "0.5"))
+AUTH_USER_BURST = int(os.getenv("AUTH_USER_BURST", "5"))
+
+# Global cap on auth work in flight, and how many requests may wait for a slot
+AUTH_MAX_CONCURRENT = int(os.getenv("AUTH_MAX_CONCURRENT", "8"))
+AUTH_MAX_QUEUE = int(os.getenv("AUTH_MAX_QUEUE", "16"))
+AUTH_QUEUE_TIMEOUT = float(os.getenv("AUTH_QUEUE_TIMEOUT", "0.5"))
+
+# Upper bound on tracked buckets; least recently used keys are forgotten first
+MAX_TRACKED_KEYS = 100_000
+
+
+class Rejected(Exception):
+    """Raised when a request is not admitted"""
+
+    def __init__(self, status, reason, retry_after):
+        super().__init__(reason)
+        self.status = status
+        self.reason = reason
+        self.retry_after = retry_after
+
+    @property
+    def retry_after_header(self):
+        """Retry-After must be a whole number of seconds"""
+        return str(max(1, math.ceil(self.retry_after)))
+
+
+class TokenBucket:
+    """Classic token bucket; refills lazily when a token is requested"""
+
+    __slots__ = ("rate", "capacity", "tokens", "updated")
+
+    def __init__(self, rate, capacity, now):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = float(capacity)
+        self.updated = now
+
+    def take(self, now):
+        """
+        Try to take one token
+        Returns: 0 if admitted, otherwise seconds until a token is available
+        """
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return 0
+        return (1 - self.tokens) / self.rate
+
+
+class RateLimiter:
+    """A keyed set of token buckets held in memory"""
+
+    def __init__(self, rate, burst, max_keys=MAX_TRACKED_KEYS, clock=time.monotonic):
+        self.rate = rate
+        self.burst = burst
+        self.max_keys = max_keys
+        self.clock = clock
+        self._buckets = OrderedDict()
+        self._lock = threading.Lock()
+
+    def check(self, key):
+        """Returns 0 if the key may proceed, otherwise seconds to wait"""
+        now = self.clock()
+        with self._lock:
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                bucket = TokenBucket(self.rate, self.burst, now)
+                self._buckets[key] = bucket
+                if len(self._buckets) > self.max_keys:
+                    self._buckets.popitem(last=False)
+            else:
+                self._buckets.move_to_end(key)
+            return bucket.take(now)
+
+    def __len__(self):
+        return len(self._buckets)
+
+
+class ConcurrencyLimiter:
+    """
+    At most `max_active` holders at once and at most `max_waiting` waiters.
+    Waiters give up after `timeout` seconds so admitted work keeps a flat tail.
+    """
+
+    def __init__(self, max_active, max_waiting, timeout):
+        self.max_active = max_active
+        self.max_waiting = max_waiting
+        self.timeout = timeout
+        self.active = 0
+        self.waiting = 0
+        self._cond = threading.Condition()
+
+    def acquire(self):
+        """Returns True once a slot is held, False if the queue is full or the wait timed out"""
+        with self._cond:
+            if self.active < self.max_active:
+                self.active += 1
+                return True
+            if self.waiting >= self.max_waiting:
+                return False
+
+            self.waiting += 1
+            try:
+                admitted = self._cond.wait_for(lambda: self.active < self.max_active, self.timeout)
+                if admitted:
+                    self.active += 1
+                return admitted
+            finally:
+                self.waiting -= 1
+
+    def release(self):
+        with self._cond:
+            self.active -= 1
+            self._cond.notify()
+
+
+class AsyncConcurrencyLimiter:
+    """ConcurrencyLimiter for the ASGI app; waits on the event loop instead of a thread"""
+
+    def __init__(self, max_active, max_waiting, timeout):
+        self.max_active = max_active
+        self.max_waiting = max_waiting
+        self.timeout = timeout
+        self.active = 0
+        self.waiting = 0
+        self._cond = asyncio.Condition()
+
+    async def acquire(self):
+        async with self._cond:
+            if self.active < self.max_active:
+                self.active += 1
+                return True
+            if self.waiting >= self.max_waiting:
+                return False
+
+            self.waiting += 1
+            try:
+                await asyncio.wait_for(
+                    self._cond.wait_for(lambda: self.active < self.max_active),
+                    self.timeout
+                )
+            except asyncio.TimeoutError:
+                return False
+            finally:
+                self.waiting -= 1
+            self.active += 1
+            return True
+
+    async def release(self):
+        async with self._cond:
+            self.active -= 1
+            self._cond.notify()
+
+
+class AdmissionController:
+    """Combines the per-IP and per-user buckets with the global concurrency cap"""
+
+    def __init__(self,
+                 ip_rate=AUTH_IP_RATE, ip_burst=AUTH_IP_BURST,
+                 user_rate=AUTH_USER_RATE, user_burst=AUTH_USER_BURST,
+                 max_concurrent=AUTH_MAX_CONCURRENT, max_queue=AUTH_MAX_QUEUE,
+                 queue_timeout=AUTH_QUEUE_TIMEOUT):
+        self.ip_limiter = RateLimiter(ip_rate, ip_burst)
+        self.user_limiter = RateLimiter(user_rate, user_burst)
+        self.concurrency = ConcurrencyLimiter(max_concurrent, max_queue, queue_timeout)
+        self.async_concurrency = AsyncConcurrencyLimiter(max_concurrent, max_queue, queue_timeout)
+
+    def check_rate(self, user_id=None, ip=None):
+        """Raise Rejected(429) if either bucket is empty"""
+        if ip:
+            wait = self.ip_limiter.check(ip)
+            if wait:
+                raise Rejected(429, "Too many requests from this address", wait)
+        if user_id:
+            wait = self.user_limiter.check(user_id)
+            if wait:
+                raise Rejected(429, "Too many attempts for this user", wait)
+
+    @contextmanager
+    def admit(self, user_id=None, ip=None):
+        """
+        Hold an admission slot for the duration of the block
+        Raises Rejected(429) when rate limited and Rejected(503) when overloaded
+        """
+        self.check_rate(user_id, ip)
+        if not self.concurrency.acquire():
+            raise Rejected(503, "Server busy, try again shortly", self.concurrency.timeout)
+        try:
+            yield
+        finally:
+            self.concurrency.release()
+
+    @asynccontextmanager
+    async def admit_async(self, user_id=None, ip=None):
+        """admit() for coroutines running on an event loop"""
+        self.check_rate(user_id, ip)
+        if not await self.async_concurrency.acquire():
+            raise Rejected(503, "Server busy, try again shortly", self.async_concurrency.timeout)
+        try:
+            yield
+        finally:
+            await self.async_concurrency.release()
@@ -0,0 +1,107 @@
+"""
+Server-side financial abuse analysis with Gemini
+Builds the same abuse-detection prompt the analyzer screen uses and serves
+repeated requests for unchanged data from the AnalysisCache.
+"""
+
+import config  # .env first, before anything reads os.environ
+import json
+import os
+
+from analysis_cache import AnalysisCache, DEFAULT_MODEL, PROMPT_VERSION, fingerprint
+from logger import get_logger
+from prompt_compaction import DEFAULT_TOKEN_BUDGET, compact_history
+
+GEMINI_API_KEY = config.get("GEMINI_API_KEY")
+
+# Send a compact feature summary instead of the raw history (set to 0 for raw JSON)
+ANALYSIS_COMPACT_PROMPTS = os.getenv("ANALYSIS_COMPACT_PROMPTS", "1") == "1"
+ANALYSIS_TOKEN_BUDGET = int(os.getenv("ANALYSIS_TOKEN_BUDGET", str(DEFAULT_TOKEN_BUDGET)))
+
+log = get_logger("analysis")
+
+_cache = None
+
+
+def get_cache():
+    global _cache
+    if _cache is None:
+        _cache = AnalysisCache()
+    return _cache
+
+
+def build_abuse_prompt(transaction_data, compact=None, token_budget=None):
+    """
+    Abuse analysis prompt (kept in sync with analyzer.tsx)
+    With compact=True the history is replaced by a fixed-size feature summary.
+    """
+    if compact is None:
+        compact = ANALYSIS_COMPACT_PROMPTS
+    if compact:
+        history = "Transaction Summary:\n" + compact_history(transaction_data, token_budget or ANALYSIS_TOKEN_BUDGET)
+    else:
+        history = "Transaction Data:\n" + json.dumps(transaction_data, indent=2)
+    
+    return f"""
+You are a financial abuse detection expert. Analyze this transaction history for signs of financial abuse or control.
+
+{history}
+
+Look for red flags such as:
+- Unusual spending patterns or restrictions
+- Frequent small withdrawals (possible allowance system)
+- Lack of access to certain merchants or categories
+- Suspicious gaps in transaction history
+- Evidence of financial monitoring or control
+- Microtransactions that could indicate limited access
+
+Provide:
+1. Risk Level (Low/Medium/High)
+2. Specific red flags found in the data
+3. Brief explanation of concerns
+
+Format your response clearly with sections.
+"""
+
+
+def call_gemini(prompt, model=DEFAULT_MODEL):
+    """Send a prompt to Gemini and return the response text"""
+    import google.generativeai as genai
+
+    genai.configure(api_key=GEMINI_API_KEY)
+    response = genai.GenerativeModel(model).generate_content(prompt)
+    return response.text
+
+
+def _prompt_mode():
+    return f"compact:{ANALYSIS_TOKEN_BUDGET}" if ANALYSIS_COMPACT_PROMPTS else "raw"
+
+
+def analysis_key(transaction_data, model=DEFAULT_MODEL):
+    """Cache key for a customer record ({deposits, purchases}) or a flat transaction list"""
+    if isinstance(transaction_data, dict):
+        return fingerprint(
+            transaction_data.get('deposits', []),
+            transaction_data.get('purchases', []),
+            PROMPT_VERSION, model, _prompt_mode()
+        )
+    return fingerprint((), (), PROMPT_VERSION, model, _prompt_mode(), transactions=transaction_data)
+
+
+def run_analysis(transaction_data, model=DEFAULT_MODEL, customer_id=None, cache=None, generate=call_gemini):
+    """
+    Analyze a transaction history, using the cache when the data hasn't changed
+    Returns: (analysis_text, cached, key)
+    """
+    cache = cache or get_cache()
+    key = analysis_key(transaction_data, model)
+
+    hit = cache.get(key)
+    if hit is not None:
+        log.info("⚡ Analysis cache hit", customer_id=customer_id, key=key[:12])
+        return hit['analysis'], True, key
+
+    log.info("🤖 Running Gemini analysis", customer_id=customer_id, model=model, key=key[:12])
+    text = generate(build_abuse_prompt(transaction_data), model)
+    cache.put(key, {'analysis': text, 'model': model, 'prompt_version': PROMPT_VERSION}, customer_id)
+    return text, False, key
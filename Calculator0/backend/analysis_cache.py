@@ -0,0 +1,139 @@
+"""
+Analysis result cache keyed by a fingerprint of the transaction history
+Repeated analyses of unchanged data (same deposits/purchases, same prompt version,
+same model) are served from SQLite instead of going back to Gemini.
+"""
+
+import hashlib
+import os
+import sqlite3
+import time
+
+import db
+from logger import get_logger
+import serialization
+
+# Bump when the analysis prompt changes so old answers stop matching
+PROMPT_VERSION = "abuse-v2"
+DEFAULT_MODEL = "gemini-2.5-flash"
+
+ANALYSIS_CACHE_TTL = int(os.getenv("ANALYSIS_CACHE_TTL", str(7 * 24 * 3600)))
+ANALYSIS_CACHE_MAX_ENTRIES = int(os.getenv("ANALYSIS_CACHE_MAX_ENTRIES", "10000"))
+ANALYSIS_CACHE_MAX_BYTES = int(os.getenv("ANALYSIS_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+
+log = get_logger("analysis_cache")
+
+
+_canonical = serialization.canonical
+
+
+def fingerprint(deposits=(), purchases=(), *parts, transactions=()):
+    """
+    Canonical hash of a transaction history plus any version parts
+    Row order and key order don't matter; only the content does.
+    """
+    h = hashlib.sha256()
+    for name, rows in (("deposits", deposits), ("purchases", purchases), ("transactions", transactions)):
+        h.update(name.encode())
+        for row in sorted(_canonical(r) for r in rows or ()):
+            h.update(row.encode())
+            h.update(b"\n")
+    for part in parts:
+        h.update(b"\x00")
+        h.update(str(part).encode())
+    return h.hexdigest()
+
+
+class AnalysisCache:
+    """
+    SQLite-backed result cache with TTL and size-based eviction
+    Entries are evicted oldest-access first once either the entry count or the
+    total stored bytes goes over its limit.
+    """
+
+    def __init__(self, db_path=db.DB_PATH, ttl=ANALYSIS_CACHE_TTL,
+                 max_entries=ANALYSIS_CACHE_MAX_ENTRIES, max_bytes=ANALYSIS_CACHE_MAX_BYTES):
+        self.db_path = db_path
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._init_table()
+
+    def _connect(self):
+        return sqlite3.connect(self.db_path, timeout=db.DB_TIMEOUT)
+
+    def _init_table(self):
+        conn = self._connect()
+        conn.execute('''CREATE TABLE IF NOT EXISTS analysis_cache
+                        (key TEXT PRIMARY KEY,
+                         customer_id TEXT,
+                         result TEXT,
+                         size INTEGER,
+                         created_at REAL,
+                         last_access REAL)''')
+        conn.execute('CREATE INDEX IF NOT EXISTS idx_analysis_cache_access ON analysis_cache (last_access)')
+        conn.commit()
+        conn.close()
+
+    def get(self, key):
+        """Returns the cached result, or None on a miss or an expired entry"""
+        now = time.time()
+        conn = self._connect()
+        try:
+            row = conn.execute('SELECT result, created_at FROM analysis_cache WHERE key = ?',
+                               (key,)).fetchone()
+            if row is None:
+                return None
+            if now - row[1] > self.ttl:
+                conn.execute('DELETE FROM analysis_cache WHERE key = ?', (key,))
+                conn.commit()
+                return None
+            conn.execute('UPDATE analysis_cache SET last_access = ? WHERE key = ?', (now, key))
+            conn.commit()
+            return serialization.loads(row[0])
+        finally:
+            conn.close()
+
+    def put(self, key, result, customer_id=None):
+        now = time.time()
+        payload = serialization.dumps(result).decode()
+        conn = self._connect()
+        try:
+            conn.execute('''INSERT OR REPLACE INTO analysis_cache
+                            (key, customer_id, result, size, created_at, last_access)
+                            VALUES (?, ?, ?, ?, ?, ?)''',
+                         (key, customer_id, payload, len(payload), now, now))
+            self._evict(conn, now)
+            conn.commit()
+        finally:
+            conn.close()
+
+    def _evict(self, conn, now):
+        conn.execute('DELETE FROM analysis_cache WHERE created_at < ?', (now - self.ttl,))
+
+        count, total = conn.execute('SELECT COUNT(*), COALESCE(SUM(size), 0) FROM analysis_cache').fetchone()
+        if count <= self.max_entries and total <= self.max_bytes:
+            return
+
+        evicted = 0
+        rows = conn.execute('SELECT key, size FROM analysis_cache ORDER BY last_access').fetchall()
+        for key, size in rows:
+            if count <= self.max_entries and total <= self.max_bytes:
+                break
+            conn.execute('DELETE FROM analysis_cache WHERE key = ?', (key,))
+            count -= 1
+            total -= size
+            evicted += 1
+        log.debug("Analysis cache evicted entries", evicted=evicted, entries=count, bytes=total)
+
+    def invalidate(self, key):
+        conn = self._connect()
+        conn.execute('DELETE FROM analysis_cache WHERE key = ?', (key,))
+        conn.commit()
+        conn.close()
+
+    def stats(self):
+        conn = self._connect()
+        count, total = conn.execute('SELECT COUNT(*), COALESCE(SUM(size), 0) FROM analysis_cache').fetchone()
+        conn.close()
+        return {"entries": count, "bytes": total}
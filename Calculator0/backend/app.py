@@ -1,57 +1,51 @@
+import config  # .env first, before anything reads os.environ
 from flask import Flask, request, jsonify
 from flask_cors import CORS
-import sqlite3
-import hashlib
 from datetime import datetime
+from functools import wraps
+import db
+import analysis
+from admission import AdmissionController, Rejected
+from logger import get_logger
+import profiling
 
 app = Flask(__name__)
 CORS(app)  # Allow React Native to call this API
 
-# ============================================================================
-# DATABASE SETUP
-# ============================================================================
-
-def init_db():
-    """Initialize SQLite database with users table only"""
-    conn = sqlite3.connect('secure_data.db')
-    c = conn.cursor()
-    
-    # Users table
-    c.execute('''CREATE TABLE IF NOT EXISTS users
-                 (id TEXT PRIMARY KEY, 
-                  password_hash TEXT, 
-                  customer_id TEXT,
-                  created_at DATETIME DEFAULT CURRENT_TIMESTAMP)''')
-    
-    conn.commit()
-    conn.close()
-    print("✅ Database initialized")
-
-init_db()
+log = get_logger("app")
+auth_admission = AdmissionController()
+profiling.install_flask(app)  # no-op unless PROFILE is set
 
 # ============================================================================
 # HELPER FUNCTIONS
 # ============================================================================
 
-def verify_user(user_id, password):
-    """Verify user credentials"""
-    password_hash = hashlib.sha256(password.encode()).hexdigest()
-    
-    conn = sqlite3.connect('secure_data.db')
-    c = conn.cursor()
-    c.execute('SELECT password_hash, customer_id FROM users WHERE id = ?', (user_id,))
-    result = c.fetchone()
-    conn.close()
-    
-    if result and result[0] == password_hash:
-        return True, result[1]  # Return (is_valid, customer_id)
-    return False, None
+def admission_controlled(view):
+    """Rate limit and cap concurrency for an auth endpoint (429/503 + Retry-After)"""
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        data = request.get_json(silent=True) or {}
+        user_id = data.get('user_id') or data.get('firebase_uid')
+        try:
+            with auth_admission.admit(user_id=user_id, ip=request.remote_addr):
+                return view(*args, **kwargs)
+        except Rejected as e:
+            log.warning("⛔ Request rejected", endpoint=request.path, status=e.status,
+                        user_id=user_id, ip=request.remote_addr, sample=0.1)
+            response = jsonify({
+                'success': False,
+                'error': e.reason
+            })
+            response.headers['Retry-After'] = e.retry_after_header
+            return response, e.status
+    return wrapper
 
 # ============================================================================
 # AUTHENTICATION ENDPOINTS
 # ============================================================================
 
 @app.route('/api/auth/setup', methods=['POST'])
+@admission_controlled
 def setup_account():
     """
     Initial account setup - create new user
@@ -75,29 +69,14 @@ def setup_account():
                 'error': 'Missing required fields: firebase_uid, password, customer_id'
             }), 400
         
-        # Hash password for storage
-        password_hash = hashlib.sha256(password.encode()).hexdigest()
-        
-        # Store in database
-        conn = sqlite3.connect('secure_data.db')
-        c = conn.cursor()
-        
-        # Check if user already exists
-        c.execute('SELECT id FROM users WHERE id = ?', (firebase_uid,))
-        existing = c.fetchone()
-        
-        if existing:
+        # Store in database (fails if user already exists)
+        if not db.create_user(firebase_uid, password, customer_id):
             return jsonify({
                 'success': False,
                 'error': 'User already exists'
             }), 409
         
-        c.execute('INSERT INTO users (id, password_hash, customer_id) VALUES (?, ?, ?)', 
-                  (firebase_uid, password_hash, customer_id))
-        conn.commit()
-        conn.close()
-        
-        print(f"✅ User created: {firebase_uid}")
+        log.info("✅ User created", user_id=firebase_uid)
         
         return jsonify({
             'success': True,
@@ -107,13 +86,14 @@ def setup_account():
         })
         
     except Exception as e:
-        print(f"❌ Setup error: {e}")
+        log.error("❌ Setup error", error=str(e))
         return jsonify({
             'success': False,
             'error': str(e)
         }), 500
 
 @app.route('/api/auth/login', methods=['POST'])
+@admission_controlled
 def login():
     """
     Login with PIN/password
@@ -138,7 +118,7 @@ def login():
         
         # Check for decoy PIN first (0000)
         if password == '0000':
-            print(f"⚠️  Decoy PIN used by: {user_id}")
+            log.warning("⚠️  Decoy PIN used", user_id=user_id)
             return jsonify({
                 'success': True,
                 'is_decoy': True,
@@ -146,10 +126,10 @@ def login():
             })
         
         # Verify real credentials
-        is_valid, customer_id = verify_user(user_id, password)
+        is_valid, customer_id = db.verify_user(user_id, password)
         
         if is_valid:
-            print(f"✅ Login successful: {user_id}")
+            log.info("✅ Login successful", user_id=user_id)
             return jsonify({
                 'success': True,
                 'is_decoy': False,
@@ -157,20 +137,21 @@ def login():
                 'message': 'Login successful'
             })
         else:
-            print(f"❌ Login failed: {user_id}")
+            log.warning("❌ Login failed", user_id=user_id)
             return jsonify({
                 'success': False,
                 'error': 'Invalid credentials'
             }), 401
             
     except Exception as e:
-        print(f"❌ Login error: {e}")
+        log.error("❌ Login error", error=str(e))
         return jsonify({
             'success': False,
             'error': str(e)
         }), 500
 
 @app.route('/api/auth/verify', methods=['POST'])
+@admission_controlled
 def verify_password():
     """
     Verify password without full login (for sensitive operations)
@@ -192,7 +173,7 @@ def verify_password():
                 'error': 'Missing credentials'
             }), 400
         
-        is_valid, customer_id = verify_user(user_id, password)
+        is_valid, customer_id = db.verify_user(user_id, password)
         
         return jsonify({
             'success': True,
@@ -231,7 +212,7 @@ def update_password():
             }), 400
         
         # Verify old password
-        is_valid, _ = verify_user(user_id, old_password)
+        is_valid, _ = db.verify_user(user_id, old_password)
         if not is_valid:
             return jsonify({
                 'success': False,
@@ -239,16 +220,9 @@ def update_password():
             }), 401
         
         # Update to new password
-        new_password_hash = hashlib.sha256(new_password.encode()).hexdigest()
+        db.update_password(user_id, new_password)
         
-        conn = sqlite3.connect('secure_data.db')
-        c = conn.cursor()
-        c.execute('UPDATE users SET password_hash = ? WHERE id = ?',
-                  (new_password_hash, user_id))
-        conn.commit()
-        conn.close()
-        
-        print(f"✅ Password updated: {user_id}")
+        log.info("✅ Password updated", user_id=user_id)
         
         return jsonify({
             'success': True,
@@ -256,7 +230,7 @@ def update_password():
         })
         
     except Exception as e:
-        print(f"❌ Password update error: {e}")
+        log.error("❌ Password update error", error=str(e))
         return jsonify({
             'success': False,
             'error': str(e)
@@ -287,7 +261,7 @@ def delete_account():
             }), 400
         
         # Verify password
-        is_valid, _ = verify_user(user_id, password)
+        is_valid, _ = db.verify_user(user_id, password)
         if not is_valid:
             return jsonify({
                 'success': False,
@@ -295,13 +269,9 @@ def delete_account():
             }), 401
         
         # Delete account
-        conn = sqlite3.connect('secure_data.db')
-        c = conn.cursor()
-        c.execute('DELETE FROM users WHERE id = ?', (user_id,))
-        conn.commit()
-        conn.close()
+        db.delete_user(user_id)
         
-        print(f"✅ Account deleted: {user_id}")
+        log.info("✅ Account deleted", user_id=user_id)
         
         return jsonify({
             'success': True,
@@ -309,7 +279,129 @@ def delete_account():
         })
         
     except Exception as e:
-        print(f"❌ Account deletion error: {e}")
+        log.error("❌ Account deletion error", error=str(e))
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+# ============================================================================
+# ANALYSIS ENDPOINTS
+# ============================================================================
+
+@app.route('/api/analysis/run', methods=['POST'])
+@admission_controlled
+def run_analysis():
+    """
+    Run (or fetch the cached) Gemini abuse analysis for a transaction history
+    Unchanged data returns the stored result without calling Gemini.
+    Requires the user's credentials; the analysis is recorded under their customer_id.
+    
+    Request:
+    {
+        "user_id": "firebase_uid",
+        "password": "user_pin",
+        "transactions": [...]  (or "deposits": [...], "purchases": [...]),
+        "model": "gemini-2.5-flash" (optional)
+    }
+    """
+    try:
+        data = request.json
+        user_id = data.get('user_id')
+        password = data.get('password')
+        
+        if not user_id or not password:
+            return jsonify({
+                'success': False,
+                'error': 'Missing credentials'
+            }), 400
+        
+        is_valid, customer_id = db.verify_user(user_id, password)
+        if not is_valid:
+            log.warning("❌ Analysis denied", user_id=user_id)
+            return jsonify({
+                'success': False,
+                'error': 'Invalid credentials'
+            }), 401
+        
+        if 'transactions' in data:
+            transaction_data = data['transactions']
+        else:
+            transaction_data = {
+                'deposits': data.get('deposits', []),
+                'purchases': data.get('purchases', [])
+            }
+        
+        if not transaction_data:
+            return jsonify({
+                'success': False,
+                'error': 'Missing transaction data'
+            }), 400
+        
+        text, cached, key = analysis.run_analysis(
+            transaction_data,
+            model=data.get('model') or analysis.DEFAULT_MODEL,
+            customer_id=customer_id
+        )
+        
+        return jsonify({
+            'success': True,
+            'analysis': text,
+            'cached': cached,
+            'fingerprint': key
+        })
+        
+    except Exception as e:
+        log.error("❌ Analysis error", error=str(e))
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+@app.route('/api/projection/run', methods=['POST'])
+def run_projection():
+    """
+    Monte Carlo time-to-goal projection for the safety-plan savings goals
+    
+    Request:
+    {
+        "deposits": [...],
+        "purchases": [...],
+        "goals": {"rent": 1400, ...} (optional, default rent/deposit/emergency/moving),
+        "rent": 1400 (optional),
+        "paths": 10000 (optional, positive integer, capped at PROJECTION_PATHS)
+    }
+    """
+    try:
+        import projection  # NumPy is only loaded when a projection is requested
+        
+        data = request.json or {}
+        if not data.get('deposits') and not data.get('purchases'):
+            return jsonify({
+                'success': False,
+                'error': 'Missing transaction data'
+            }), 400
+        try:
+            paths = projection.request_paths(data.get('paths'))
+        except ValueError as e:
+            return jsonify({
+                'success': False,
+                'error': str(e)
+            }), 400
+        
+        result = projection.project_goals(
+            data,
+            goals=data.get('goals'),
+            paths=paths,
+            rent=data.get('rent')
+        )
+        return jsonify({
+            'success': True,
+            'projection': result
+        })
+        
+    except Exception as e:
+        log.error("❌ Projection error", error=str(e))
         return jsonify({
             'success': False,
             'error': str(e)
@@ -332,20 +424,7 @@ def health_check():
 def list_users():
     """List all users (for testing only - remove in production!)"""
     try:
-        conn = sqlite3.connect('secure_data.db')
-        c = conn.cursor()
-        c.execute('SELECT id, customer_id, created_at FROM users')
-        users = c.fetchall()
-        conn.close()
-        
-        user_list = [
-            {
-                'user_id': user[0],
-                'customer_id': user[1],
-                'created_at': user[2]
-            }
-            for user in users
-        ]
+        user_list = db.list_users()
         
         return jsonify({
             'success': True,
@@ -370,13 +449,14 @@ if __name__ == '__main__':
     print("📍 Running on: http://localhost:5000")
     print("🔥 Hot reload enabled")
     print("🌐 CORS enabled for React Native")
-    print("💾 Database: secure_data.db")
+    print(f"💾 Database: {db.DB_PATH}")
     print("\n🚀 Available endpoints:")
     print("   POST /api/auth/setup")
     print("   POST /api/auth/login")
     print("   POST /api/auth/verify")
     print("   POST /api/auth/update-password")
     print("   POST /api/auth/delete-account")
+    print("   POST /api/analysis/run")
     print("   GET  /api/health")
     print("   GET  /api/users/list")
     print("="*60 + "\n")
@@ -0,0 +1,349 @@
+"""
+Async (ASGI) variant of the auth API in app.py
+Same routes, request/response shapes and admission control, served by Quart.
+SQLite work runs on a small thread pool so the event loop never blocks on it.
+
+Run with:
+    hypercorn asgi_app:app --bind 0.0.0.0:5000 --workers 1
+"""
+
+import config  # .env first, before anything reads os.environ
+import asyncio
+import os
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from functools import partial, wraps
+
+from quart import Quart, request, jsonify
+from quart_cors import cors
+
+import analysis
+import db
+from admission import AdmissionController, Rejected
+from logger import get_logger
+
+# SQLite serializes writers anyway; a few threads is enough to keep reads overlapping
+DB_WORKERS = int(os.getenv("DB_WORKERS", "4"))
+
+app = cors(Quart(__name__))  # Allow React Native to call this API
+
+log = get_logger("asgi_app")
+auth_admission = AdmissionController()
+db_executor = ThreadPoolExecutor(max_workers=DB_WORKERS, thread_name_prefix="db")
+
+# ============================================================================
+# DATABASE SETUP
+# ============================================================================
+
+async def run_db(func, *args, **kwargs):
+    """Run a blocking db.* call on the DB thread pool"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(db_executor, partial(func, *args, **kwargs))
+
+@app.before_serving
+async def startup():
+    await run_db(db.init_db)
+
+@app.after_serving
+async def shutdown():
+    db_executor.shutdown(wait=True)
+
+# ============================================================================
+# HELPER FUNCTIONS
+# ============================================================================
+
+def admission_controlled(view):
+    """Rate limit and cap concurrency for an auth endpoint (429/503 + Retry-After)"""
+    @wraps(view)
+    async def wrapper(*args, **kwargs):
+        data = await request.get_json(silent=True) or {}
+        user_id = data.get('user_id') or data.get('firebase_uid')
+        try:
+            async with auth_admission.admit_async(user_id=user_id, ip=request.remote_addr):
+                return await view(*args, **kwargs)
+        except Rejected as e:
+            log.warning("⛔ Request rejected", endpoint=request.path, status=e.status,
+                        user_id=user_id, ip=request.remote_addr, sample=0.1)
+            response = jsonify({
+                'success': False,
+                'error': e.reason
+            })
+            response.headers['Retry-After'] = e.retry_after_header
+            return response, e.status
+    return wrapper
+
+def error_response(e, status=500):
+    return jsonify({
+        'success': False,
+        'error': str(e)
+    }), status
+
+# ============================================================================
+# AUTHENTICATION ENDPOINTS
+# ============================================================================
+
+@app.route('/api/auth/setup', methods=['POST'])
+@admission_controlled
+async def setup_account():
+    """Initial account setup - see app.setup_account"""
+    try:
+        data = await request.get_json()
+        firebase_uid = data.get('firebase_uid') or data.get('user_id')
+        password = data.get('password')
+        customer_id = data.get('customer_id')
+
+        if not all([firebase_uid, password, customer_id]):
+            return error_response('Missing required fields: firebase_uid, password, customer_id', 400)
+
+        if not await run_db(db.create_user, firebase_uid, password, customer_id):
+            return error_response('User already exists', 409)
+
+        log.info("✅ User created", user_id=firebase_uid)
+
+        return jsonify({
+            'success': True,
+            'user_id': firebase_uid,
+            'customer_id': customer_id,
+            'message': 'Account setup complete'
+        })
+
+    except Exception as e:
+        log.error("❌ Setup error", error=str(e))
+        return error_response(e)
+
+@app.route('/api/auth/login', methods=['POST'])
+@admission_controlled
+async def login():
+    """Login with PIN/password (real or decoy) - see app.login"""
+    try:
+        data = await request.get_json()
+        user_id = data.get('user_id')
+        password = data.get('password')
+
+        if not user_id or not password:
+            return error_response('Missing credentials', 400)
+
+        # Check for decoy PIN first (0000)
+        if password == '0000':
+            log.warning("⚠️  Decoy PIN used", user_id=user_id)
+            return jsonify({
+                'success': True,
+                'is_decoy': True,
+                'message': 'Decoy mode activated'
+            })
+
+        is_valid, customer_id = await run_db(db.verify_user, user_id, password)
+
+        if is_valid:
+            log.info("✅ Login successful", user_id=user_id)
+            return jsonify({
+                'success': True,
+                'is_decoy': False,
+                'customer_id': customer_id,
+                'message': 'Login successful'
+            })
+
+        log.warning("❌ Login failed", user_id=user_id)
+        return error_response('Invalid credentials', 401)
+
+    except Exception as e:
+        log.error("❌ Login error", error=str(e))
+        return error_response(e)
+
+@app.route('/api/auth/verify', methods=['POST'])
+@admission_controlled
+async def verify_password():
+    """Verify password without full login - see app.verify_password"""
+    try:
+        data = await request.get_json()
+        user_id = data.get('user_id')
+        password = data.get('password')
+
+        if not user_id or not password:
+            return error_response('Missing credentials', 400)
+
+        is_valid, customer_id = await run_db(db.verify_user, user_id, password)
+
+        return jsonify({
+            'success': True,
+            'valid': is_valid,
+            'customer_id': customer_id if is_valid else None
+        })
+
+    except Exception as e:
+        return error_response(e)
+
+@app.route('/api/auth/update-password', methods=['POST'])
+async def update_password():
+    """Update user password - see app.update_password"""
+    try:
+        data = await request.get_json()
+        user_id = data.get('user_id')
+        old_password = data.get('old_password')
+        new_password = data.get('new_password')
+
+        if not all([user_id, old_password, new_password]):
+            return error_response('Missing required fields', 400)
+
+        is_valid, _ = await run_db(db.verify_user, user_id, old_password)
+        if not is_valid:
+            return error_response('Invalid current password', 401)
+
+        await run_db(db.update_password, user_id, new_password)
+
+        log.info("✅ Password updated", user_id=user_id)
+
+        return jsonify({
+            'success': True,
+            'message': 'Password updated successfully'
+        })
+
+    except Exception as e:
+        log.error("❌ Password update error", error=str(e))
+        return error_response(e)
+
+@app.route('/api/auth/delete-account', methods=['POST'])
+async def delete_account():
+    """Delete user account - see app.delete_account"""
+    try:
+        data = await request.get_json()
+        user_id = data.get('user_id')
+        password = data.get('password')
+        confirm = data.get('confirm')
+
+        if confirm != "DELETE":
+            return error_response('Confirmation required. Must send "confirm": "DELETE"', 400)
+
+        is_valid, _ = await run_db(db.verify_user, user_id, password)
+        if not is_valid:
+            return error_response('Invalid password', 401)
+
+        await run_db(db.delete_user, user_id)
+
+        log.info("✅ Account deleted", user_id=user_id)
+
+        return jsonify({
+            'success': True,
+            'message': 'Account deleted successfully'
+        })
+
+    except Exception as e:
+        log.error("❌ Account deletion error", error=str(e))
+        return error_response(e)
+
+# ============================================================================
+# ANALYSIS ENDPOINTS
+# ============================================================================
+
+@app.route('/api/analysis/run', methods=['POST'])
+@admission_controlled
+async def run_analysis():
+    """Run (or fetch the cached) Gemini abuse analysis - see app.run_analysis"""
+    try:
+        data = await request.get_json()
+        user_id = data.get('user_id')
+        password = data.get('password')
+
+        if not user_id or not password:
+            return error_response('Missing credentials', 400)
+
+        is_valid, customer_id = await run_db(db.verify_user, user_id, password)
+        if not is_valid:
+            log.warning("❌ Analysis denied", user_id=user_id)
+            return error_response('Invalid credentials', 401)
+
+        if 'transactions' in data:
+            transaction_data = data['transactions']
+        else:
+            transaction_data = {
+                'deposits': data.get('deposits', []),
+                'purchases': data.get('purchases', [])
+            }
+
+        if not transaction_data:
+            return error_response('Missing transaction data', 400)
+
+        # Gemini call and cache I/O are blocking; keep them off the event loop
+        text, cached, key = await asyncio.to_thread(
+            analysis.run_analysis,
+            transaction_data,
+            model=data.get('model') or analysis.DEFAULT_MODEL,
+            customer_id=customer_id
+        )
+
+        return jsonify({
+            'success': True,
+            'analysis': text,
+            'cached': cached,
+            'fingerprint': key
+        })
+
+    except Exception as e:
+        log.error("❌ Analysis error", error=str(e))
+        return error_response(e)
+
+@app.route('/api/projection/run', methods=['POST'])
+async def run_projection():
+    """Monte Carlo time-to-goal projection - see app.run_projection"""
+    try:
+        import projection  # NumPy is only loaded when a projection is requested
+
+        data = await request.get_json() or {}
+        if not data.get('deposits') and not data.get('purchases'):
+            return error_response('Missing transaction data', 400)
+        try:
+            paths = projection.request_paths(data.get('paths'))
+        except ValueError as e:
+            return error_response(str(e), 400)
+
+        # CPU-bound NumPy work; keep it off the event loop
+        result = await asyncio.to_thread(
+            projection.project_goals,
+            data,
+            goals=data.get('goals'),
+            paths=paths,
+            rent=data.get('rent')
+        )
+        return jsonify({
+            'success': True,
+            'projection': result
+        })
+
+    except Exception as e:
+        log.error("❌ Projection error", error=str(e))
+        return error_response(e)
+
+# ============================================================================
+# UTILITY ENDPOINTS
+# ============================================================================
+
+@app.route('/api/health', methods=['GET'])
+async def health_check():
+    """Check if API is running"""
+    return jsonify({
+        'status': 'healthy',
+        'timestamp': datetime.now().isoformat(),
+        'version': '1.0.0-auth-only-asgi'
+    })
+
+@app.route('/api/users/list', methods=['GET'])
+async def list_users():
+    """List all users (for testing only - remove in production!)"""
+    try:
+        user_list = await run_db(db.list_users)
+
+        return jsonify({
+            'success': True,
+            'users': user_list,
+            'count': len(user_list)
+        })
+
+    except Exception as e:
+        return error_response(e)
+
+# ============================================================================
+# RUN SERVER
+# ============================================================================
+
+if __name__ == '__main__':
+    app.run(port=5000, host='0.0.0.0')
@@ -0,0 +1,114 @@
+"""
+Side-by-side concurrency benchmark for the Flask (app.py) and ASGI (asgi_app.py) APIs
+
+Start both servers with ONE worker each, then point this script at them:
+    python app.py                                              # :5000
+    hypercorn asgi_app:app --bind 0.0.0.0:5001 --workers 1     # :5001
+    python benchmarks/bench_api_concurrency.py \\
+        --target flask=http://localhost:5000 --target asgi=http://localhost:5001
+
+For every concurrency level it reports throughput and p50/p99 latency, so the
+capacity of a single worker can be compared directly.
+
+Recorded run (GET /api/users/list on an empty database, one worker each,
+300 requests per level, development container):
+
+    target       conc      req/s     p50 ms     p99 ms
+    flask           1      539.9       1.77       2.60
+    flask           8      563.8      13.32      26.82
+    flask          32      530.7      58.16      80.33
+    asgi            1      394.0       2.31       4.59
+    asgi            8      497.3      15.54      20.86
+    asgi           32      648.8      48.27      67.38
+
+The ASGI worker is slower at low concurrency and pulls ahead at 32 in flight,
+with a tighter p99. Response parity is checked by tests/test_asgi_app.py.
+"""
+
+import argparse
+import json
+import statistics
+import threading
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+
+def timed_request(url, payload=None):
+    """Returns (latency_seconds, status)"""
+    data = json.dumps(payload).encode() if payload is not None else None
+    req = urllib.request.Request(url, data=data, headers={'Content-Type': 'application/json'})
+    start = time.perf_counter()
+    try:
+        with urllib.request.urlopen(req, timeout=30) as resp:
+            resp.read()
+            status = resp.status
+    except urllib.error.HTTPError as e:
+        status = e.code
+    except (urllib.error.URLError, OSError):
+        status = 0
+    return time.perf_counter() - start, status
+
+
+def run_level(url, concurrency, total, payload=None):
+    """Fire `total` requests with `concurrency` in flight"""
+    latencies = []
+    statuses = {}
+    lock = threading.Lock()
+
+    def worker(_):
+        latency, status = timed_request(url, payload)
+        with lock:
+            latencies.append(latency)
+            statuses[status] = statuses.get(status, 0) + 1
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(worker, range(total)))
+    elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    return {
+        "concurrency": concurrency,
+        "requests": total,
+        "rps": total / elapsed,
+        "p50_ms": statistics.median(latencies) * 1000,
+        "p99_ms": latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))] * 1000,
+        "statuses": statuses,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--target", action="append", required=True,
+                        help="name=base_url, may be given more than once")
+    parser.add_argument("--path", default="/api/users/list")
+    parser.add_argument("--concurrency", default="1,8,32,128",
+                        help="comma separated concurrency levels")
+    parser.add_argument("--requests", type=int, default=500, help="requests per level")
+    parser.add_argument("--json", action="store_true", help="print machine-readable results")
+    args = parser.parse_args()
+
+    targets = [t.split("=", 1) for t in args.target]
+    levels = [int(c) for c in args.concurrency.split(",")]
+
+    results = {}
+    for name, base_url in targets:
+        url = base_url.rstrip("/") + args.path
+        timed_request(url)  # warm up
+        results[name] = [run_level(url, c, args.requests) for c in levels]
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+
+    print(f"{'target':<10} {'conc':>6} {'req/s':>10} {'p50 ms':>10} {'p99 ms':>10}  statuses")
+    for name, rows in results.items():
+        for row in rows:
+            print(f"{name:<10} {row['concurrency']:>6} {row['rps']:>10.1f} "
+                  f"{row['p50_ms']:>10.2f} {row['p99_ms']:>10.2f}  {row['statuses']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+"""
+Cipher throughput: MB/s per encryption method and payload size
+Covers the crypto.py backends (AES-256-GCM, ChaCha20-Poly1305, legacy AES-256-CBC),
+including base64 encoding as stored in the package files.
+
+    python benchmarks/bench_ciphers.py [--sizes 1024,65536,1048576] [--json]
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from crypto import CIPHERS, decrypt_package, encrypt_package
+
+DEFAULT_SIZES = "1024,16384,262144,4194304"
+
+
+def throughput(func, size, min_seconds=0.3):
+    """MB/s for func() over a payload of `size` bytes, repeated for at least min_seconds"""
+    runs = 0
+    start = time.perf_counter()
+    while True:
+        func()
+        runs += 1
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_seconds:
+            return size * runs / elapsed / 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", default=DEFAULT_SIZES, help="comma separated payload sizes in bytes")
+    parser.add_argument("--json", action="store_true")
+    args = parser.parse_args()
+
+    key = os.urandom(32)
+    rows = []
+    for size in (int(s) for s in args.sizes.split(",")):
+        plaintext = os.urandom(size)
+        for method in CIPHERS:
+            package = encrypt_package(key, plaintext, method)
+            assert decrypt_package(key, package) == plaintext
+            rows.append({
+                "method": method,
+                "bytes": size,
+                "encrypt_mb_s": round(throughput(lambda: encrypt_package(key, plaintext, method), size), 1),
+                "decrypt_mb_s": round(throughput(lambda: decrypt_package(key, package), size), 1),
+            })
+
+    if args.json:
+        print(json.dumps(rows, indent=2))
+        return
+
+    print(f"{'method':<20} {'bytes':>10} {'enc MB/s':>10} {'dec MB/s':>10}")
+    for row in rows:
+        print(f"{row['method']:<20} {row['bytes']:>10,} {row['encrypt_mb_s']:>10.1f} {row['decrypt_mb_s']:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+"""
+Compress-then-encrypt: size and time per codec and level
+For synthetic customer_data of several sizes, reports the compression ratio,
+compress / decompress time, and the encrypted package as written to
+encrypted_data/ (bytes on disk and time to encrypt, write and read back)
+against the uncompressed package. Small histories are also compressed with a
+dictionary trained on other customers.
+
+    python benchmarks/bench_compression.py [--rows 100,1000,10000] [--json]
+"""
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import compression
+import serialization
+from crypto import decrypt_package, encrypt_package
+from profiles import synthetic_customer_data
+
+KEY = bytes(32)
+
+
+def best_ms(func, min_seconds=0.2):
+    best = float("inf")
+    deadline = time.perf_counter() + min_seconds
+    while True:
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+        if time.perf_counter() > deadline:
+            return best * 1000
+
+
+def store_and_load(data, codec, level, dictionary, path):
+    """Compress, encrypt and write a package, then read, decrypt and decompress it"""
+    header = {}
+    payload = data
+    if codec:
+        payload, header = compression.compress_payload(data, codec, level, dictionary)
+    package = encrypt_package(KEY, payload)
+    package.update(header)
+    serialization.dump_file(package, path)
+    package = serialization.load_file(path)
+    assert compression.decompress_payload(package, decrypt_package(KEY, package)) == data
+    return os.path.getsize(path)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", default="100,1000,10000", help="comma separated transactions per customer")
+    parser.add_argument("--json", action="store_true")
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp()
+    compression.DICT_DIR = os.path.join(workdir, "dicts")
+    samples = [serialization.dumps(synthetic_customer_data(500, seed=seed)) for seed in range(1, 9)]
+    dictionary = compression.train_dictionary(samples, "zlib")
+
+    path = os.path.join(workdir, "package.json")
+    results = []
+    for rows in [int(r) for r in args.rows.split(",")]:
+        data = serialization.dumps(synthetic_customer_data(rows))
+        options = [(None, None, None)]
+        for name in compression.available_codecs():
+            codec = compression.get_codec(name)
+            options += [(name, level, None) for level in sorted({codec.levels.start + 1, codec.default_level})]
+        options.append(("zlib", 6, dictionary))
+
+        for codec, level, dict_id in options:
+            compressed = compression.compress_payload(data, codec, level, dict_id) if codec else (data, {})
+            results.append({
+                "rows": rows,
+                "codec": f"{codec} {level}" + (" +dict" if dict_id else "") if codec else "none",
+                "ratio": round(len(data) / len(compressed[0]), 2),
+                "compress_ms": round(best_ms(lambda: compression.compress_payload(data, codec, level, dict_id)), 3)
+                if codec else 0.0,
+                "decompress_ms": round(best_ms(lambda: compression.decompress_payload(compressed[1], compressed[0])), 3)
+                if codec else 0.0,
+                "file_bytes": store_and_load(data, codec, level, dict_id, path),
+                "store_load_ms": round(best_ms(lambda: store_and_load(data, codec, level, dict_id, path)), 3),
+            })
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+
+    print(f"{'rows':>6} {'codec':<14} {'ratio':>6} {'comp ms':>8} {'decomp ms':>9} {'file bytes':>12} "
+          f"{'store+load ms':>13}")
+    baseline = {}
+    for r in results:
+        base = baseline.setdefault(r["rows"], r)
+        print(f"{r['rows']:>6} {r['codec']:<14} {r['ratio']:>6.2f} {r['compress_ms']:>8.2f} {r['decompress_ms']:>9.2f} "
+              f"{r['file_bytes']:>12,} {r['store_load_ms']:>13.2f}  "
+              f"({base['file_bytes'] / r['file_bytes']:.1f}x smaller on disk)")
+
+
+if __name__ == "__main__":
+    main()
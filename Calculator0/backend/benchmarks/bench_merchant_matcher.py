@@ -0,0 +1,71 @@
+"""
+Merchant matcher throughput
+Generates bank-style descriptors (catalog merchants and aliases with random store
+numbers and suffixes, plus unknown merchants) and reports descriptions per minute
+with the per-description cache disabled (every row runs the automaton) and enabled.
+
+    python benchmarks/bench_merchant_matcher.py [--rows 200000] [--distinct 5000] [--json]
+"""
+
+import argparse
+import json
+import random
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from merchant_matcher import MerchantMatcher
+from merchants import ALIASES, MERCHANTS
+
+UNKNOWN = ["CORNER DELI", "SINGAPORE AIR", "CITY PARKING", "BOOKSHOP", "LAUNDROMAT"]
+SUFFIXES = ["", " ONLINE", " SAN FRANCISCO CA", " *TRIP", " MONTHLY"]
+
+
+def descriptors(distinct, seed=0):
+    rng = random.Random(seed)
+    names = [m["name"].upper() for m in MERCHANTS] + [pattern for pattern, _, _ in ALIASES] + UNKNOWN
+    return [f"{rng.choice(names)} #{rng.randint(1, 99999)}{rng.choice(SUFFIXES)}" for _ in range(distinct)]
+
+
+def rate(matcher, rows):
+    start = time.perf_counter()
+    for row in rows:
+        matcher.match(row)
+    return len(rows) / (time.perf_counter() - start) * 60
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=200_000)
+    parser.add_argument("--distinct", type=int, default=5_000, help="distinct descriptors in the stream")
+    parser.add_argument("--json", action="store_true")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    MerchantMatcher()
+    build_ms = (time.perf_counter() - start) * 1000
+
+    pool = descriptors(args.distinct)
+    rng = random.Random(1)
+    rows = [rng.choice(pool) for _ in range(args.rows)]
+
+    results = {
+        "rows": args.rows,
+        "distinct": args.distinct,
+        "build_ms": round(build_ms, 2),
+        "uncached_per_minute": round(rate(MerchantMatcher(cache_size=0), rows)),
+        "cached_per_minute": round(rate(MerchantMatcher(), rows)),
+    }
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+
+    print(f"{args.rows:,} descriptions ({args.distinct:,} distinct), automaton built in {build_ms:.1f} ms")
+    print(f"uncached: {results['uncached_per_minute']:>14,} / minute")
+    print(f"cached:   {results['cached_per_minute']:>14,} / minute")
+
+
+if __name__ == "__main__":
+    main()
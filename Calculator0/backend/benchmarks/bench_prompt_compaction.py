@@ -0,0 +1,77 @@
+"""
+Prompt size and latency: raw-history prompts vs compact feature-summary prompts
+Runs on the five generator profiles (see profiles.py).
+
+    python benchmarks/bench_prompt_compaction.py [--budget 600] [--live]
+
+--live also sends both prompts to Gemini (needs GEMINI_API_KEY) and reports
+end-to-end model latency; without it only prompt build time and size are measured.
+"""
+
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from analysis import build_abuse_prompt, call_gemini
+from prompt_compaction import estimate_tokens
+from profiles import generate_profiles
+
+
+def measure(func, repeat=20):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        result = func()
+    return result, (time.perf_counter() - start) / repeat * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--budget", type=int, default=600, help="token budget for compact prompts")
+    parser.add_argument("--live", action="store_true", help="also time real Gemini calls")
+    parser.add_argument("--json", action="store_true")
+    args = parser.parse_args()
+
+    rows = []
+    for name, data in generate_profiles().items():
+        history = {"deposits": data["deposits"], "purchases": data["purchases"]}
+        raw, raw_ms = measure(lambda: build_abuse_prompt(history, compact=False))
+        compact, compact_ms = measure(lambda: build_abuse_prompt(history, compact=True, token_budget=args.budget))
+
+        row = {
+            "profile": name,
+            "rows": len(data["deposits"]) + len(data["purchases"]),
+            "raw_tokens": estimate_tokens(raw),
+            "compact_tokens": estimate_tokens(compact),
+            "raw_build_ms": round(raw_ms, 3),
+            "compact_build_ms": round(compact_ms, 3),
+        }
+        row["reduction"] = round(1 - row["compact_tokens"] / row["raw_tokens"], 3)
+
+        if args.live:
+            for kind, prompt in (("raw", raw), ("compact", compact)):
+                start = time.perf_counter()
+                call_gemini(prompt)
+                row[f"{kind}_model_ms"] = round((time.perf_counter() - start) * 1000, 1)
+        rows.append(row)
+
+    if args.json:
+        print(json.dumps(rows, indent=2))
+        return
+
+    print(f"{'profile':<18} {'rows':>5} {'raw tok':>8} {'compact':>8} {'saved':>6} "
+          f"{'raw ms':>8} {'cmp ms':>8}")
+    for row in rows:
+        line = (f"{row['profile']:<18} {row['rows']:>5} {row['raw_tokens']:>8} "
+                f"{row['compact_tokens']:>8} {row['reduction']:>6.0%} "
+                f"{row['raw_build_ms']:>8.2f} {row['compact_build_ms']:>8.2f}")
+        if args.live:
+            line += f"  model {row['raw_model_ms']:.0f}ms -> {row['compact_model_ms']:.0f}ms"
+        print(line)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+"""
+Memory per transaction: JSON dicts vs slotted records vs struct-of-arrays batches
+Rows are round-tripped through JSON first so every string is a separate object,
+as it is when parsed from a Nessie API response.
+
+    python benchmarks/bench_records.py [--rows 100000] [--json]
+"""
+
+import argparse
+import gc
+import json
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from profiles import synthetic_customer_data
+from records import TransactionBatch, from_dicts
+
+
+def traced(build):
+    """(result, bytes allocated and still held, seconds) for build()"""
+    gc.collect()
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = build()
+    elapsed = time.perf_counter() - start
+    held, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, held, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--json", action="store_true")
+    args = parser.parse_args()
+
+    data = synthetic_customer_data(args.rows)
+    text = json.dumps(data["purchases"])
+    count = len(data["purchases"])
+
+    dicts, dict_bytes, parse_s = traced(lambda: json.loads(text))
+    layouts = {"json dicts": (dict_bytes, parse_s)}
+
+    records, record_bytes, record_s = traced(lambda: from_dicts(dicts, "purchase"))
+    layouts["slotted records"] = (record_bytes, record_s)
+
+    batch, batch_bytes, batch_s = traced(lambda: TransactionBatch.from_dicts(dicts, "purchase"))
+    layouts["column batch"] = (batch_bytes, batch_s)
+
+    start = time.perf_counter()
+    assert list(batch.to_dicts()) == [dict(row, amount=round(row["amount"] * 100) / 100) for row in dicts]
+    to_dicts_s = time.perf_counter() - start
+
+    rows = [{"layout": name, "bytes_per_row": round(held / count, 1),
+             "saving": round(1 - held / dict_bytes, 3), "build_ms": round(seconds * 1000, 1)}
+            for name, (held, seconds) in layouts.items()]
+
+    if args.json:
+        print(json.dumps({"rows": count, "layouts": rows, "batch_to_dicts_ms": round(to_dicts_s * 1000, 1)}, indent=2))
+        return
+
+    print(f"{count:,} purchases")
+    print(f"{'layout':<18} {'bytes/row':>10} {'saving':>8} {'build ms':>10}")
+    for row in rows:
+        print(f"{row['layout']:<18} {row['bytes_per_row']:>10.1f} {row['saving']:>8.0%} {row['build_ms']:>10.1f}")
+    print(f"batch -> dicts round trip check: {to_dicts_s * 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
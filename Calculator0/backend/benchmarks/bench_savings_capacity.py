@@ -0,0 +1,60 @@
+"""
+Savings capacity for a whole population
+Times one vectorized estimate_capacity() call over N synthetic customers against
+calling it once per customer, split into parsing (flatten) and the NumPy part.
+
+    python benchmarks/bench_savings_capacity.py [--customers 2000] [--rows 600] [--json]
+"""
+
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from profiles import synthetic_customer_data
+from savings_capacity import capacity_arrays, estimate_capacity, flatten
+
+
+def timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return result, (time.perf_counter() - start) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--customers", type=int, default=2000)
+    parser.add_argument("--rows", type=int, default=600, help="transactions per customer")
+    parser.add_argument("--json", action="store_true")
+    args = parser.parse_args()
+
+    population = [synthetic_customer_data(args.rows, seed=i, customer_id=f"c{i}") for i in range(args.customers)]
+
+    (purchases, deposits), flatten_ms = timed(lambda: flatten(population))
+    _, arrays_ms = timed(lambda: capacity_arrays(purchases, deposits, len(population)))
+    batch, batch_ms = timed(lambda: estimate_capacity(population))
+    single, single_ms = timed(lambda: [estimate_capacity([customer])[0] for customer in population])
+    assert [r["capacity"] for r in batch] == [r["capacity"] for r in single]
+
+    results = {
+        "customers": args.customers,
+        "rows_per_customer": args.rows,
+        "flatten_ms": round(flatten_ms, 1),
+        "numpy_ms": round(arrays_ms, 1),
+        "batch_ms": round(batch_ms, 1),
+        "per_customer_ms": round(single_ms, 1),
+    }
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+
+    print(f"{args.customers:,} customers x {args.rows} transactions")
+    print(f"batch:        {batch_ms:>9.1f} ms  (parse {flatten_ms:.1f} ms, numpy {arrays_ms:.1f} ms)")
+    print(f"per customer: {single_ms:>9.1f} ms  ({single_ms / batch_ms:.1f}x slower)")
+
+
+if __name__ == "__main__":
+    main()
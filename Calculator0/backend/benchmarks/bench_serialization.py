@@ -0,0 +1,87 @@
+"""
+customer_data serialization: speed and size
+Compares the old artifact format (json.dumps with indent=2) with serialization.dumps
+(compact, orjson when installed) on synthetic customer_data of several sizes:
+encode and decode time, JSON bytes, and the base64 ciphertext stored in the
+encrypted package.
+
+    python benchmarks/bench_serialization.py [--rows 1000,10000,100000] [--json]
+"""
+
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import serialization
+from crypto import encrypt_package
+from profiles import synthetic_customer_data
+
+KEY = bytes(32)
+
+
+def best_ms(func, min_seconds=0.3):
+    """Fastest of repeated runs, in milliseconds"""
+    best = float("inf")
+    deadline = time.perf_counter() + min_seconds
+    while True:
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+        if time.perf_counter() > deadline:
+            return best * 1000
+
+
+def variants():
+    stdlib = serialization.dumps if serialization.backend() == "json" else (
+        lambda obj: json.dumps(obj, separators=(",", ":"), ensure_ascii=False).encode())
+    found = {
+        "indent2": (lambda obj: json.dumps(obj, indent=2).encode(), lambda data: json.loads(data.decode())),
+        "compact_json": (stdlib, json.loads),
+    }
+    if serialization.backend() != "json":
+        found[f"compact_{serialization.backend()}"] = (serialization.dumps, serialization.loads)
+    return found
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", default="1000,10000,100000", help="comma separated transactions per customer")
+    parser.add_argument("--json", action="store_true")
+    args = parser.parse_args()
+
+    results = []
+    for rows in [int(r) for r in args.rows.split(",")]:
+        data = synthetic_customer_data(rows)
+        for name, (dumps, loads) in variants().items():
+            encoded = dumps(data)
+            assert loads(encoded) == data
+            results.append({
+                "rows": rows,
+                "format": name,
+                "dumps_ms": round(best_ms(lambda: dumps(data)), 3),
+                "loads_ms": round(best_ms(lambda: loads(encoded)), 3),
+                "json_bytes": len(encoded),
+                "package_bytes": len(encrypt_package(KEY, encoded)["encrypted_data"]),
+            })
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+
+    print(f"serialization backend: {serialization.backend()}")
+    print(f"{'rows':>7} {'format':<16} {'dumps ms':>9} {'loads ms':>9} {'JSON bytes':>12} {'package bytes':>14}")
+    baseline = {}
+    for result in results:
+        base = baseline.setdefault(result["rows"], result)
+        speedup = base["dumps_ms"] / result["dumps_ms"] if result["dumps_ms"] else 0
+        print(f"{result['rows']:>7} {result['format']:<16} {result['dumps_ms']:>9.2f} {result['loads_ms']:>9.2f} "
+              f"{result['json_bytes']:>12,} {result['package_bytes']:>14,}"
+              f"  ({speedup:.1f}x, {result['json_bytes'] / base['json_bytes']:.0%} size)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""
+Similarity index: exact vs partitioned search
+Times top-k queries over N random customer vectors with the batched exact search
+and with the partitioned (IVF) search, and reports the partitioned search's recall
+against the exact answer.
+
+    python benchmarks/bench_similarity_index.py [--customers 200000] [--queries 200] [-k 10] [--json]
+"""
+
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import numpy as np
+
+from similarity_index import DIMENSIONS, SimilarityIndex
+
+
+def timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return result, (time.perf_counter() - start) * 1000
+
+
+def clustered_vectors(count, seed=0, clusters=64):
+    """Unit vectors around a few dozen profiles, like real customers rather than uniform noise"""
+    rng = np.random.default_rng(seed)
+    centres = np.abs(rng.normal(size=(clusters, DIMENSIONS)))
+    vectors = centres[rng.integers(0, clusters, size=count)] + rng.normal(scale=0.3, size=(count, DIMENSIONS))
+    vectors = np.abs(vectors).astype(np.float32)
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--customers", type=int, default=200000)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("-k", type=int, default=10)
+    parser.add_argument("--json", action="store_true")
+    args = parser.parse_args()
+
+    vectors = clustered_vectors(args.customers)
+    index = SimilarityIndex()
+    _, build_ms = timed(lambda: index.upsert_many([f"c{i}" for i in range(args.customers)], vectors))
+    _, train_ms = timed(index.train)
+    _, layout_ms = timed(index._partitions)
+    queries = vectors[np.random.default_rng(1).integers(0, args.customers, size=args.queries)]
+
+    exact, exact_ms = timed(lambda: index.search_many(queries, args.k, exact=True))
+    approx, approx_ms = timed(lambda: index.search_many(queries, args.k, exact=False))
+    recall = np.mean([len({c for c, _ in a} & {c for c, _ in e}) / args.k for a, e in zip(approx, exact)])
+
+    results = {
+        "customers": args.customers,
+        "queries": args.queries,
+        "k": args.k,
+        "partitions": len(index.centroids),
+        "probes": index.probe_count(),
+        "build_ms": round(build_ms, 1),
+        "train_ms": round(train_ms, 1),
+        "layout_ms": round(layout_ms, 1),
+        "exact_ms_per_query": round(exact_ms / args.queries, 3),
+        "partitioned_ms_per_query": round(approx_ms / args.queries, 3),
+        "recall": round(float(recall), 3),
+    }
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+
+    print(f"{args.customers:,} customers x {DIMENSIONS} features, top-{args.k}")
+    print(f"build {build_ms:.0f} ms, train {train_ms:.0f} ms ({results['partitions']} partitions), "
+          f"layout {layout_ms:.0f} ms")
+    print(f"exact:       {results['exact_ms_per_query']:>8.3f} ms/query")
+    print(f"partitioned: {results['partitioned_ms_per_query']:>8.3f} ms/query  "
+          f"(probes {results['probes']}, recall@{args.k} {recall:.1%})")
+
+
+if __name__ == "__main__":
+    main()
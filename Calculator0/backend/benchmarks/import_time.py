@@ -0,0 +1,120 @@
+"""
+Import-time budgets for the backend entry points
+Runs `python -X importtime -c "import <module>"` in a fresh interpreter per module
+(best of --repeat runs), reports the module's cumulative import time and its
+heaviest dependencies, and fails when a module goes over its budget.
+
+    python benchmarks/import_time.py                 # all modules in BUDGETS_MS
+    python benchmarks/import_time.py encryption app  # just these
+    python benchmarks/import_time.py --scale 2       # slower machine: double the budgets
+
+Budgets are for the import itself (interpreter start-up is excluded) and were set
+with headroom on a single-core VM; scale them rather than editing them per machine.
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+
+# Cumulative import time budgets in milliseconds
+BUDGETS_MS = {
+    "config": 5,
+    "crypto": 10,
+    "nessie_client": 10,
+    "envelope": 40,
+    "decrypt": 60,
+    "statement_report": 60,
+    "generate_data": 70,
+    "encryption": 80,
+    # The APIs are dominated by Flask / Quart themselves
+    "app": 350,
+    "asgi_app": 500,
+}
+
+# Modules that must not be imported just by importing an entry point
+DEFERRED = ("requests", "cryptography", "dotenv", "cProfile", "google.generativeai", "numpy")
+
+
+def import_profile(module):
+    """
+    One fresh-interpreter import of `module`
+    Returns: (total microseconds, {imported module: cumulative microseconds})
+    """
+    env = dict(os.environ, PYTHONPATH=str(BACKEND_DIR))
+    code = f"import {module}" if module else "pass"
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        cwd=BACKEND_DIR, env=env, capture_output=True, text=True,
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"import {module} failed:\n{result.stderr[-2000:]}")
+
+    modules = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        modules[name.strip()] = int(cumulative_us)
+    return modules.get(module, 0), modules
+
+
+def measure(module, repeat):
+    runs = [import_profile(module) for _ in range(repeat)]
+    return min(runs, key=lambda run: run[0])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check backend import times against budgets")
+    parser.add_argument("modules", nargs="*", help="modules to check (default: all budgets)")
+    parser.add_argument("--repeat", type=int, default=5, help="fresh interpreters per module (best is kept)")
+    parser.add_argument("--scale", type=float, default=float(os.getenv("IMPORT_BUDGET_SCALE", "1.0")))
+    parser.add_argument("--top", type=int, default=5, help="heaviest dependencies to show")
+    parser.add_argument("--json", action="store_true")
+    args = parser.parse_args()
+
+    # Modules loaded by interpreter start-up (site, .pth files) aren't ours to budget
+    startup = set(import_profile(None)[1])
+
+    rows = []
+    for module in args.modules or list(BUDGETS_MS):
+        total_us, modules = measure(module, args.repeat)
+        budget = BUDGETS_MS.get(module)
+        budget_ms = budget * args.scale if budget is not None else None
+        heaviest = sorted(((us, name) for name, us in modules.items()
+                           if name != module and name not in startup), reverse=True)
+        rows.append({
+            "module": module,
+            "import_ms": round(total_us / 1000, 2),
+            "budget_ms": budget_ms,
+            "over_budget": budget_ms is not None and total_us / 1000 > budget_ms,
+            "eager": [name for name in DEFERRED if name in modules and name not in startup],
+            "heaviest": [{"module": name, "ms": round(us / 1000, 2)} for us, name in heaviest[:args.top]],
+        })
+
+    failures = [r for r in rows if r["over_budget"] or (r["eager"] and r["module"] in BUDGETS_MS)]
+
+    if args.json:
+        print(json.dumps(rows, indent=2))
+    else:
+        print(f"{'module':<18} {'import ms':>10} {'budget':>8}  heaviest")
+        for r in rows:
+            budget = f"{r['budget_ms']:.0f}" if r["budget_ms"] is not None else "-"
+            flag = " ⚠️" if r in failures else ""
+            heavy = ", ".join(f"{h['module']} {h['ms']:.1f}" for h in r["heaviest"][:3])
+            print(f"{r['module']:<18} {r['import_ms']:>10.2f} {budget:>8}{flag}  {heavy}")
+            if r["eager"]:
+                print(f"{'':<18} eagerly imports: {', '.join(r['eager'])}")
+
+    if failures:
+        print(f"\n❌ {len(failures)} module(s) over budget or importing deferred dependencies")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
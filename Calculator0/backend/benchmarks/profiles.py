@@ -0,0 +1,133 @@
+"""
+Offline customer histories for benchmarks
+Runs the five generate_data.py profiles against an in-memory fake of the Nessie
+API and returns customer_data dicts shaped like fetch_customer_data_by_id output.
+synthetic_customer_data() builds histories of any size (up to millions of rows).
+"""
+
+import random
+from datetime import date, timedelta
+import sys
+from pathlib import Path
+
+# Add backend root so imports like generate_data work when running from benchmarks/
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from generate_data import FinancialAbuseDataGenerator
+
+PROFILES = [
+    ("Sarah Johnson", "generate_customer_1_no_abuse"),
+    ("Maria Rodriguez", "generate_customer_2_moderate_abuse"),
+    ("Jennifer Lee", "generate_customer_3_severe_abuse"),
+    ("Michael Thompson", "generate_customer_4_recovery_pattern"),
+    ("David Park", "generate_customer_5_sudden_abuse"),
+]
+
+
+class RecordingDataGenerator(FinancialAbuseDataGenerator):
+    """Generator whose API calls are answered locally and recorded"""
+
+    def __init__(self):
+        super().__init__(api_key=None)
+        self.merchant_info = {}
+        self.deposits = []
+        self.purchases = []
+        self._next_id = 0
+
+    def _new_id(self):
+        self._next_id += 1
+        return f"{self._next_id:024x}"
+
+    def _make_request(self, method, endpoint, data=None):
+        object_id = self._new_id()
+        if endpoint == "/merchants":
+            self.merchant_info[object_id] = data
+        elif endpoint.endswith("/deposits"):
+            self.deposits.append(dict(data, _id=object_id))
+        elif endpoint.endswith("/purchases"):
+            merchant = self.merchant_info.get(data["merchant_id"], {})
+            self.purchases.append(dict(
+                data, _id=object_id,
+                merchant_name=merchant.get("name", "Unknown"),
+                merchant_category=merchant.get("category", "Unknown"),
+            ))
+        return {"objectCreated": dict(data or {}, _id=object_id)}
+
+    def take(self, customer_id, name):
+        """Package what was recorded since the last call as a customer_data dict"""
+        deposits = sorted(self.deposits, key=lambda x: x.get("transaction_date", ""))
+        purchases = sorted(self.purchases, key=lambda x: x.get("purchase_date", ""))
+        self.deposits, self.purchases = [], []
+
+        first_name, last_name = name.split(" ", 1)
+        return {
+            "customer_id": customer_id,
+            "customer_name": name,
+            "customer_metadata": {"first_name": first_name, "last_name": last_name, "address": {}},
+            "account": {"account_id": f"acct-{customer_id}", "type": "Checking",
+                        "nickname": f"{first_name}'s Checking Account", "balance": 0, "rewards": 0},
+            "deposits": deposits,
+            "purchases": purchases,
+            "statistics": {
+                "total_deposits": len(deposits),
+                "total_purchases": len(purchases),
+                "total_deposited": sum(d.get("amount", 0) for d in deposits),
+                "total_spent": sum(p.get("amount", 0) for p in purchases),
+                "date_range": "6 months",
+                "categories_active": len(set(p.get("merchant_category", "Unknown") for p in purchases)),
+            },
+        }
+
+
+def generate_profiles(seed=0):
+    """Returns {profile_name: customer_data} for the five generator profiles"""
+    random.seed(seed)
+    generator = RecordingDataGenerator()
+    generator.setup_merchants()
+
+    profiles = {}
+    for index, (name, method) in enumerate(PROFILES, 1):
+        customer_id = f"profile{index}"
+        getattr(generator, method)(customer_id, f"acct-{customer_id}")
+        profiles[name] = generator.take(customer_id, name)
+    return profiles
+
+
+SYNTHETIC_MERCHANTS = [
+    ("Safeway", "Groceries"), ("Whole Foods", "Groceries"), ("Shell", "Gas"),
+    ("AMC Theatres", "Entertainment"), ("Starbucks", "Dining"), ("Chipotle", "Dining"),
+    ("Target", "Shopping"), ("Amazon", "Shopping"), ("CVS Pharmacy", "Healthcare"),
+    ("PG&E", "Utilities"), ("Planet Fitness", "Fitness"), ("Uber", "Transportation"),
+]
+
+
+def synthetic_customer_data(rows, seed=0, customer_id="synthetic"):
+    """
+    customer_data dict with `rows` transactions (about 1 in 10 a deposit)
+    Dates run forward from 2020-01-01, a few transactions per day.
+    """
+    rng = random.Random(seed)
+    start = date(2020, 1, 1)
+    deposits, purchases = [], []
+    for i in range(rows):
+        day = (start + timedelta(days=i // 4)).isoformat()
+        if i % 10 == 0:
+            deposits.append({"_id": f"d{i:024d}", "transaction_date": day,
+                             "amount": round(rng.uniform(800, 3200), 2),
+                             "description": "Payroll Deposit", "status": "executed", "medium": "balance"})
+        else:
+            name, category = SYNTHETIC_MERCHANTS[rng.randrange(len(SYNTHETIC_MERCHANTS))]
+            purchases.append({"_id": f"p{i:024d}", "purchase_date": day,
+                              "amount": round(rng.uniform(2, 250), 2), "description": f"{name} purchase",
+                              "merchant_id": f"m{category}", "merchant_name": name,
+                              "merchant_category": category, "status": "executed", "medium": "balance"})
+    return {
+        "customer_id": customer_id,
+        "customer_name": "Synthetic Customer",
+        "customer_metadata": {"first_name": "Synthetic", "last_name": "Customer", "address": {}},
+        "account": {"account_id": f"acct-{customer_id}", "type": "Checking",
+                    "nickname": "Synthetic Checking", "balance": 0, "rewards": 0},
+        "deposits": deposits,
+        "purchases": purchases,
+        "statistics": {},
+    }
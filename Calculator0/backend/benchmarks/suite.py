@@ -0,0 +1,270 @@
+"""
+Offline micro-benchmark suite for the backend hot paths
+Covers AES encrypt/decrypt, decrypt.decrypt_file, JSON dump/load of customer_data,
+_unwrap_list and statistics computation, on the sample customers/*.json files and
+on synthetic histories (see profiles.synthetic_customer_data). Nothing touches the
+network.
+
+    python benchmarks/suite.py                           # print results
+    python benchmarks/suite.py --sizes sample,1k,1m      # include a 1M-row history
+    python benchmarks/suite.py --save-baseline           # write benchmarks/baselines.json
+    python benchmarks/suite.py --check [--threshold 0.5]
+
+Samples of every case are interleaved with samples of a fixed pure-Python
+reference workload, and --check compares each case's time relative to that
+reference (the median of the per-sample ratios), not absolute milliseconds. A
+slower or busier machine scales both timings alike, so the committed baselines are
+not tied to the host that recorded them. --check exits with status 1 when a case
+is more than the threshold (50%) slower than its baseline on that scale.
+"""
+
+import argparse
+import base64
+import glob
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+BENCH_DIR = Path(__file__).resolve().parent
+BACKEND_DIR = BENCH_DIR.parent
+sys.path.insert(0, str(BACKEND_DIR))
+
+# Keep per-call log lines (e.g. from decrypt_file) out of the timings
+os.environ.setdefault("LOG_LEVEL", "WARNING")
+
+from decrypt import decrypt_file
+from encryption import SecureDataPipeline, customer_statistics
+from profiles import synthetic_customer_data
+import serialization
+
+BASELINE_FILE = BENCH_DIR / "baselines.json"
+DEFAULT_SIZES = "sample,1k,10k,100k"
+REGRESSION_THRESHOLD = float(os.getenv("BENCH_THRESHOLD", "0.5"))
+# Slowdowns smaller than this are timer jitter, whatever the ratio (sub-microsecond cases)
+MIN_REGRESSION_MS = float(os.getenv("BENCH_MIN_REGRESSION_MS", "0.01"))
+
+# Each case: setup(pipeline, customer_data, workdir) -> zero-argument callable to time
+CASES = {}
+
+
+def case(name):
+    def register(setup):
+        CASES[name] = setup
+        return setup
+    return register
+
+
+@case("aes_encrypt")
+def _aes_encrypt(pipeline, data, workdir):
+    return lambda: pipeline.aes_encrypt(data)
+
+
+@case("aes_decrypt")
+def _aes_decrypt(pipeline, data, workdir):
+    package = pipeline.aes_encrypt(data)
+    return lambda: pipeline.aes_decrypt(package)
+
+
+@case("decrypt_file")
+def _decrypt_file(pipeline, data, workdir):
+    path = os.path.join(workdir, "customer_bench_encrypted.json")
+    with open(path, 'w') as f:
+        json.dump(pipeline.aes_encrypt(data), f)
+    key_b64 = base64.b64encode(pipeline.key).decode()
+    return lambda: decrypt_file(path, key_b64)
+
+
+@case("json_dumps")
+def _json_dumps(pipeline, data, workdir):
+    return lambda: serialization.dumps(data)
+
+
+@case("json_loads")
+def _json_loads(pipeline, data, workdir):
+    text = serialization.dumps(data)
+    return lambda: serialization.loads(text)
+
+
+@case("unwrap_list")
+def _unwrap_list(pipeline, data, workdir):
+    response = {"count": len(data['purchases']), "results": data['purchases']}
+    return lambda: pipeline._unwrap_list(response)
+
+
+@case("statistics")
+def _statistics(pipeline, data, workdir):
+    return lambda: customer_statistics(data['deposits'], data['purchases'])
+
+
+REFERENCE_ROWS = [{"amount": i * 0.25, "merchant": f"m{i % 50}"} for i in range(2000)]
+
+
+def reference():
+    """Fixed pure-Python workload every case is scaled by (machine speed, not backend code)"""
+    return sum(row["amount"] for row in REFERENCE_ROWS if row["merchant"] != "m0")
+
+
+def parse_size(label):
+    multipliers = {"k": 1_000, "m": 1_000_000}
+    suffix = label[-1].lower()
+    if suffix in multipliers:
+        return int(float(label[:-1]) * multipliers[suffix])
+    return int(label)
+
+
+def payloads(sizes):
+    """Yield (label, customer_data) for each requested size"""
+    for label in sizes.split(","):
+        if label == "sample":
+            for path in sorted(glob.glob(str(BACKEND_DIR / "customers" / "*.json"))):
+                with open(path, 'r') as f:
+                    data = json.load(f)
+                data.setdefault('deposits', [])
+                data.setdefault('purchases', [])
+                yield f"sample-{Path(path).stem[-6:]}", data
+        else:
+            yield label, synthetic_customer_data(parse_size(label))
+
+
+def _loops(func, min_sample):
+    """Calls per sample so one sample takes at least min_sample seconds"""
+    start = time.perf_counter()
+    func()
+    first = time.perf_counter() - start
+    return 1 if first >= min_sample else min(10_000, int(min_sample / max(first, 1e-9)) + 1)
+
+
+def _timed(func, loops):
+    start = time.perf_counter()
+    for _ in range(loops):
+        func()
+    return (time.perf_counter() - start) / loops
+
+
+def measure(func, min_seconds=0.2, max_samples=200, min_sample=0.001):
+    """
+    Seconds per call, and per call of the reference workload
+    Very fast calls are batched so each sample takes at least min_sample; samples
+    repeat until min_seconds have elapsed (at least three). Every sample of func
+    directly follows a sample of reference(), so each pair sees the same machine
+    state and their ratio cancels out load and clock changes.
+    Returns: (median, best, total calls, median of case / reference per sample)
+    """
+    loops = _loops(func, min_sample)
+    reference_loops = _loops(reference, min_sample)
+    _timed(func, loops)  # warm-up sample, not counted
+
+    times, ratios = [], []
+    deadline = time.perf_counter() + min_seconds
+    while len(times) < 3 or (time.perf_counter() < deadline and len(times) < max_samples):
+        reference_time = _timed(reference, reference_loops)
+        times.append(_timed(func, loops))
+        ratios.append(times[-1] / reference_time)
+    return statistics.median(times), min(times), len(times) * loops, statistics.median(ratios)
+
+
+def run(sizes, only=None, min_seconds=0.2):
+    pipeline = SecureDataPipeline("offline-benchmark")
+    results = {}
+    # The first samples of a fresh process are slow; keep them out of the first case's ratio
+    _timed(reference, _loops(reference, 0.1))
+    with tempfile.TemporaryDirectory() as workdir:
+        for label, data in payloads(sizes):
+            rows = len(data['deposits']) + len(data['purchases'])
+            for name, setup in CASES.items():
+                if only and name not in only:
+                    continue
+                median, best, runs, relative = measure(setup(pipeline, data, workdir), min_seconds)
+                results[f"{name}/{label}"] = {
+                    "case": name,
+                    "payload": label,
+                    "rows": rows,
+                    "median_ms": round(median * 1000, 4),
+                    "best_ms": round(best * 1000, 4),
+                    "relative": round(relative, 6),
+                    "rows_per_s": round(rows / median) if median else None,
+                    "runs": runs,
+                }
+    return results
+
+
+def check(results, baselines, threshold, min_regression_ms=MIN_REGRESSION_MS):
+    """
+    Returns the list of cases whose time relative to the reference workload is over
+    the baseline's by more than the threshold (and slower by at least
+    min_regression_ms in absolute terms)
+    """
+    regressions = []
+    for key, result in results.items():
+        base = baselines.get(key)
+        if not base or not base.get("relative") or not result.get("relative"):
+            continue
+        ratio = result["relative"] / base["relative"]
+        result["baseline_relative"] = base["relative"]
+        result["ratio"] = round(ratio, 3)
+        # What the baseline would take on this machine, for the jitter floor
+        expected_ms = result["median_ms"] / ratio
+        if ratio > 1 + threshold and result["median_ms"] - expected_ms >= min_regression_ms:
+            regressions.append(key)
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline backend micro-benchmarks")
+    parser.add_argument("--sizes", default=DEFAULT_SIZES, help="comma separated: sample, 1k, 100k, 1m, ...")
+    parser.add_argument("--cases", help="comma separated subset of: " + ", ".join(CASES))
+    parser.add_argument("--min-time", type=float, default=0.2, help="seconds to repeat each case for")
+    parser.add_argument("--json", action="store_true", help="print results as JSON")
+    parser.add_argument("--output", help="also write results JSON to this file")
+    parser.add_argument("--baseline", default=str(BASELINE_FILE))
+    parser.add_argument("--save-baseline", action="store_true")
+    parser.add_argument("--check", action="store_true", help="fail on regressions against the baseline")
+    parser.add_argument("--threshold", type=float, default=REGRESSION_THRESHOLD,
+                        help="allowed slowdown before --check fails (0.5 = 50%%)")
+    args = parser.parse_args()
+
+    only = set(args.cases.split(",")) if args.cases else None
+    results = run(args.sizes, only, args.min_time)
+
+    regressions = []
+    if args.check:
+        with open(args.baseline, 'r') as f:
+            regressions = check(results, json.load(f)["results"], args.threshold)
+
+    report = {
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "json_backend": serialization.backend(),
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "results": results,
+    }
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+    if args.save_baseline:
+        with open(args.baseline, 'w') as f:
+            json.dump(report, f, indent=2)
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        print(f"{'case':<14} {'payload':<14} {'rows':>9} {'median ms':>11} {'rows/s':>13} {'vs base':>8}")
+        for key, r in results.items():
+            vs = f"{r['ratio']:.2f}x" if "ratio" in r else ""
+            flag = "  ⚠️" if key in regressions else ""
+            print(f"{r['case']:<14} {r['payload']:<14} {r['rows']:>9,} {r['median_ms']:>11.3f} "
+                  f"{r['rows_per_s'] or 0:>13,} {vs:>8}{flag}")
+
+    if regressions:
+        print(f"\n❌ {len(regressions)} regression(s) over {args.threshold:.0%}: {', '.join(regressions)}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
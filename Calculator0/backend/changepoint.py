@@ -0,0 +1,323 @@
+"""
+Online change-point detection for income and spend
+Sudden-onset abuse (income cut off, spending collapses) and recovery (income
+returns, spending picks up) show up as level shifts in a customer's weekly
+deposit and purchase totals. Each series runs a two-sided CUSUM:
+
+    z = (x - baseline mean) / baseline deviation
+    up   = max(0, up   + z - CUSUM_K)
+    down = max(0, down - z - CUSUM_K)
+
+and raises an event when either side passes CUSUM_H. The change date is where that
+side last left zero, and the magnitude is the mean of the periods since then
+minus the old baseline, which becomes the new baseline. Alarms fire early, so the
+magnitude is a first estimate; a further shift raises another event.
+
+Each series watches the total of its last few periods (WINDOWS), which smooths
+paycheck timing. State per series is about twenty numbers, updated in O(1) per
+transaction (plus one step per period that closes with no transactions), so it
+can be kept per customer and fed transactions as they arrive:
+
+    detector = ChangeDetector(customer_id)
+    events = detector.update(deposit_row, "deposit")     # [] or [{"series", "direction", "date", ...}]
+    store.save(detector)                                 # small JSON blob per customer
+
+    python changepoint.py customers/*.json
+"""
+
+import argparse
+import json
+import math
+import os
+import sqlite3
+import sys
+import time
+from datetime import date
+
+import db
+from logger import get_logger
+
+# Transactions are totalled per period of this many days
+PERIOD_DAYS = int(os.getenv("CHANGEPOINT_PERIOD_DAYS", "7"))
+
+# The CUSUM watches the total of the last N periods. Income is paid weekly,
+# biweekly or monthly, so a single week swings between a paycheck and nothing;
+# a 4-week window turns that into a steady level that a cut-off moves at once.
+WINDOWS = {
+    "income": int(os.getenv("CHANGEPOINT_INCOME_WINDOW", "4")),
+    "spend": int(os.getenv("CHANGEPOINT_SPEND_WINDOW", "2")),
+}
+
+# Periods used to learn the baseline before alarms are possible
+WARMUP_PERIODS = int(os.getenv("CHANGEPOINT_WARMUP_PERIODS", "4"))
+
+# Allowance (in deviations) and decision threshold of the CUSUM
+CUSUM_K = float(os.getenv("CUSUM_K", "0.5"))
+CUSUM_H = float(os.getenv("CUSUM_H", "4.0"))
+
+# The deviation never goes below this share of the mean (or $1), so a perfectly
+# regular series doesn't alarm on cents
+MIN_DEVIATION_SHARE = 0.1
+
+SERIES = {"deposit": "income", "purchase": "spend"}
+DATE_KEYS = {"deposit": "transaction_date", "purchase": "purchase_date"}
+
+log = get_logger("changepoint")
+
+
+def period_date(period):
+    """First day of a period number as an ISO date"""
+    return date.fromordinal(max(1, period * PERIOD_DAYS)).isoformat()
+
+
+class Cusum:
+    """
+    Two-sided CUSUM over one series of per-period totals
+    Args:
+        window: periods summed into each observation (amounts are reported per period)
+    """
+
+    __slots__ = ("window", "recent", "period", "total", "n", "mean", "m2",
+                 "up", "up_start", "up_sum", "up_sq", "up_count",
+                 "down", "down_start", "down_sum", "down_sq", "down_count")
+
+    def __init__(self, window=1):
+        self.window = window
+        self.recent = []    # totals of the last `window` closed periods
+        self.period = None  # period currently being totalled
+        self.total = 0.0
+        self.n = 0          # baseline (Welford) count, mean and sum of squares
+        self.mean = 0.0
+        self.m2 = 0.0
+        self._reset_runs()
+
+    def _reset_runs(self):
+        self.up = self.down = 0.0
+        self.up_start = self.down_start = None
+        self.up_sum = self.up_sq = self.down_sum = self.down_sq = 0.0
+        self.up_count = self.down_count = 0
+
+    def deviation(self):
+        variance = self.m2 / (self.n - 1) if self.n > 1 else 0.0
+        return max(math.sqrt(variance), MIN_DEVIATION_SHARE * abs(self.mean), 1.0)
+
+    def observe(self, period, amount):
+        """Add an amount to `period`; returns events from periods closed on the way"""
+        events = self.advance(period)
+        self.total += amount
+        return events
+
+    def advance(self, period):
+        """Close every period before `period` (late rows count toward the current one)"""
+        if self.period is None:
+            self.period = period
+            return []
+        events = []
+        while self.period < period:
+            self.recent.append(self.total)
+            if len(self.recent) > self.window:
+                del self.recent[0]
+            event = self._close(sum(self.recent)) if len(self.recent) == self.window else None
+            if event:
+                events.append(event)
+            self.total = 0.0
+            self.period += 1
+        return events
+
+    def _learn(self, x):
+        self.n += 1
+        delta = x - self.mean
+        self.mean += delta / self.n
+        self.m2 += delta * (x - self.mean)
+
+    def _close(self, x):
+        if self.n < WARMUP_PERIODS:
+            self._learn(x)
+            return None
+
+        z = (x - self.mean) / self.deviation()
+        up = max(0.0, self.up + z - CUSUM_K)
+        down = max(0.0, self.down - z - CUSUM_K)
+
+        if up > 0:
+            if self.up == 0:
+                self.up_start, self.up_sum, self.up_sq, self.up_count = self.period, 0.0, 0.0, 0
+            self.up_sum += x
+            self.up_sq += x * x
+            self.up_count += 1
+        if down > 0:
+            if self.down == 0:
+                self.down_start, self.down_sum, self.down_sq, self.down_count = self.period, 0.0, 0.0, 0
+            self.down_sum += x
+            self.down_sq += x * x
+            self.down_count += 1
+        self.up, self.down = up, down
+
+        if up > CUSUM_H:
+            return self._alarm("up", self.up_start, self.up_sum, self.up_sq, self.up_count)
+        if down > CUSUM_H:
+            return self._alarm("down", self.down_start, self.down_sum, self.down_sq, self.down_count)
+        if up == 0 and down == 0:
+            # In control: keep refining the baseline
+            self._learn(x)
+        return None
+
+    def _alarm(self, direction, start, total, squares, count):
+        after = total / count
+        event = {
+            "direction": direction,
+            "date": period_date(start),
+            "detected": period_date(self.period + 1),
+            "before": round(self.mean / self.window, 2),
+            "after": round(after / self.window, 2),
+            "magnitude": round((after - self.mean) / self.window, 2),
+            "periods": count,
+        }
+        # The periods since the change become the new baseline
+        self.n = count
+        self.mean = after
+        self.m2 = max(0.0, squares - count * after * after)
+        self._reset_runs()
+        return event
+
+    def to_dict(self):
+        return {name: getattr(self, name) for name in self.__slots__}
+
+    @classmethod
+    def from_dict(cls, state):
+        cusum = cls.__new__(cls)
+        for name in cls.__slots__:
+            setattr(cusum, name, state[name])
+        return cusum
+
+
+class ChangeDetector:
+    """Income and spend CUSUMs for one customer"""
+
+    def __init__(self, customer_id=None, series=None):
+        self.customer_id = customer_id
+        self.series = series or {name: Cusum(WINDOWS[name]) for name in SERIES.values()}
+
+    def update(self, row, kind):
+        """
+        Feed one deposit or purchase
+        Args:
+            row: transaction dict (transaction_date / purchase_date, amount)
+            kind: "deposit" or "purchase"
+        Returns:
+            List of change events (usually empty)
+        """
+        value = row.get(DATE_KEYS[kind])
+        if not value:
+            return []
+        try:
+            period = date.fromisoformat(value[:10]).toordinal() // PERIOD_DAYS
+        except (ValueError, TypeError):
+            # One malformed row must not abort the run; skip it
+            log.warning("⚠️ Skipping row with bad date", customer_id=self.customer_id, kind=kind, date=repr(value))
+            return []
+        name = SERIES[kind]
+
+        # Both series move on together, so a week with no deposits still counts as zero income
+        events = []
+        for other, cusum in self.series.items():
+            if other != name:
+                events.extend(self._tag(other, cusum.advance(period)))
+        events.extend(self._tag(name, self.series[name].observe(period, row.get('amount') or 0)))
+        return events
+
+    def advance(self, day):
+        """Close all periods before an ISO date, e.g. from a nightly job when nothing arrived"""
+        period = date.fromisoformat(day[:10]).toordinal() // PERIOD_DAYS
+        events = []
+        for name, cusum in self.series.items():
+            events.extend(self._tag(name, cusum.advance(period)))
+        return events
+
+    def _tag(self, name, events):
+        for event in events:
+            event["series"] = name
+            event["customer_id"] = self.customer_id
+            log.info("📈 Change detected", customer_id=self.customer_id, series=name, direction=event["direction"],
+                     date=event["date"], magnitude=event["magnitude"])
+        return events
+
+    def replay(self, customer_data):
+        """Feed a whole customer_data history in date order; returns every event"""
+        # Non-string dates sort first and are skipped by update
+        rows = [(row.get(DATE_KEYS[kind]) if isinstance(row.get(DATE_KEYS[kind]), str) else '', kind, row)
+                for kind, key in (("deposit", 'deposits'), ("purchase", 'purchases'))
+                for row in customer_data.get(key, [])]
+        events = []
+        for _, kind, row in sorted(rows, key=lambda item: item[0]):
+            events.extend(self.update(row, kind))
+        return events
+
+    def to_dict(self):
+        return {"customer_id": self.customer_id,
+                "series": {name: cusum.to_dict() for name, cusum in self.series.items()}}
+
+    @classmethod
+    def from_dict(cls, state):
+        return cls(state["customer_id"], {name: Cusum.from_dict(s) for name, s in state["series"].items()})
+
+
+class DetectorStore:
+    """Detector state per customer in SQLite (a few hundred bytes of JSON each)"""
+
+    def __init__(self, db_path=db.DB_PATH):
+        self.db_path = db_path
+        conn = sqlite3.connect(self.db_path, timeout=db.DB_TIMEOUT)
+        conn.execute('''CREATE TABLE IF NOT EXISTS changepoint_state
+                        (customer_id TEXT PRIMARY KEY,
+                         state TEXT,
+                         updated_at REAL)''')
+        conn.commit()
+        conn.close()
+
+    def load(self, customer_id):
+        """Stored detector, or a fresh one"""
+        conn = sqlite3.connect(self.db_path, timeout=db.DB_TIMEOUT)
+        row = conn.execute('SELECT state FROM changepoint_state WHERE customer_id = ?', (customer_id,)).fetchone()
+        conn.close()
+        return ChangeDetector.from_dict(json.loads(row[0])) if row else ChangeDetector(customer_id)
+
+    def save(self, detector):
+        conn = sqlite3.connect(self.db_path, timeout=db.DB_TIMEOUT)
+        conn.execute('INSERT OR REPLACE INTO changepoint_state (customer_id, state, updated_at) VALUES (?, ?, ?)',
+                     (detector.customer_id, json.dumps(detector.to_dict()), time.time()))
+        conn.commit()
+        conn.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Replay customer histories through the change-point detector")
+    parser.add_argument("paths", nargs="+", help="customer_data JSON files")
+    parser.add_argument("--json", action="store_true")
+    args = parser.parse_args(argv)
+
+    results = []
+    for path in args.paths:
+        with open(path, 'r') as f:
+            customer_data = json.load(f)
+        detector = ChangeDetector(customer_data.get('customer_id', path))
+        results.append({"customer_id": detector.customer_id, "events": detector.replay(customer_data),
+                        "state_bytes": len(json.dumps(detector.to_dict()))})
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return 0
+
+    for result in results:
+        print(f"\n{result['customer_id']} ({result['state_bytes']} bytes of state)")
+        if not result["events"]:
+            print("   no changes")
+        for event in result["events"]:
+            arrow = "⬆️" if event["direction"] == "up" else "⬇️"
+            print(f"   {arrow} {event['series']:<6} from {event['date']} (flagged {event['detected']}): "
+                  f"${event['before']:,.2f} -> ${event['after']:,.2f} per {PERIOD_DAYS} days")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,337 @@
+"""
+Compression codecs for customer packages (compress, then encrypt)
+Customer histories repeat the same keys, merchant names, categories and
+descriptions in every row, so the serialized customer_data shrinks several times
+before it is encrypted. The codec, level and optional dictionary are recorded in
+the package header next to encryption_method:
+
+    {"compression": "zlib", "compression_level": 6, "compression_dict": "3f2a...", ...}
+
+    payload, header = compress_payload(plaintext, "zlib", level=9)
+    plaintext = decompress_payload(package, payload)     # reads the header fields
+
+Codecs: zlib and lzma from the standard library, zstd when the zstandard package
+is installed (imported on first use). A dictionary primes the compressor with
+the shared schema, which matters most for small histories. train_dictionary()
+builds one from sample payloads (zstd's trainer, or for zlib the most valuable
+repeated JSON fragments, up to zlib's 32 KB window). Dictionaries are stored in
+COMPRESSION_DICT_DIR under the first 16 hex digits of their SHA-256.
+
+    python compression.py train encrypted_data/*_raw.json [--codec zlib]
+    python compression.py report encrypted_data/*_raw.json [--dict <id>]
+"""
+
+import abc
+import argparse
+import hashlib
+import os
+import re
+import sys
+import zlib
+from collections import Counter
+
+import serialization
+
+# Codec used when compression is switched on without naming one
+DEFAULT_CODEC = os.getenv("COMPRESSION_CODEC", "zlib")
+
+DICT_DIR = os.getenv("COMPRESSION_DICT_DIR", "compression_dicts")
+
+# zlib only looks back 32 KB, so a larger preset dictionary is wasted
+ZLIB_DICT_SIZE = 32 * 1024
+ZSTD_DICT_SIZE = 64 * 1024
+
+_dictionaries = {}  # dictionary id -> bytes
+
+
+class Codec(abc.ABC):
+    """
+    One compression format
+    Subclasses set `name` (stored as compression in the package), `default_level`
+    and `levels`, and implement compress/decompress. `snippet` is the decompression
+    code shown in the Gemini instructions; it expects `plaintext` (and `zdict` when
+    a dictionary is used) and replaces `plaintext`.
+    """
+
+    name = None
+    default_level = None
+    levels = range(0)
+    supports_dictionary = False
+    imports = ""
+    snippet = ""
+    dict_snippet = ""
+
+    @abc.abstractmethod
+    def compress(self, data, level, dictionary=None):
+        """Compressed bytes"""
+
+    @abc.abstractmethod
+    def decompress(self, data, dictionary=None):
+        """Original bytes"""
+
+    def train(self, samples, size):
+        return train_fragments(samples, size)
+
+
+class ZlibCodec(Codec):
+    name = "zlib"
+    default_level = 6
+    levels = range(0, 10)
+    supports_dictionary = True
+    imports = "import zlib"
+    snippet = "plaintext = zlib.decompress(plaintext)"
+    dict_snippet = """decompressor = zlib.decompressobj(zdict=zdict)
+plaintext = decompressor.decompress(plaintext) + decompressor.flush()"""
+
+    def compress(self, data, level, dictionary=None):
+        if dictionary is None:
+            return zlib.compress(data, level)
+        compressor = zlib.compressobj(level, zdict=dictionary[-ZLIB_DICT_SIZE:])
+        return compressor.compress(data) + compressor.flush()
+
+    def decompress(self, data, dictionary=None):
+        if dictionary is None:
+            return zlib.decompress(data)
+        decompressor = zlib.decompressobj(zdict=dictionary[-ZLIB_DICT_SIZE:])
+        return decompressor.decompress(data) + decompressor.flush()
+
+    def train(self, samples, size):
+        return train_fragments(samples, min(size, ZLIB_DICT_SIZE))
+
+
+class LzmaCodec(Codec):
+    """Smallest output, slowest; no dictionary support"""
+
+    name = "lzma"
+    default_level = 6
+    levels = range(0, 10)
+    imports = "import lzma"
+    snippet = "plaintext = lzma.decompress(plaintext)"
+
+    def compress(self, data, level, dictionary=None):
+        import lzma  # deferred like the other optional codecs; rarely used
+        return lzma.compress(data, preset=level)
+
+    def decompress(self, data, dictionary=None):
+        import lzma
+        return lzma.decompress(data)
+
+
+class ZstdCodec(Codec):
+    """Zstandard (needs the zstandard package)"""
+
+    name = "zstd"
+    default_level = 10
+    levels = range(1, 23)
+    supports_dictionary = True
+    imports = "import zstandard"
+    snippet = "plaintext = zstandard.ZstdDecompressor().decompress(plaintext)"
+    dict_snippet = """plaintext = zstandard.ZstdDecompressor(
+    dict_data=zstandard.ZstdCompressionDict(zdict)).decompress(plaintext)"""
+
+    def compress(self, data, level, dictionary=None):
+        import zstandard
+        dict_data = zstandard.ZstdCompressionDict(dictionary) if dictionary is not None else None
+        return zstandard.ZstdCompressor(level=level, dict_data=dict_data).compress(data)
+
+    def decompress(self, data, dictionary=None):
+        import zstandard
+        dict_data = zstandard.ZstdCompressionDict(dictionary) if dictionary is not None else None
+        return zstandard.ZstdDecompressor(dict_data=dict_data).decompress(data)
+
+    def train(self, samples, size):
+        import zstandard
+        return zstandard.train_dictionary(size, list(samples)).as_bytes()
+
+
+CODECS = {codec.name: codec() for codec in (ZlibCodec, LzmaCodec, ZstdCodec)}
+
+
+def get_codec(name=None):
+    """Codec for a compression name (DEFAULT_CODEC if None)"""
+    name = name or DEFAULT_CODEC
+    if name not in CODECS:
+        raise ValueError(f"Unsupported compression: {name}")
+    return CODECS[name]
+
+
+def available_codecs():
+    """Codec names usable on this host (zstd only with zstandard installed)"""
+    names = ["zlib", "lzma"]
+    try:
+        import zstandard  # noqa: F401
+        names.append("zstd")
+    except ImportError:
+        pass
+    return names
+
+# ============================================================================
+# DICTIONARIES
+# ============================================================================
+
+_FRAGMENT = re.compile(rb'[^{}\[\],]+')
+
+
+def train_fragments(samples, size):
+    """
+    Preset dictionary from repeated JSON fragments ("merchant_name":"Safeway", ...)
+    Fragments are ranked by how many bytes they would save (occurrences x length);
+    the most valuable go last, where a zlib window reaches them from every offset.
+    """
+    counts = Counter()
+    for sample in samples:
+        counts.update(_FRAGMENT.findall(sample))
+    ranked = [fragment for fragment, count in
+              sorted(counts.items(), key=lambda item: item[1] * len(item[0]), reverse=True) if count > 1]
+
+    chosen, total = [], 0
+    for fragment in ranked:
+        if total + len(fragment) + 1 > size:
+            break
+        chosen.append(fragment)
+        total += len(fragment) + 1
+    return b",".join(reversed(chosen))
+
+
+def dictionary_id(dictionary):
+    return hashlib.sha256(dictionary).hexdigest()[:16]
+
+
+def save_dictionary(dictionary, dict_dir=None):
+    """Store a dictionary (idempotent); returns its id"""
+    dict_dir = dict_dir or DICT_DIR
+    found = dictionary_id(dictionary)
+    os.makedirs(dict_dir, exist_ok=True)
+    path = os.path.join(dict_dir, f"{found}.dict")
+    if not os.path.exists(path):
+        with open(path, 'wb') as f:
+            f.write(dictionary)
+    _dictionaries[found] = dictionary
+    return found
+
+
+def dictionary_path(found, dict_dir=None):
+    return os.path.join(dict_dir or DICT_DIR, f"{found}.dict")
+
+
+def load_dictionary(found, dict_dir=None):
+    """Dictionary bytes for an id (cached); checks the content still matches the id"""
+    if found not in _dictionaries:
+        with open(dictionary_path(found, dict_dir), 'rb') as f:
+            dictionary = f.read()
+        if dictionary_id(dictionary) != found:
+            raise ValueError(f"Compression dictionary {found} is corrupt")
+        _dictionaries[found] = dictionary
+    return _dictionaries[found]
+
+
+def train_dictionary(samples, codec=None, size=None, dict_dir=None):
+    """
+    Train and store a dictionary for a codec
+    Args:
+        samples: serialized payloads (bytes), e.g. several customers' customer_data
+        codec: codec name (DEFAULT_CODEC if None)
+        size: dictionary size in bytes (codec default if None)
+    Returns:
+        dictionary id, to pass as compress_payload(..., dictionary=id)
+    """
+    codec = get_codec(codec)
+    if not codec.supports_dictionary:
+        raise ValueError(f"{codec.name} does not support dictionaries")
+    size = size or (ZSTD_DICT_SIZE if codec.name == "zstd" else ZLIB_DICT_SIZE)
+    return save_dictionary(codec.train(samples, size), dict_dir)
+
+# ============================================================================
+# PACKAGE PAYLOADS
+# ============================================================================
+
+def compress_payload(data, codec=None, level=None, dictionary=None, dict_dir=None):
+    """
+    Compress a plaintext payload
+    Args:
+        data: bytes
+        codec: codec name (DEFAULT_CODEC if None)
+        level: compression level (the codec's default if None)
+        dictionary: dictionary id (see train_dictionary), or None
+    Returns:
+        (compressed bytes, header fields for the package)
+    """
+    codec = get_codec(codec)
+    level = codec.default_level if level is None else level
+    if level not in codec.levels:
+        raise ValueError(f"{codec.name} level must be in {codec.levels.start}..{codec.levels.stop - 1}")
+
+    header = {"compression": codec.name, "compression_level": level}
+    dictionary_bytes = None
+    if dictionary:
+        if not codec.supports_dictionary:
+            raise ValueError(f"{codec.name} does not support dictionaries")
+        dictionary_bytes = load_dictionary(dictionary, dict_dir)
+        header["compression_dict"] = dictionary
+    return codec.compress(data, level, dictionary_bytes), header
+
+
+def decompress_payload(package, data, dict_dir=None):
+    """Undo compress_payload using the package header (no-op for uncompressed packages)"""
+    name = package.get('compression')
+    if not name:
+        return data
+    dictionary = package.get('compression_dict')
+    dictionary_bytes = load_dictionary(dictionary, dict_dir) if dictionary else None
+    return get_codec(name).decompress(data, dictionary_bytes)
+
+
+def decompress_instructions(package, dict_dir=None):
+    """Python lines that decompress `plaintext` for a package, for the Gemini instructions ('' if none)"""
+    name = package.get('compression')
+    if not name:
+        return ""
+    codec = get_codec(name)
+    if package.get('compression_dict'):
+        path = dictionary_path(package['compression_dict'], dict_dir)
+        return f"{codec.imports}\nzdict = open('{path}', 'rb').read()\n{codec.dict_snippet}\n"
+    return f"{codec.imports}\n{codec.snippet}\n"
+
+# ============================================================================
+# CLI
+# ============================================================================
+
+def _samples(paths):
+    """Compact customer_data bytes from JSON files"""
+    return [serialization.dumps(serialization.load_file(path)) for path in paths]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Train compression dictionaries and report package ratios")
+    sub = parser.add_subparsers(dest="command", required=True)
+    train = sub.add_parser("train", help="train a dictionary from customer_data JSON files")
+    train.add_argument("paths", nargs="+")
+    train.add_argument("--codec", default=DEFAULT_CODEC)
+    train.add_argument("--size", type=int)
+    report = sub.add_parser("report", help="compression ratio per codec and level")
+    report.add_argument("paths", nargs="+")
+    report.add_argument("--dict", help="dictionary id to include")
+    args = parser.parse_args(argv)
+
+    samples = _samples(args.paths)
+    if args.command == "train":
+        found = train_dictionary(samples, args.codec, args.size)
+        print(f"✅ {args.codec} dictionary {found} ({len(load_dictionary(found)):,} bytes) "
+              f"in {dictionary_path(found)}")
+        return 0
+
+    raw = sum(len(sample) for sample in samples)
+    print(f"{len(samples)} payloads, {raw:,} bytes of compact JSON")
+    for name in available_codecs():
+        codec = get_codec(name)
+        for level in sorted({codec.levels.start + 1, codec.default_level, codec.levels.stop - 1}):
+            options = [None] + ([args.dict] if args.dict and codec.supports_dictionary else [])
+            for dictionary in options:
+                size = sum(len(compress_payload(s, name, level, dictionary)[0]) for s in samples)
+                label = f"{name} {level}" + (" +dict" if dictionary else "")
+                print(f"   {label:<14} {size:>12,} bytes  {raw / size:>6.2f}x")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,78 @@
+"""
+Lightweight .env loader shared by the backend scripts and APIs
+Reads KEY=VALUE lines from the first .env found (current directory, then the
+backend directory) into os.environ once, without overriding variables that are
+already set. Replaces python-dotenv's load_dotenv(), so the backend has no
+dotenv dependency and importing a module stays cheap.
+
+    import config
+    API_KEY = config.get("NESSIE_API_KEY")
+"""
+
+import os
+
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+
+_loaded = False
+
+
+def _parse_line(line):
+    line = line.strip()
+    if not line or line.startswith('#'):
+        return None
+    if line.startswith('export '):
+        line = line[len('export '):].lstrip()
+    if '=' not in line:
+        return None
+
+    key, value = line.split('=', 1)
+    key = key.strip()
+    value = value.strip()
+    if value[:1] in ('"', "'"):
+        quote = value[0]
+        end = value.find(quote, 1)
+        value = value[1:end] if end != -1 else value[1:]
+        if quote == '"':
+            value = value.replace('\\n', '\n')
+    else:
+        # Unquoted values may carry a trailing " # comment"
+        value = value.split(' #', 1)[0].rstrip()
+    return key, value
+
+
+def load_env(path=None, override=False):
+    """
+    Load a .env file into os.environ
+    Args:
+        path: explicit file; default is ./.env, then <backend>/.env
+        override: replace variables that are already set
+    Returns:
+        The path loaded, or None if no file was found
+    """
+    candidates = [path] if path else [os.path.join(os.getcwd(), '.env'), os.path.join(BACKEND_DIR, '.env')]
+    for candidate in candidates:
+        if not os.path.isfile(candidate):
+            continue
+        with open(candidate, 'r') as f:
+            for line in f:
+                parsed = _parse_line(line)
+                if parsed and (override or parsed[0] not in os.environ):
+                    os.environ[parsed[0]] = parsed[1]
+        return candidate
+    return None
+
+
+def ensure_loaded():
+    global _loaded
+    if not _loaded:
+        load_env()
+        _loaded = True
+
+
+def get(name, default=None):
+    """os.getenv after the .env file has been loaded"""
+    ensure_loaded()
+    return os.environ.get(name, default)
+
+
+ensure_loaded()
@@ -0,0 +1,201 @@
+"""
+Symmetric encryption backends for customer packages
+One place for the ciphers used by encryption.py, decrypt.py and the Gemini
+instructions. New packages use an AEAD cipher (AES-256-GCM by default, or
+ChaCha20-Poly1305 on hosts without AES-NI); AES-256-CBC is kept so files written
+before the switch still decrypt.
+
+    package = encrypt_package(key, plaintext)          # {"encrypted_data", "nonce", "encryption_method"}
+    plaintext = decrypt_package(key, package)          # picks the backend from encryption_method
+
+Header fields passed to encrypt_package (AAD_FIELDS, e.g. the compression codec)
+are bound to the ciphertext as AEAD associated data and listed under "aad", so
+swapping or dropping one fails the tag check like tampering with the data does.
+"""
+
+import abc
+import base64
+import os
+
+import serialization
+
+# The cryptography package is imported by each backend on first use, so importing
+# this module (and encryption.py / decrypt.py) stays cheap for short CLI runs.
+
+# Cipher used for new packages; any key of CIPHERS
+DEFAULT_CIPHER = os.getenv("CRYPTO_CIPHER", "AES-256-GCM")
+
+# Header fields bound as associated data (fixed once the package is encrypted; key_id
+# is not, since rotation rewrites it, and is bound by the key wrap instead, see envelope.py)
+AAD_FIELDS = ("compression", "compression_level", "compression_dict")
+
+
+def associated_data(package):
+    """Associated data for a package: canonical JSON of the fields listed under "aad", or None"""
+    if 'aad' not in package:
+        return None
+    return serialization.canonical({field: package.get(field) for field in package['aad']}).encode()
+
+# The same computation for the Gemini instructions (expects `encrypted_package`)
+AAD_SNIPPET = """aad = None
+if 'aad' in encrypted_package:
+    bound = {field: encrypted_package.get(field) for field in encrypted_package['aad']}
+    aad = json.dumps(bound, sort_keys=True, separators=(",", ":")).encode()"""
+
+
+class CipherBackend(abc.ABC):
+    """
+    One cipher: raw bytes in, package fields out
+    Subclasses set `method` (stored as encryption_method in the package) and
+    implement encrypt/decrypt. `snippet` is the decryption code shown in the
+    Gemini instructions; it expects `key` and `encrypted_package` and sets `plaintext`.
+    """
+
+    method = None
+    imports = ""
+    snippet = ""
+    authenticated = False  # binds associated data
+
+    @abc.abstractmethod
+    def encrypt(self, key, plaintext, associated_data=None):
+        """Package fields (encrypted_data plus nonce/iv) for plaintext bytes"""
+
+    @abc.abstractmethod
+    def decrypt(self, key, package):
+        """Plaintext bytes of a package"""
+
+
+class AEADBackend(CipherBackend):
+    """AES-GCM / ChaCha20-Poly1305: 96-bit nonce, 16-byte tag appended to the ciphertext"""
+
+    authenticated = True
+
+    @abc.abstractmethod
+    def aead(self, key):
+        """The cryptography AEAD object for key"""
+
+    def encrypt(self, key, plaintext, associated_data=None):
+        nonce = os.urandom(12)
+        encrypted_data = self.aead(key).encrypt(nonce, plaintext, associated_data)
+        return {
+            "encrypted_data": base64.b64encode(encrypted_data).decode(),
+            "nonce": base64.b64encode(nonce).decode(),
+        }
+
+    def decrypt(self, key, package):
+        encrypted_data = base64.b64decode(package['encrypted_data'])
+        nonce = base64.b64decode(package['nonce'])
+        return self.aead(key).decrypt(nonce, encrypted_data, associated_data(package))
+
+
+class AESGCMBackend(AEADBackend):
+    method = "AES-256-GCM"
+    imports = "from cryptography.hazmat.primitives.ciphers.aead import AESGCM"
+    snippet = AAD_SNIPPET + """
+encrypted_data = base64.b64decode(encrypted_package['encrypted_data'])
+nonce = base64.b64decode(encrypted_package['nonce'])
+plaintext = AESGCM(key).decrypt(nonce, encrypted_data, aad)"""
+
+    def aead(self, key):
+        from cryptography.hazmat.primitives.ciphers.aead import AESGCM
+        return AESGCM(key)
+
+
+class ChaCha20Backend(AEADBackend):
+    method = "ChaCha20-Poly1305"
+    imports = "from cryptography.hazmat.primitives.ciphers.aead import ChaCha20Poly1305"
+    snippet = AAD_SNIPPET + """
+encrypted_data = base64.b64decode(encrypted_package['encrypted_data'])
+nonce = base64.b64decode(encrypted_package['nonce'])
+plaintext = ChaCha20Poly1305(key).decrypt(nonce, encrypted_data, aad)"""
+
+    def aead(self, key):
+        from cryptography.hazmat.primitives.ciphers.aead import ChaCha20Poly1305
+        return ChaCha20Poly1305(key)
+
+
+class AESCBCBackend(CipherBackend):
+    """Legacy AES-256-CBC + PKCS7 (unauthenticated); kept for existing files"""
+
+    method = "AES-256-CBC"
+    imports = """from cryptography.hazmat.primitives.ciphers import Cipher, algorithms, modes
+from cryptography.hazmat.primitives import padding"""
+    snippet = """encrypted_data = base64.b64decode(encrypted_package['encrypted_data'])
+iv = base64.b64decode(encrypted_package['iv'])
+
+decryptor = Cipher(algorithms.AES(key), modes.CBC(iv)).decryptor()
+padded_data = decryptor.update(encrypted_data) + decryptor.finalize()
+
+unpadder = padding.PKCS7(128).unpadder()
+plaintext = unpadder.update(padded_data) + unpadder.finalize()"""
+
+    def encrypt(self, key, plaintext, associated_data=None):
+        from cryptography.hazmat.primitives import padding
+        from cryptography.hazmat.primitives.ciphers import Cipher, algorithms, modes
+
+        iv = os.urandom(16)
+        padder = padding.PKCS7(128).padder()
+        padded_data = padder.update(plaintext) + padder.finalize()
+
+        encryptor = Cipher(algorithms.AES(key), modes.CBC(iv)).encryptor()
+        encrypted_data = encryptor.update(padded_data) + encryptor.finalize()
+        return {
+            "encrypted_data": base64.b64encode(encrypted_data).decode(),
+            "iv": base64.b64encode(iv).decode(),
+        }
+
+    def decrypt(self, key, package):
+        from cryptography.hazmat.primitives import padding
+        from cryptography.hazmat.primitives.ciphers import Cipher, algorithms, modes
+
+        encrypted_data = base64.b64decode(package['encrypted_data'])
+        iv = base64.b64decode(package['iv'])
+
+        decryptor = Cipher(algorithms.AES(key), modes.CBC(iv)).decryptor()
+        padded_data = decryptor.update(encrypted_data) + decryptor.finalize()
+
+        unpadder = padding.PKCS7(128).unpadder()
+        return unpadder.update(padded_data) + unpadder.finalize()
+
+
+CIPHERS = {backend.method: backend() for backend in (AESGCMBackend, ChaCha20Backend, AESCBCBackend)}
+
+
+def get_backend(method=None):
+    """Backend for an encryption_method name (DEFAULT_CIPHER if None)"""
+    method = method or DEFAULT_CIPHER
+    if method not in CIPHERS:
+        raise ValueError(f"Unsupported encryption method: {method}")
+    return CIPHERS[method]
+
+
+def encrypt_package(key, plaintext, method=None, header=None):
+    """
+    Encrypt raw bytes into a package dict
+    Args:
+        key: 32-byte key
+        plaintext: bytes
+        method: encryption_method name (defaults to DEFAULT_CIPHER)
+        header: extra package fields; the AAD_FIELDS among them are bound as
+            associated data by AEAD ciphers
+    Returns:
+        Dictionary with the header, encrypted_data, nonce/iv, encryption_method and
+        (when fields are bound) aad
+    """
+    backend = get_backend(method)
+    package = dict(header or {})
+    bound = [field for field in AAD_FIELDS if field in package] if backend.authenticated else []
+    if bound:
+        package['aad'] = bound
+    package.update(backend.encrypt(key, plaintext, associated_data(package)))
+    package["encryption_method"] = backend.method
+    return package
+
+
+def decrypt_package(key, package):
+    """
+    Decrypt a package dict back to bytes
+    Packages without encryption_method predate it and are CBC.
+    Raises cryptography.exceptions.InvalidTag if an AEAD package was tampered with.
+    """
+    return get_backend(package.get('encryption_method', AESCBCBackend.method)).decrypt(key, package)
@@ -0,0 +1,295 @@
+"""
+Local customer directory
+A SQLite copy of the Nessie /customers listing (id, name, address, accounts) with
+indexes on lower-cased first, last and full name, so finding a customer by name is
+an index range scan instead of downloading and scanning the whole remote list.
+
+    directory = CustomerDirectory(fetch=pipeline._make_request)
+    directory.ensure_fresh()
+    matches = directory.find("sar")      # prefix of first, last or full name, newest first
+"""
+
+import json
+import os
+import sqlite3
+import time
+
+import db
+from logger import get_logger
+from nessie_client import iter_pages, list_items
+
+# Re-list customers when the local copy is older than this (seconds)
+DIRECTORY_MAX_AGE = int(os.getenv("DIRECTORY_MAX_AGE", "3600"))
+
+# Customers read per query when streaming the whole directory
+ITER_BATCH = 500
+
+log = get_logger("customer_directory")
+
+
+def unwrap_list(resp):
+    """Nessie returns either a list or a dict like {'customers': [...]} (see nessie_client.list_items)"""
+    return list_items(resp)
+
+
+def _row_hash(customer):
+    return json.dumps([customer.get('first_name', ''), customer.get('last_name', ''),
+                       customer.get('address', {})], sort_keys=True)
+
+
+class CustomerDirectory:
+    """
+    Persisted customer listing with name/prefix lookup
+    `fetch(endpoint)` performs a GET against the Nessie API and returns parsed JSON;
+    it is only needed for refresh() and for accounts not fetched yet.
+    """
+
+    def __init__(self, fetch=None, db_path=db.DB_PATH, max_age=DIRECTORY_MAX_AGE):
+        self.fetch = fetch
+        self.db_path = db_path
+        self.max_age = max_age
+        self._init_table()
+
+    def _connect(self):
+        return sqlite3.connect(self.db_path, timeout=db.DB_TIMEOUT)
+
+    def _init_table(self):
+        conn = self._connect()
+        conn.execute('''CREATE TABLE IF NOT EXISTS customer_directory
+                        (customer_id TEXT PRIMARY KEY,
+                         position INTEGER,
+                         first_name TEXT,
+                         last_name TEXT,
+                         first_lower TEXT,
+                         last_lower TEXT,
+                         name_lower TEXT,
+                         address TEXT,
+                         accounts TEXT,
+                         row_hash TEXT)''')
+        for column in ('first_lower', 'last_lower', 'name_lower', 'position'):
+            conn.execute(f'CREATE INDEX IF NOT EXISTS idx_customer_directory_{column} '
+                         f'ON customer_directory ({column})')
+        conn.execute('CREATE TABLE IF NOT EXISTS customer_directory_meta (key TEXT PRIMARY KEY, value TEXT)')
+        conn.commit()
+        conn.close()
+
+    # ------------------------------------------------------------------
+    # Refresh
+    # ------------------------------------------------------------------
+
+    def last_refresh(self):
+        conn = self._connect()
+        row = conn.execute("SELECT value FROM customer_directory_meta WHERE key = 'refreshed_at'").fetchone()
+        conn.close()
+        return float(row[0]) if row else None
+
+    def is_stale(self):
+        refreshed_at = self.last_refresh()
+        return refreshed_at is None or time.time() - refreshed_at > self.max_age
+
+    def ensure_fresh(self):
+        """Refresh only if the local copy is missing or older than max_age"""
+        if self.is_stale():
+            return self.refresh()
+        return None
+
+    def refresh(self, with_accounts=True, batch_size=ITER_BATCH):
+        """
+        Sync with the remote /customers listing
+        Only new or changed customers are written, accounts are fetched only for
+        new customers, and customers gone from the API are removed. The listing is
+        streamed and written batch_size customers at a time: API calls happen outside
+        any transaction and each batch is one short write, so other writers to the
+        database (e.g. auth) are never locked out for the length of a sync.
+        Removal only runs once every page came back as a list; an error page raises
+        ValueError, and an empty listing never empties a populated directory.
+        Returns: counts of added / updated / removed / unchanged
+        """
+        start = time.perf_counter()
+
+        conn = self._connect()
+        known = dict(conn.execute('SELECT customer_id, row_hash FROM customer_directory'))
+        conn.close()
+
+        counts = {"added": 0, "updated": 0, "removed": 0, "unchanged": 0}
+        listed = set()
+        batch = []
+        for position, customer in enumerate(iter_pages(self.fetch, "/customers", strict=True)):
+            listed.add(customer['_id'])
+            batch.append((position, customer))
+            if len(batch) == batch_size:
+                self._sync_batch(batch, known, counts, with_accounts)
+                batch = []
+        self._sync_batch(batch, known, counts, with_accounts)
+
+        gone = set(known) - listed
+        if gone and not listed:
+            log.warning("⚠️  Customer listing came back empty, keeping the directory", known=len(known))
+            gone = set()
+
+        conn = self._connect()
+        try:
+            conn.executemany('DELETE FROM customer_directory WHERE customer_id = ?', [(cid,) for cid in gone])
+            conn.execute("INSERT OR REPLACE INTO customer_directory_meta VALUES ('refreshed_at', ?)",
+                         (str(time.time()),))
+            conn.commit()
+        finally:
+            conn.close()
+        counts["removed"] = len(gone)
+
+        log.info("📇 Customer directory refreshed", seconds=round(time.perf_counter() - start, 3), **counts)
+        return counts
+
+    def _sync_batch(self, batch, known, counts, with_accounts):
+        """Fetch accounts for the new customers of one batch, then write the batch in one transaction"""
+        added, updated, moved = [], [], []
+        for position, customer in batch:
+            customer_id = customer['_id']
+            if customer_id not in known:
+                accounts = self._fetch_accounts(customer_id) if with_accounts else None
+                added.append((position, customer, accounts))
+            elif known[customer_id] != _row_hash(customer):
+                updated.append((position, customer))
+            else:
+                moved.append((position, customer_id))
+        if not batch:
+            return
+
+        conn = self._connect()
+        try:
+            for position, customer, accounts in added:
+                self._write(conn, customer, position, accounts)
+            for position, customer in updated:
+                self._write(conn, customer, position, keep_accounts=True)
+            conn.executemany('UPDATE customer_directory SET position = ? WHERE customer_id = ?', moved)
+            conn.commit()
+        finally:
+            conn.close()
+        counts["added"] += len(added)
+        counts["updated"] += len(updated)
+        counts["unchanged"] += len(moved)
+
+    def _fetch_accounts(self, customer_id):
+        return list(iter_pages(self.fetch, f"/customers/{customer_id}/accounts"))
+
+    def _write(self, conn, customer, position, accounts=None, keep_accounts=False):
+        first = customer.get('first_name', '')
+        last = customer.get('last_name', '')
+        if keep_accounts:
+            row = conn.execute('SELECT accounts FROM customer_directory WHERE customer_id = ?',
+                               (customer['_id'],)).fetchone()
+            accounts_json = row[0] if row else None
+        else:
+            accounts_json = json.dumps(accounts) if accounts is not None else None
+
+        conn.execute('''INSERT OR REPLACE INTO customer_directory
+                        (customer_id, position, first_name, last_name, first_lower, last_lower,
+                         name_lower, address, accounts, row_hash)
+                        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)''',
+                     (customer['_id'], position, first, last, first.lower(), last.lower(),
+                      f"{first} {last}".lower(), json.dumps(customer.get('address', {})),
+                      accounts_json, _row_hash(customer)))
+
+    def upsert(self, customer, accounts=None):
+        """Add or replace one customer (raw Nessie customer dict), e.g. right after creating it"""
+        conn = self._connect()
+        try:
+            row = conn.execute('SELECT position FROM customer_directory WHERE customer_id = ?',
+                               (customer['_id'],)).fetchone()
+            if row:
+                position = row[0]
+            else:
+                position = conn.execute('SELECT COALESCE(MAX(position), -1) + 1 FROM customer_directory').fetchone()[0]
+            self._write(conn, customer, position, accounts)
+            conn.commit()
+        finally:
+            conn.close()
+
+    # ------------------------------------------------------------------
+    # Lookup
+    # ------------------------------------------------------------------
+
+    _COLUMNS = 'customer_id, position, first_name, last_name, address, accounts'
+
+    def _entry(self, row):
+        customer_id, position, first, last, address, accounts = row
+        return {
+            "index": position + 1,
+            "customer_id": customer_id,
+            "name": f"{first} {last}",
+            "first_name": first,
+            "last_name": last,
+            "address": json.loads(address) if address else {},
+            "accounts": json.loads(accounts) if accounts is not None else None,
+        }
+
+    def get(self, customer_id):
+        conn = self._connect()
+        row = conn.execute(f'SELECT {self._COLUMNS} FROM customer_directory WHERE customer_id = ?',
+                           (customer_id,)).fetchone()
+        conn.close()
+        return self._entry(row) if row else None
+
+    def find(self, name, limit=None):
+        """
+        Customers whose first, last or full name starts with `name` (case-insensitive)
+        Most recently created first, matching the old "latest customer wins" behaviour.
+        """
+        low = name.strip().lower()
+        high = low + '\U0010ffff'
+        query = f'''SELECT {self._COLUMNS} FROM customer_directory WHERE customer_id IN (
+                        SELECT customer_id FROM customer_directory WHERE first_lower >= ? AND first_lower < ?
+                        UNION SELECT customer_id FROM customer_directory WHERE last_lower >= ? AND last_lower < ?
+                        UNION SELECT customer_id FROM customer_directory WHERE name_lower >= ? AND name_lower < ?)
+                    ORDER BY position DESC'''
+        params = [low, high] * 3
+        if limit:
+            query += ' LIMIT ?'
+            params.append(limit)
+
+        conn = self._connect()
+        rows = conn.execute(query, params).fetchall()
+        conn.close()
+        return [self._entry(row) for row in rows]
+
+    def iter_all(self, batch_size=ITER_BATCH):
+        """
+        Every customer in listing order, batch_size rows at a time
+        Each batch is a short keyset query (position > last seen), so no read lock is
+        held while the caller works on a customer and writes to the same database.
+        """
+        position = -1
+        while True:
+            conn = self._connect()
+            rows = conn.execute(f'SELECT {self._COLUMNS} FROM customer_directory WHERE position > ? '
+                                f'ORDER BY position LIMIT ?', (position, batch_size)).fetchall()
+            conn.close()
+            for row in rows:
+                yield self._entry(row)
+            if len(rows) < batch_size:
+                return
+            position = rows[-1][1]
+
+    def all(self):
+        return list(self.iter_all())
+
+    def accounts(self, customer_id):
+        """Cached accounts for a customer, fetched and stored on first use"""
+        entry = self.get(customer_id)
+        if entry and entry['accounts'] is not None:
+            return entry['accounts']
+
+        accounts = self._fetch_accounts(customer_id)
+        if entry:
+            conn = self._connect()
+            conn.execute('UPDATE customer_directory SET accounts = ? WHERE customer_id = ?',
+                         (json.dumps(accounts), customer_id))
+            conn.commit()
+            conn.close()
+        return accounts
+
+    def __len__(self):
+        conn = self._connect()
+        count = conn.execute('SELECT COUNT(*) FROM customer_directory').fetchone()[0]
+        conn.close()
+        return count
@@ -0,0 +1,127 @@
+"""
+SQLite user store shared by the Flask (app.py) and ASGI (asgi_app.py) APIs
+Every function opens its own connection so it is safe to call from worker threads
+"""
+
+import hashlib
+import os
+import sqlite3
+import threading
+
+from logger import get_logger
+
+# Every module that keeps tables in the backend database uses this path
+DB_PATH = os.getenv("DB_PATH", 'secure_data.db')
+
+# Seconds a connection waits for another writer's lock before "database is locked"
+DB_TIMEOUT = float(os.getenv("DB_TIMEOUT", "10"))
+
+log = get_logger("db")
+
+_initialized = False
+_init_lock = threading.Lock()
+
+
+def connect():
+    """Open a connection; the schema is created on the first call in each process"""
+    if not _initialized:
+        init_db()
+    return sqlite3.connect(DB_PATH, timeout=DB_TIMEOUT)
+
+
+def hash_password(password):
+    return hashlib.sha256(password.encode()).hexdigest()
+
+
+def init_db():
+    """Initialize SQLite database with users table only"""
+    global _initialized
+    with _init_lock:
+        if _initialized:
+            return
+        _create_tables()
+        _initialized = True
+    log.info("✅ Database initialized")
+
+
+def _create_tables():
+    conn = sqlite3.connect(DB_PATH, timeout=DB_TIMEOUT)
+    c = conn.cursor()
+
+    # Users table
+    c.execute('''CREATE TABLE IF NOT EXISTS users
+                 (id TEXT PRIMARY KEY,
+                  password_hash TEXT,
+                  customer_id TEXT,
+                  created_at DATETIME DEFAULT CURRENT_TIMESTAMP)''')
+
+    conn.commit()
+    conn.close()
+
+
+def verify_user(user_id, password):
+    """Verify user credentials"""
+    password_hash = hash_password(password)
+
+    conn = connect()
+    c = conn.cursor()
+    c.execute('SELECT password_hash, customer_id FROM users WHERE id = ?', (user_id,))
+    result = c.fetchone()
+    conn.close()
+
+    if result and result[0] == password_hash:
+        return True, result[1]  # Return (is_valid, customer_id)
+    return False, None
+
+
+def create_user(user_id, password, customer_id):
+    """
+    Insert a new user
+    Returns: False if the user already exists
+    """
+    conn = connect()
+    try:
+        # The primary key decides, so two concurrent setups can't both succeed
+        conn.execute('INSERT INTO users (id, password_hash, customer_id) VALUES (?, ?, ?)',
+                     (user_id, hash_password(password), customer_id))
+        conn.commit()
+        return True
+    except sqlite3.IntegrityError:
+        return False
+    finally:
+        conn.close()
+
+
+def update_password(user_id, new_password):
+    conn = connect()
+    c = conn.cursor()
+    c.execute('UPDATE users SET password_hash = ? WHERE id = ?',
+              (hash_password(new_password), user_id))
+    conn.commit()
+    conn.close()
+
+
+def delete_user(user_id):
+    conn = connect()
+    c = conn.cursor()
+    c.execute('DELETE FROM users WHERE id = ?', (user_id,))
+    conn.commit()
+    conn.close()
+
+
+def list_users():
+    """All users as a list of dicts (for testing only)"""
+    conn = connect()
+    c = conn.cursor()
+    c.execute('SELECT id, customer_id, created_at FROM users')
+    users = c.fetchall()
+    conn.close()
+
+    return [
+        {
+            'user_id': user[0],
+            'customer_id': user[1],
+            'created_at': user[2]
+        }
+        for user in users
+    ]
@@ -3,143 +3,161 @@ Decrypt and verify encrypted customer data
 Tests that encryption/decryption works correctly
 """
 
-import json
 import base64
-from cryptography.hazmat.primitives.ciphers import Cipher, algorithms, modes
-from cryptography.hazmat.primitives import padding
-from cryptography.hazmat.backends import default_backend
+from compression import decompress_payload
+from crypto import decrypt_package
+from envelope import KEYRING_FILE, MasterKeyring
+from logger import get_logger
+from profiling import profiled
+import serialization
 
+log = get_logger("decrypt")
 
-def decrypt_file(encrypted_file_path, encryption_key_base64):
+
+def decrypt_file(encrypted_file_path, encryption_key_base64=None, keyring=None):
     """
     Decrypt an encrypted JSON file
     
     Args:
         encrypted_file_path: Path to the encrypted JSON file
-        encryption_key_base64: Base64-encoded encryption key (from encryption_key.txt)
+        encryption_key_base64: Base64-encoded encryption key (from encryption_key.txt, legacy packages)
+        keyring: MasterKeyring for envelope packages (wrapped per-package data key)
     
     Returns:
         Decrypted data as dictionary
     """
-    print(f"🔓 Decrypting: {encrypted_file_path}")
+    log.info("🔓 Decrypting", path=encrypted_file_path)
     
     # 1. Load encrypted package
-    with open(encrypted_file_path, 'r') as f:
-        encrypted_package = json.load(f)
-    
-    print(f"   Encryption method: {encrypted_package.get('encryption_method')}")
-    
-    # 2. Decode the key from base64
-    key = base64.b64decode(encryption_key_base64)
-    print(f"   Key size: {len(key)} bytes ({len(key)*8} bits)")
-    
-    # 3. Decode encrypted data and IV from base64
-    encrypted_data = base64.b64decode(encrypted_package['encrypted_data'])
-    iv = base64.b64decode(encrypted_package['iv'])
-    
-    print(f"   IV size: {len(iv)} bytes")
-    print(f"   Encrypted data size: {len(encrypted_data)} bytes")
-    
-    # 4. Create cipher and decrypt
-    cipher = Cipher(
-        algorithms.AES(key),
-        modes.CBC(iv),
-        backend=default_backend()
+    encrypted_package = serialization.load_file(encrypted_file_path)
+    
+    # 2. Unwrap the package's data key, or decode the shared key from base64
+    if 'wrapped_key' in encrypted_package:
+        if keyring is None:
+            raise ValueError(f"Envelope package needs {KEYRING_FILE}")
+        key = keyring.unwrap(encrypted_package['key_id'], encrypted_package['wrapped_key'])
+    else:
+        key = base64.b64decode(encryption_key_base64)
+    log.debug("   Key loaded", key_bytes=len(key), key_id=encrypted_package.get('key_id'))
+    
+    # 3. Decrypt (GCM/ChaCha20 tags are checked, CBC padding removed)
+    plaintext = decrypt_package(key, encrypted_package)
+    
+    # 4. Undo optional pre-encryption compression
+    if encrypted_package.get('compression'):
+        plaintext = decompress_payload(encrypted_package, plaintext)
+    
+    # 5. Parse JSON
+    data = serialization.loads(plaintext)
+    
+    log.info(
+        "   ✅ Decryption successful!",
+        method=encrypted_package.get('encryption_method'),
+        compression=encrypted_package.get('compression'),
+        decrypted_bytes=len(plaintext)
     )
-    decryptor = cipher.decryptor()
-    padded_data = decryptor.update(encrypted_data) + decryptor.finalize()
-    
-    # 5. Remove padding
-    unpadder = padding.PKCS7(128).unpadder()
-    plaintext = unpadder.update(padded_data) + unpadder.finalize()
-    
-    # 6. Parse JSON
-    data = json.loads(plaintext.decode())
-    
-    print(f"   ✅ Decryption successful!")
-    print(f"   Decrypted data size: {len(plaintext)} bytes")
     
     return data
 
 
 def verify_customer_data(data):
     """Verify the decrypted data has expected structure"""
-    print(f"\n📊 Verifying data structure...")
-    
     required_fields = ['customer_id', 'customer_name', 'account', 'deposits', 'purchases', 'statistics']
     
-    for field in required_fields:
-        if field in data:
-            print(f"   ✅ {field}: present")
-        else:
-            print(f"   ❌ {field}: MISSING!")
-            return False
-    
-    # Check deposits and purchases are lists
-    if not isinstance(data['deposits'], list):
-        print(f"   ❌ deposits is not a list!")
+    missing = [field for field in required_fields if field not in data]
+    if missing:
+        log.error("   ❌ Required fields missing", missing=",".join(missing))
         return False
     
-    if not isinstance(data['purchases'], list):
-        print(f"   ❌ purchases is not a list!")
-        return False
+    # Check deposits and purchases are lists
+    for field in ('deposits', 'purchases'):
+        if not isinstance(data[field], list):
+            log.error("   ❌ Field is not a list", field=field)
+            return False
     
-    print(f"\n   ✅ Data structure is valid!")
+    log.info("   ✅ Data structure is valid!", fields=len(required_fields))
     return True
 
 
 def display_summary(data):
     """Display a summary of the decrypted customer data"""
-    print(f"\n{'='*80}")
-    print(f"CUSTOMER SUMMARY")
-    print(f"{'='*80}")
-    print(f"Customer ID: {data['customer_id']}")
-    print(f"Customer Name: {data['customer_name']}")
-    print(f"\nAccount:")
-    print(f"  Type: {data['account']['type']}")
-    print(f"  Balance: ${data['account']['balance']:,.2f}")
-    print(f"  Rewards: {data['account']['rewards']}")
-    print(f"\nStatistics:")
-    print(f"  Total Deposits: {data['statistics']['total_deposits']}")
-    print(f"  Total Purchases: {data['statistics']['total_purchases']}")
-    print(f"  Total Deposited: ${data['statistics']['total_deposited']:,.2f}")
-    print(f"  Total Spent: ${data['statistics']['total_spent']:,.2f}")
-    print(f"  Categories Active: {data['statistics']['categories_active']}")
-    print(f"  Date Range: {data['statistics']['date_range']}")
+    statistics = data['statistics']
+    account = data['account']
+    log.info(
+        "CUSTOMER SUMMARY",
+        customer_id=data['customer_id'],
+        customer_name=data['customer_name'],
+        account_type=account['type'],
+        balance=account['balance'],
+        rewards=account['rewards'],
+        accounts=len(data.get('accounts', [])) or 1
+    )
+    by_account = statistics.get('by_account', {})
+    for other in data.get('accounts', [])[1:]:
+        stats = by_account.get(other['account_id'], {})
+        log.info(
+            "  Also",
+            account_type=other['type'],
+            account=other.get('nickname') or other['account_id'],
+            deposits=stats.get('total_deposits', 0),
+            purchases=stats.get('total_purchases', 0)
+        )
+    log.info(
+        "  Statistics",
+        deposits=statistics['total_deposits'],
+        purchases=statistics['total_purchases'],
+        deposited=round(statistics['total_deposited'], 2),
+        spent=round(statistics['total_spent'], 2),
+        categories=statistics['categories_active'],
+        date_range=statistics['date_range']
+    )
+    if 'total_withdrawals' in statistics:
+        log.info(
+            "  Other activity",
+            withdrawals=statistics['total_withdrawals'],
+            withdrawn=round(statistics['total_withdrawn'], 2),
+            transfers=statistics['total_transfers'],
+            transferred_out=round(statistics['total_transferred_out'], 2),
+            transferred_in=round(statistics['total_transferred_in'], 2),
+            bills=statistics['total_bills'],
+            billed=round(statistics['total_billed'], 2)
+        )
     
     # Show first few transactions
-    print(f"\nFirst 3 Deposits:")
-    for i, dep in enumerate(data['deposits'][:3], 1):
-        print(f"  {i}. {dep.get('transaction_date')}: ${dep.get('amount', 0):,.2f} - {dep.get('description', 'N/A')}")
-    
-    print(f"\nFirst 3 Purchases:")
-    for i, purch in enumerate(data['purchases'][:3], 1):
-        merchant = purch.get('merchant_name', 'Unknown')
-        print(f"  {i}. {purch.get('purchase_date')}: ${purch.get('amount', 0):,.2f} at {merchant}")
-    
-    print(f"{'='*80}\n")
+    for dep in data['deposits'][:3]:
+        log.info("  Deposit", date=dep.get('transaction_date'), amount=dep.get('amount') or 0,
+                 description=dep.get('description', 'N/A'))
+    for purch in data['purchases'][:3]:
+        log.info("  Purchase", date=purch.get('purchase_date'), amount=purch.get('amount') or 0,
+                 merchant=purch.get('merchant_name', 'Unknown'))
 
 
+@profiled("decrypt")
 def main():
     """Main execution - test decryption"""
-    print("="*80)
-    print("DECRYPTION VERIFICATION TOOL")
-    print("="*80)
+    log.info("="*80)
+    log.info("DECRYPTION VERIFICATION TOOL")
+    log.info("="*80)
+    
+    import os
     
-    # Load encryption key
-    print("\n📂 Loading encryption key...")
-    try:
+    # Load master keyring (envelope packages) and/or the legacy shared key
+    log.info("📂 Loading encryption keys...")
+    keyring = None
+    encryption_key = None
+    if os.path.exists(KEYRING_FILE):
+        keyring = MasterKeyring.load(KEYRING_FILE)
+        log.info("   ✅ Keyring loaded", master_keys=len(keyring.keys), active=keyring.active)
+    if os.path.exists('encryption_key.txt'):
         with open('encryption_key.txt', 'r') as f:
             encryption_key = f.read().strip()
-        print(f"   ✅ Key loaded: {encryption_key[:10]}...{encryption_key[-10:]}")
-        print(f"   Key length: {len(encryption_key)} characters (base64)")
-    except FileNotFoundError:
-        print("   ❌ encryption_key.txt not found!")
-        print("   Make sure you ran the encryption script first.")
+        log.info("   ✅ Legacy key loaded", path="encryption_key.txt")
+    if keyring is None and encryption_key is None:
+        log.error("   ❌ No keys found", keyring=KEYRING_FILE, legacy_key="encryption_key.txt")
+        log.info("   Make sure you ran the encryption script first.")
         return
     
     # Find encrypted files
-    import os
     encrypted_files = []
     if os.path.exists('encrypted_data'):
         for filename in os.listdir('encrypted_data'):
@@ -147,21 +165,19 @@ def main():
                 encrypted_files.append(os.path.join('encrypted_data', filename))
     
     if not encrypted_files:
-        print("\n❌ No encrypted files found in encrypted_data/")
-        print("   Make sure you ran the encryption script first.")
+        log.error("❌ No encrypted files found in encrypted_data/")
+        log.info("   Make sure you ran the encryption script first.")
         return
     
-    print(f"\n📁 Found {len(encrypted_files)} encrypted file(s)")
+    log.info("📁 Found encrypted files", count=len(encrypted_files))
     
     # Decrypt each file
     for encrypted_file in encrypted_files:
-        print(f"\n{'='*80}")
-        print(f"Testing: {encrypted_file}")
-        print(f"{'='*80}")
+        log.info("="*80)
         
         try:
             # Decrypt
-            decrypted_data = decrypt_file(encrypted_file, encryption_key)
+            decrypted_data = decrypt_file(encrypted_file, encryption_key, keyring)
             
             # Verify structure
             if verify_customer_data(decrypted_data):
@@ -170,29 +186,25 @@ def main():
                 
                 # Save decrypted version for inspection
                 output_file = encrypted_file.replace('_encrypted.json', '_decrypted_test.json')
-                with open(output_file, 'w') as f:
-                    json.dump(decrypted_data, f, indent=2)
-                print(f"💾 Decrypted data saved to: {output_file}")
-                print(f"   (for your inspection - not needed for Gemini)")
+                serialization.dump_file(decrypted_data, output_file, pretty=True)
+                log.info("💾 Decrypted data saved (for inspection, not needed for Gemini)", path=output_file)
             else:
-                print(f"\n❌ Data verification failed!")
+                log.error("❌ Data verification failed!", path=encrypted_file)
         
         except Exception as e:
-            print(f"\n❌ Decryption failed: {e}")
-            print(f"   The data may be corrupted or the key is wrong.")
-    
-    print(f"\n{'='*80}")
-    print("VERIFICATION COMPLETE")
-    print("="*80)
-    print("""
-If all files decrypted successfully:
+            log.error("❌ Decryption failed (corrupted data or wrong key)", path=encrypted_file, error=str(e))
+    
+    log.info("="*80)
+    log.info("VERIFICATION COMPLETE")
+    log.info("="*80)
+    log.info("""If all files decrypted successfully:
 ✅ Your encryption is working correctly
 ✅ Data is not corrupted
 ✅ Gemini will be able to decrypt using the same key
 
 Next steps:
 1. Send encrypted files to your teammate
-2. Include encryption_key.txt
+2. Include the Gemini instructions (they carry each customer's data key)
 3. They'll use these with Gemini for analysis
     """)
 
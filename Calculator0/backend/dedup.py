@@ -0,0 +1,304 @@
+"""
+Cross-source transaction deduplication
+The same transaction can arrive from the Nessie API, from an uploaded bank CSV and
+from the hand-curated customers/*.json files. Each row is reduced to a fingerprint
+
+    (account, direction, day, amount in cents, canonical merchant)
+
+where the merchant comes from merchant_matcher (falling back to the category code
+for rows without a merchant, e.g. payroll). The fingerprints are kept in a hash
+index, in memory and persisted in SQLite next to the other caches, so ingesting a
+batch costs O(batch) lookups instead of a rescan of the stored history.
+
+A row from one source is a duplicate of an earlier row from another source when
+the fingerprints are equal with the date within ±1 day (posting vs transaction
+date). Re-ingesting the same source is idempotent: the n-th identical row of a
+batch matches the n-th stored row from that source, so two genuine $8.75 coffees on
+the same day stay two transactions.
+
+    index = DedupIndex()
+    index.ingest(nessie_purchases, source="nessie", account="acct-1")
+    result = index.ingest(read_bank_csv("statement.csv"), source="csv", account="acct-1")
+    result["new"], result["duplicates"]
+
+    python dedup.py customers/<id>.json customers/example1.csv --account main
+"""
+
+import argparse
+import json
+import sqlite3
+import sys
+from datetime import date, datetime
+
+import db
+from logger import get_logger
+from merchant_matcher import get_matcher, read_bank_csv
+
+# A posted date may differ from the transaction date by this many days
+DATE_TOLERANCE_DAYS = 1
+
+# Transaction type -> direction of money for the account (transfers depend on
+# which side of the transfer the account is, see transfer_direction)
+DIRECTIONS = {
+    "purchase": "debit",
+    "withdrawal": "debit",
+    "bill": "debit",
+    "deposit": "credit",
+}
+
+DATE_KEYS = ("purchase_date", "transaction_date", "payment_date", "Transaction Date")
+
+log = get_logger("dedup")
+
+
+def parse_day(value):
+    """ISO (2025-08-11) or US (08/11/2025) date -> ordinal day, or None (also for non-strings)"""
+    if not value or not isinstance(value, str):
+        return None
+    value = value[:10]
+    try:
+        if '/' in value:
+            return datetime.strptime(value, "%m/%d/%Y").toordinal()
+        return date.fromisoformat(value).toordinal()
+    except ValueError:
+        return None
+
+
+def _cents(value):
+    if value in (None, ''):
+        return None
+    return abs(int(round(float(value) * 100)))
+
+
+def transfer_direction(row, account=None):
+    """
+    "credit" when the account is the payee of a transfer, else "debit"
+    The account is the row's account_id (set when rows are merged per account)
+    or the account label passed in.
+    """
+    own = {row.get('account_id'), account} - {None, ''}
+    if row.get('payee_id') in own and row.get('payer_id') not in own:
+        return "credit"
+    return "debit"
+
+
+def fingerprint(row, kind=None, account=None):
+    """
+    Fingerprint for one transaction row
+    Args:
+        row: Nessie / customers JSON row, or a bank CSV row (Debit / Credit columns)
+        kind: purchase, deposit, withdrawal, bill or transfer (CSV rows infer it)
+        account: account label shared across sources (default: payer/payee id)
+    Returns:
+        ((account, direction, day, cents, merchant), day), or None when the row
+        has no usable date or amount
+    """
+    day = None
+    for key in DATE_KEYS:
+        if row.get(key):
+            day = parse_day(row[key])
+            break
+
+    if 'amount' in row:
+        direction = transfer_direction(row, account) if kind == "transfer" else DIRECTIONS.get(kind, "debit")
+        cents = _cents(row['amount'])
+    elif row.get('Credit'):
+        direction = "credit"
+        cents = _cents(row['Credit'])
+    else:
+        direction = "debit"
+        cents = _cents(row.get('Debit'))
+
+    if day is None or cents is None:
+        return None
+
+    matcher = get_matcher()
+    category = row.get('merchant_category') or row.get('Category')
+    found = matcher.match(row['merchant_name'], category) if row.get('merchant_name') else None
+    if found is None or found.merchant_code is None:
+        found = matcher.match(row.get('description') or row.get('Description'), category)
+    merchant = found.merchant_code or found.category_code
+
+    if account is None:
+        account = row.get('payer_id') or row.get('payee_id') or row.get('account_id') or ''
+    return (account, direction, day, cents, merchant), day
+
+
+class DedupIndex:
+    """
+    Fingerprint index over every ingested transaction
+    Entries are loaded from SQLite per account on first use and kept in memory;
+    db_path=None keeps the index in memory only.
+    """
+
+    def __init__(self, db_path=db.DB_PATH):
+        self.db_path = db_path
+        self._index = {}        # fingerprint -> [entry, ...]
+        self._by_id = {}        # entry id -> entry
+        self._accounts = set()  # accounts loaded from the database
+        if db_path:
+            self._init_table()
+
+    def _connect(self):
+        return sqlite3.connect(self.db_path, timeout=db.DB_TIMEOUT)
+
+    def _init_table(self):
+        conn = self._connect()
+        conn.execute('''CREATE TABLE IF NOT EXISTS transaction_fingerprints
+                        (id INTEGER PRIMARY KEY AUTOINCREMENT,
+                         account TEXT,
+                         direction TEXT,
+                         day INTEGER,
+                         cents INTEGER,
+                         merchant TEXT,
+                         source TEXT,
+                         ref TEXT,
+                         duplicate_of INTEGER)''')
+        conn.execute('CREATE INDEX IF NOT EXISTS idx_transaction_fingerprints_account '
+                     'ON transaction_fingerprints (account)')
+        conn.commit()
+        conn.close()
+
+    def _add(self, key, entry):
+        self._index.setdefault(key, []).append(entry)
+        if entry['duplicate_of'] is not None:
+            self._by_id[entry['duplicate_of']]['matched'].add(entry['source'])
+        self._by_id[entry['id']] = entry
+
+    def _load(self, account):
+        if account in self._accounts:
+            return
+        self._accounts.add(account)
+        if not self.db_path:
+            return
+        conn = self._connect()
+        rows = conn.execute('''SELECT id, direction, day, cents, merchant, source, ref, duplicate_of
+                               FROM transaction_fingerprints WHERE account = ? ORDER BY id''',
+                            (account,)).fetchall()
+        conn.close()
+        for row_id, direction, day, cents, merchant, source, ref, duplicate_of in rows:
+            self._add((account, direction, day, cents, merchant),
+                      {'id': row_id, 'source': source, 'ref': ref, 'duplicate_of': duplicate_of, 'matched': set()})
+
+    def _cross_source_match(self, key, day, source):
+        """An original from another source within the date tolerance not yet claimed by `source`"""
+        account, direction, _, cents, merchant = key
+        for offset in range(-DATE_TOLERANCE_DAYS, DATE_TOLERANCE_DAYS + 1):
+            for entry in self._index.get((account, direction, day + offset, cents, merchant), ()):
+                if (entry['duplicate_of'] is None and entry['source'] != source
+                        and source not in entry['matched']):
+                    return entry
+        return None
+
+    def ingest(self, rows, source, account=None, kind=None):
+        """
+        Add a batch from one source
+        Args:
+            rows: transaction rows
+            source: where the batch came from, e.g. "nessie", "csv", "curated";
+                pass a source's full snapshot per call, since a repeat is a re-ingest
+            account: account label shared across sources
+            kind: transaction type for JSON rows (purchase, deposit, ...)
+        Returns:
+            {"new": rows seen for the first time, "duplicates": rows already known}
+        """
+        new, duplicates, pending = [], [], []
+        seen = {}  # fingerprint -> occurrences in this batch
+        for row in rows:
+            found = fingerprint(row, kind, account)
+            if found is None:
+                new.append(row)
+                continue
+            key, day = found
+            self._load(key[0])
+
+            seen[key] = seen.get(key, 0) + 1
+            same_source = sum(1 for entry in self._index.get(key, ()) if entry['source'] == source)
+            if seen[key] <= same_source:
+                duplicates.append(row)
+                continue
+
+            original = self._cross_source_match(key, day, source)
+            if original:
+                original['matched'].add(source)
+            entry = {'id': None, 'source': source, 'ref': row.get('_id'),
+                     'duplicate_of': original['id'] if original else None, 'matched': set()}
+            pending.append((key, entry))
+            (duplicates if original else new).append(row)
+
+        self._store(pending)
+        log.info("🧹 Ingested", source=source, new=len(new), duplicates=len(duplicates))
+        return {"new": new, "duplicates": duplicates}
+
+    def _store(self, pending):
+        if self.db_path and pending:
+            conn = self._connect()
+            conn.executemany('''INSERT INTO transaction_fingerprints
+                                (account, direction, day, cents, merchant, source, ref, duplicate_of)
+                                VALUES (?, ?, ?, ?, ?, ?, ?, ?)''',
+                             [(*key, entry['source'], entry['ref'], entry['duplicate_of'])
+                              for key, entry in pending])
+            # One transaction holds the write lock, so the batch got consecutive ids
+            last_id = conn.execute('SELECT last_insert_rowid()').fetchone()[0]
+            conn.commit()
+            conn.close()
+            for offset, (_, entry) in enumerate(pending):
+                entry['id'] = last_id - len(pending) + 1 + offset
+        for key, entry in pending:
+            if entry['id'] is None:
+                # In-memory index: ids only need to be unique
+                entry['id'] = len(self._by_id) + 1
+            self._add(key, entry)
+
+    def __len__(self):
+        return sum(len(entries) for entries in self._index.values())
+
+
+def dedupe(batches, account=None):
+    """
+    Unique rows across sources without persisting anything
+    Args:
+        batches: iterable of (source, rows, kind)
+    Returns:
+        List of rows, each transaction once (first source wins)
+    """
+    index = DedupIndex(db_path=None)
+    unique = []
+    for source, rows, kind in batches:
+        unique.extend(index.ingest(rows, source, account=account, kind=kind)["new"])
+    return unique
+
+# ============================================================================
+# CLI
+# ============================================================================
+
+def load_batches(path):
+    """(source, rows, kind) batches from a customers/*.json file or a bank CSV"""
+    if path.endswith('.csv'):
+        return [(path, list(read_bank_csv(path)), None)]
+    with open(path, 'r') as f:
+        data = json.load(f)
+    return [(path, data.get('purchases', []), "purchase"), (path, data.get('deposits', []), "deposit")]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Count transactions shared between sources")
+    parser.add_argument("paths", nargs="+", help="customers/*.json files and bank CSV exports")
+    parser.add_argument("--account", default="", help="account label the files belong to")
+    args = parser.parse_args(argv)
+
+    index = DedupIndex(db_path=None)
+    total = unique = 0
+    for path in args.paths:
+        for source, rows, kind in load_batches(path):
+            result = index.ingest(rows, source, account=args.account, kind=kind)
+            total += len(rows)
+            unique += len(result["new"])
+            print(f"{source:<48} {kind or 'csv':<9} {len(rows):>6} rows  "
+                  f"{len(result['new']):>6} new  {len(result['duplicates']):>6} duplicates")
+    print(f"\n✅ {total} rows, {unique} unique transactions")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -3,83 +3,189 @@ Secure Financial Abuse Detection - AES Encryption Pipeline (ID-based)
 Fetches customer data by ID, encrypts it with AES, and prepares for Gemini analysis
 """
 
-import requests
-import json
 import base64
-from cryptography.hazmat.primitives.ciphers import Cipher, algorithms, modes
-from cryptography.hazmat.primitives import padding
-from cryptography.hazmat.backends import default_backend
+import hashlib
 import os
-from dotenv import load_dotenv
-
-load_dotenv()
+from concurrent.futures import ThreadPoolExecutor
+import config
+from logger import get_logger
+from profiling import profiled
+from analysis_cache import AnalysisCache, PROMPT_VERSION, fingerprint
+from pipeline import build_customer_pipeline, new_context
+from envelope import MasterKeyring
+from crypto import decrypt_package, encrypt_package, get_backend
+from compression import decompress_instructions, decompress_payload
+from customer_directory import CustomerDirectory
+from merchant_matcher import get_matcher
+from nessie_client import iter_pages, list_items
+import serialization
 
 BASE_URL = "http://api.nessieisreal.com"
-API_KEY = os.getenv("NESSIE_API_KEY")
+API_KEY = config.get("NESSIE_API_KEY")
+
+# Concurrent API requests while fetching one customer's accounts and merchants
+FETCH_WORKERS = int(os.getenv("FETCH_WORKERS", "16"))
+
+# Transaction types fetched for every account, and the date each is ordered by
+TRANSACTION_TYPES = {
+    "purchases": "purchase_date",
+    "deposits": "transaction_date",
+    "withdrawals": "transaction_date",
+    "transfers": "transaction_date",
+    "bills": "payment_date",
+}
+
+log = get_logger("encryption")
+
+
+def _total(rows):
+    return sum(row.get('amount', 0) or 0 for row in rows)
+
+
+def customer_statistics(deposits, purchases, accounts=None, withdrawals=(), transfers=(), bills=()):
+    """
+    Summary block stored with every customer_data package
+    With `accounts` (account ids) it also carries a by_account block of the same
+    figures for the rows tagged with each account_id.
+    """
+    statistics = {
+        "total_deposits": len(deposits),
+        "total_purchases": len(purchases),
+        "total_deposited": _total(deposits),
+        "total_spent": _total(purchases),
+        "date_range": "6 months",
+        "categories_active": len(set(p.get('merchant_category', 'Unknown') for p in purchases)),
+        "total_withdrawals": len(withdrawals),
+        "total_withdrawn": _total(withdrawals),
+        "total_transfers": len(transfers),
+        "total_transferred_out": _total(t for t in transfers if t.get('direction') == "out"),
+        "total_transferred_in": _total(t for t in transfers if t.get('direction') == "in"),
+        "total_bills": len(bills),
+        "total_billed": _total(bills)
+    }
+    if accounts:
+        rows_by_kind = {"deposits": deposits, "purchases": purchases, "withdrawals": withdrawals,
+                        "transfers": transfers, "bills": bills}
+        grouped = {account_id: {kind: [] for kind in rows_by_kind} for account_id in accounts}
+        for kind, rows in rows_by_kind.items():
+            for row in rows:
+                if row.get('account_id') in grouped:
+                    grouped[row['account_id']][kind].append(row)
+        statistics["accounts"] = len(accounts)
+        statistics["by_account"] = {account_id: customer_statistics(**rows) for account_id, rows in grouped.items()}
+    return statistics
+
+
+def account_summary(account):
+    """The account fields kept in customer_data"""
+    return {
+        "account_id": account['_id'],
+        "type": account.get('type'),
+        "nickname": account.get('nickname'),
+        "balance": account.get('balance'),
+        "rewards": account.get('rewards')
+    }
 
 
 class SecureDataPipeline:
-    def __init__(self, api_key, encryption_key=None):
+    def __init__(self, api_key, encryption_key=None, keyring=None, cipher=None):
         self.api_key = api_key
         self.base_url = BASE_URL
         
+        # encryption_method for new packages (see crypto.CIPHERS); None = crypto.DEFAULT_CIPHER
+        self.cipher = cipher
+        
+        # With a keyring every package gets its own data key wrapped by the master key
+        self.keyring = keyring
+        
         # Generate or use provided AES key (256-bit)
         if encryption_key:
             self.key = encryption_key
         else:
             self.key = os.urandom(32)  # 256-bit key
         
-        print(f" AES encryption key:")
-        print(f"   {base64.b64encode(self.key).decode()}")
+        self._package_cache = None
+        self._directory = None
+        self._pool = None
+        self.stages = build_customer_pipeline(self, unchanged=self.package_unchanged)
+        
+        # Never log the key itself; a short fingerprint is enough to tell keys apart
+        log.debug("AES key ready", key_sha256=hashlib.sha256(self.key).hexdigest()[:12])
+    
+    
+    @property
+    def package_cache(self):
+        """Fingerprints of already generated Gemini packages (opened on first use)"""
+        if self._package_cache is None:
+            self._package_cache = AnalysisCache()
+        return self._package_cache
+    
+    @property
+    def pool(self):
+        """Thread pool for concurrent API requests (started on first use)"""
+        if self._pool is None:
+            self._pool = ThreadPoolExecutor(max_workers=FETCH_WORKERS, thread_name_prefix="fetch")
+        return self._pool
     
+    @property
+    def directory(self):
+        """Local customer directory backed by this pipeline's API key"""
+        if self._directory is None:
+            self._directory = CustomerDirectory(fetch=self._make_request)
+        return self._directory
     
     def _make_request(self, endpoint):
         """Helper to make API GET requests"""
-        url = f"{self.base_url}{endpoint}?key={self.api_key}"
+        separator = '&' if '?' in endpoint else '?'
+        url = f"{self.base_url}{endpoint}{separator}key={self.api_key}"
+        import requests  # deferred: ~100ms, and only needed once we actually call the API
         response = requests.get(url)
         return response.json()
 
     def _unwrap_list(self, resp, default=None):
         """Nessie API often returns a dict like {'customers': [...]}. Return the list."""
-        if default is None:
-            default = []
-        if isinstance(resp, list):
-            return resp
-        if not isinstance(resp, dict):
-            return default
-        if "customers" in resp:
-            return resp["customers"]
-        if "results" in resp:
-            return resp["results"]
-        for v in resp.values():
-            if isinstance(v, list) and (not v or isinstance(v[0], dict)):
-                return v
+        items = list_items(resp)
+        if items or default is None:
+            return items
         return default
     
+    def iter_list(self, endpoint):
+        """Items of a list endpoint one at a time, following pagination"""
+        return iter_pages(self._make_request, endpoint)
+    
+    def _fetch_list(self, endpoint):
+        return list(self.iter_list(endpoint))
+    
+    def iter_customers(self):
+        """
+        Customers (ID, name, and metadata) one at a time
+        Syncs the local customer directory with the API first (new customers only),
+        then streams it, so population-wide jobs don't hold the whole listing.
+        If the listing fails part-way the directory is left as it was and used as is.
+        """
+        try:
+            self.directory.refresh()
+        except ValueError as e:
+            log.error("❌ Customer listing failed, using the existing directory", error=str(e))
+        for customer_info in self.directory.iter_all():
+            log.debug(
+                "Customer",
+                index=customer_info['index'],
+                name=customer_info['name'],
+                customer_id=customer_info['customer_id'],
+                city=customer_info['address'].get('city', 'N/A'),
+                state=customer_info['address'].get('state', 'N/A')
+            )
+            yield customer_info
+    
     def list_all_customers(self):
         """
         Get all customers with their IDs
-        Returns: List of customers with ID, name, and metadata
+        Returns: List of customers with ID, name, and metadata (see iter_customers)
         """
-        print("Fetching all customers\n")
-        raw = self._make_request("/customers")
-        customers = self._unwrap_list(raw)
-        
-        customer_list = []
-        for idx, customer in enumerate(customers, 1):
-            customer_info = {
-                "index": idx,
-                "customer_id": customer['_id'],
-                "name": f"{customer['first_name']} {customer['last_name']}",
-                "first_name": customer['first_name'],
-                "last_name": customer['last_name'],
-                "address": customer.get('address', {})
-            }
-            customer_list.append(customer_info)
-            print(f"{idx}. ID: {customer['_id']}")
-            print(f"   Name: {customer['first_name']} {customer['last_name']}")
-            print(f"   Address: {customer.get('address', {}).get('city', 'N/A')}, {customer.get('address', {}).get('state', 'N/A')}\n")
-        
+        log.info("Fetching all customers")
+        customer_list = list(self.iter_customers())
+        log.info("Found customers", count=len(customer_list))
         return customer_list
     
     def fetch_customer_data_by_id(self, customer_id):
@@ -89,43 +195,102 @@ class SecureDataPipeline:
             customer_id: The customer's unique ID from the API
         Returns: Dictionary with all customer data
         """
-        print(f"Fetching data for customer ID: {customer_id}...")
-        
-        # 1. Get customer details
-        customer = self._make_request(f"/customers/{customer_id}")
-        customer_name = f"{customer['first_name']} {customer['last_name']}"
+        records = self.fetch_customer_records(customer_id)
+        records['purchases'] = self.enrich_purchases(records['purchases'])
+        return self.build_customer_data(customer_id, records)
+    
+    def fetch_customer_records(self, customer_id):
+        """
+        Fetch the customer, all of their accounts, and every account's purchases,
+        deposits, withdrawals, transfers and bills (no enrichment)
+        All per-account requests run concurrently, so the total takes about as long
+        as the slowest one. Every row is tagged with the account_id it came from;
+        transfers also get a direction (out, in, or internal between the
+        customer's own accounts, kept once).
+        Returns: Dictionary with customer, account (the first one), accounts and
+            one list per TRANSACTION_TYPES entry
+        """
+        log.info("Fetching data for customer", customer_id=customer_id)
         
-        # 2. Get customer's accounts
-        accounts = self._unwrap_list(self._make_request(f"/customers/{customer_id}/accounts"))
+        pool = self.pool
+        # 1. Customer details and accounts
+        customer_future = pool.submit(self._make_request, f"/customers/{customer_id}")
+        accounts = self._fetch_list(f"/customers/{customer_id}/accounts")
         
         if not accounts:
+            customer_future.cancel()
             raise ValueError(f"No accounts found for customer {customer_id}")
         
-        account = accounts[0]
-        account_id = account['_id']
-        
-        # 3. Get purchases
-        purchases = self._unwrap_list(self._make_request(f"/accounts/{account_id}/purchases"))
-        
-        # 4. Get deposits
-        deposits = self._unwrap_list(self._make_request(f"/accounts/{account_id}/deposits"))
-        
-        # 5. Enrich purchases with merchant info
+        # 2. Every transaction type of every account at once
+        futures = [
+            (account['_id'], kind, pool.submit(self._fetch_list, f"/accounts/{account['_id']}/{kind}"))
+            for account in accounts
+            for kind in TRANSACTION_TYPES
+        ]
+        customer = customer_future.result()
+        own_accounts = {account['_id'] for account in accounts}
+        records = {kind: [] for kind in TRANSACTION_TYPES}
+        seen_transfers = set()
+        for account_id, kind, future in futures:
+            for row in future.result():
+                if kind == "transfers":
+                    # A transfer between two of the customer's accounts is listed by both
+                    if row.get('_id') in seen_transfers:
+                        continue
+                    seen_transfers.add(row.get('_id'))
+                    if row.get('payer_id') in own_accounts and row.get('payee_id') in own_accounts:
+                        row['direction'] = "internal"
+                    else:
+                        row['direction'] = "out" if row.get('payer_id') == account_id else "in"
+                row['account_id'] = account_id
+                records[kind].append(row)
+        
+        log.info(
+            "Fetched transactions",
+            customer_id=customer_id,
+            accounts=len(accounts),
+            **{kind: len(rows) for kind, rows in records.items()}
+        )
+        return {"customer": customer, "account": accounts[0], "accounts": accounts, **records}
+    
+    def enrich_purchases(self, purchases):
+        """Add merchant_name/merchant_category and canonical merchant_code/category_code to each purchase"""
+        matcher = get_matcher()
+        # Each merchant once, all at the same time
+        merchant_ids = list(dict.fromkeys(p['merchant_id'] for p in purchases if p.get('merchant_id')))
+        merchants = dict(zip(merchant_ids, self.pool.map(self._fetch_merchant, merchant_ids)))
         enriched_purchases = []
         for purchase in purchases:
             merchant_id = purchase.get('merchant_id')
             if merchant_id:
-                try:
-                    merchant = self._make_request(f"/merchants/{merchant_id}")
-                    purchase['merchant_name'] = merchant.get('name', 'Unknown')
-                    purchase['merchant_category'] = merchant.get('category', 'Unknown')
-                except:
-                    purchase['merchant_name'] = 'Unknown'
-                    purchase['merchant_category'] = 'Unknown'
+                merchant = merchants[merchant_id]
+                purchase['merchant_name'] = merchant.get('name', 'Unknown')
+                purchase['merchant_category'] = merchant.get('category', 'Unknown')
+            matcher.tag(purchase)
             enriched_purchases.append(purchase)
+        return enriched_purchases
+    
+    def _fetch_merchant(self, merchant_id):
+        """Merchant record, or {} when the API fails or answers with something else"""
+        import requests
+        try:
+            merchant = self._make_request(f"/merchants/{merchant_id}")
+        except (requests.RequestException, ValueError) as e:
+            log.warning("⚠️  Merchant lookup failed", merchant_id=merchant_id, error=str(e))
+            return {}
+        return merchant if isinstance(merchant, dict) else {}
+    
+    def build_customer_data(self, customer_id, records):
+        """Assemble the customer_data structure from fetched (and enriched) records"""
+        customer = records['customer']
+        account = records['account']
+        accounts = records.get('accounts') or [account]
+        purchases = records['purchases']
+        deposits = records['deposits']
+        others = {kind: records.get(kind, []) for kind in ("withdrawals", "transfers", "bills")}
+        customer_name = f"{customer['first_name']} {customer['last_name']}"
         
-        # 6. Build complete data structure
-        customer_data = {
+        return {
             "customer_id": customer_id,
             "customer_name": customer_name,
             "customer_metadata": {
@@ -133,147 +298,161 @@ class SecureDataPipeline:
                 "last_name": customer['last_name'],
                 "address": customer.get('address', {})
             },
-            "account": {
-                "account_id": account_id,
-                "type": account.get('type'),
-                "nickname": account.get('nickname'),
-                "balance": account.get('balance'),
-                "rewards": account.get('rewards')
-            },
+            "account": account_summary(account),
+            "accounts": [account_summary(a) for a in accounts],
             "deposits": sorted(deposits, key=lambda x: x.get('transaction_date', '')),
-            "purchases": sorted(enriched_purchases, key=lambda x: x.get('purchase_date', '')),
-            "statistics": {
-                "total_deposits": len(deposits),
-                "total_purchases": len(purchases),
-                "total_deposited": sum(d.get('amount', 0) for d in deposits),
-                "total_spent": sum(p.get('amount', 0) for p in purchases),
-                "date_range": "6 months",
-                "categories_active": len(set(p.get('merchant_category', 'Unknown') for p in enriched_purchases))
-            }
+            "purchases": sorted(purchases, key=lambda x: x.get('purchase_date', '')),
+            **{kind: sorted(rows, key=lambda x: x.get(TRANSACTION_TYPES[kind]) or '') for kind, rows in others.items()},
+            "statistics": customer_statistics(deposits, purchases, [a['_id'] for a in accounts], **others)
         }
-        
-        print(f"Fetched {len(deposits)} deposits and {len(purchases)} purchases")
-        print(f"   Customer: {customer_name}")
-        print(f"   Account: {customer_data}")
-        return customer_data
     
     def aes_encrypt(self, data):
         """
-        AES-256 CBC encryption
+        Authenticated encryption (AES-256-GCM by default, see crypto.py)
         Args:
             data: Dictionary or string to encrypt
         Returns:
-            Dictionary with encrypted data and IV
+            Dictionary with encrypted data, nonce and encryption method
         """
-        # Convert data to JSON string
+        # Compact JSON: indentation would only add ciphertext
         if isinstance(data, dict):
-            plaintext = json.dumps(data, indent=2)
+            plaintext = serialization.dumps(data)
         else:
-            plaintext = str(data)
-        
-        # Generate random IV (Initialization Vector)
-        iv = os.urandom(16)
-        
-        # Pad the data to AES block size (128 bits)
-        padder = padding.PKCS7(128).padder()
-        padded_data = padder.update(plaintext.encode()) + padder.finalize()
+            plaintext = str(data).encode()
         
-        # Encrypt
-        cipher = Cipher(
-            algorithms.AES(self.key),
-            modes.CBC(iv),
-            backend=default_backend()
-        )
-        encryptor = cipher.encryptor()
-        encrypted_data = encryptor.update(padded_data) + encryptor.finalize()
+        return self.encrypt_bytes(plaintext)
+    
+    def encrypt_bytes(self, plaintext, header=None):
+        """
+        Encryption of raw bytes (see aes_encrypt)
+        `header` fields (e.g. compression) go into the package, bound to the ciphertext
+        """
+        header = dict(header or {})
+        if self.keyring:
+            key, key_id, wrapped_key = self.keyring.new_data_key()
+            header.update({"key_id": key_id, "wrapped_key": wrapped_key})
+        else:
+            key = self.key
         
-        # Return base64 encoded for easy transmission
-        return {
-            "encrypted_data": base64.b64encode(encrypted_data).decode(),
-            "iv": base64.b64encode(iv).decode(),
-            "encryption_method": "AES-256-CBC"
-        }
+        # Base64 encoded fields for easy transmission
+        return encrypt_package(key, plaintext, self.cipher, header)
+    
+    def package_key(self, encrypted_package):
+        """The AES key a package was encrypted with (unwrapped data key or the instance key)"""
+        if 'wrapped_key' in encrypted_package:
+            if not self.keyring:
+                raise ValueError("Package uses envelope encryption but no keyring is loaded")
+            return self.keyring.unwrap(encrypted_package['key_id'], encrypted_package['wrapped_key'])
+        return self.key
     
     def aes_decrypt(self, encrypted_package, key=None):
         """
-        AES-256 CBC decryption
+        Decryption of any supported package (GCM, ChaCha20-Poly1305 or legacy CBC)
         Args:
-            encrypted_package: Dictionary with encrypted_data and iv
-            key: Optional decryption key (uses instance key if not provided)
+            encrypted_package: Dictionary with encrypted_data, nonce/iv and encryption_method
+            key: Optional decryption key (uses the package's data key or the instance key if not provided)
         Returns:
             Decrypted data as dictionary
         """
         if key is None:
-            key = self.key
+            key = self.package_key(encrypted_package)
         
-        # Decode from base64
-        encrypted_data = base64.b64decode(encrypted_package['encrypted_data'])
-        iv = base64.b64decode(encrypted_package['iv'])
+        plaintext = decrypt_package(key, encrypted_package)
         
-        # Decrypt
-        cipher = Cipher(
-            algorithms.AES(key),
-            modes.CBC(iv),
-            backend=default_backend()
-        )
-        decryptor = cipher.decryptor()
-        padded_data = decryptor.update(encrypted_data) + decryptor.finalize()
-        
-        # Unpad
-        unpadder = padding.PKCS7(128).unpadder()
-        plaintext = unpadder.update(padded_data) + unpadder.finalize()
+        plaintext = decompress_payload(encrypted_package, plaintext)
         
         # Parse JSON
-        return json.loads(plaintext.decode())
+        return serialization.loads(plaintext)
+    
+    def package_files(self, customer_id, output_dir="encrypted_data"):
+        """Paths of the files generate_gemini_package writes for a customer"""
+        return {
+            "encrypted": f"{output_dir}/customer_{customer_id}_encrypted.json",
+            "instructions": f"{output_dir}/customer_{customer_id}_gemini_instructions.txt",
+            "prompt": f"{output_dir}/customer_{customer_id}_prompt.txt"
+        }
+    
+    def package_fingerprint(self, customer_data):
+        """
+        Fingerprint of everything a Gemini package depends on: the history, the
+        prompt version, the master key (or the fixed key) and the cipher/compression
+        settings. The per-package data key is random and deliberately left out.
+        """
+        if self.keyring:
+            key_id = self.keyring.active
+        else:
+            key_id = hashlib.sha256(self.key).hexdigest()[:16]
+        compress = self.stages.stage("compress")
+        return fingerprint(
+            customer_data['deposits'],
+            customer_data['purchases'],
+            "gemini-package", PROMPT_VERSION, customer_data['customer_id'], customer_data['customer_name'],
+            key_id, get_backend(self.cipher).method,
+            compress.enabled and (compress.codec, compress.level, compress.dictionary),
+            serialization.canonical(customer_data.get('accounts')),
+            transactions=[row for kind in ("withdrawals", "transfers", "bills") for row in customer_data.get(kind, [])]
+        )
+    
+    def package_unchanged(self, ctx):
+        """
+        UnchangedStage check: True when this history's package, instructions and
+        prompt were already generated, so encrypting and writing can be skipped
+        """
+        ctx['package_fingerprint'] = self.package_fingerprint(ctx['customer_data'])
+        paths = self.package_files(ctx['customer_id'], ctx['output_dir'])
+        if (self.package_cache.get(ctx['package_fingerprint']) is None
+                or not all(os.path.exists(path) for path in paths.values())):
+            return False
+        ctx['encrypted_package'] = serialization.load_file(paths['encrypted'])
+        ctx['files']['encrypted'] = paths['encrypted']
+        return True
     
-    def process_customer_by_id(self, customer_id, output_dir="encrypted_data"):
+    def process_customer_by_id(self, customer_id, output_dir="encrypted_data", reuse=False):
         """
         Complete pipeline: Fetch → Encrypt → Save (using customer ID)
+        With reuse=True an unchanged history keeps its existing encrypted package
+        (result['unchanged'] is True and nothing is re-encrypted or written).
         """
-        print(f"\n{'='*80}")
-        print(f"Processing Customer ID: {customer_id}")
-        print(f"{'='*80}\n")
+        log.info("Processing customer", customer_id=customer_id)
         
-        # 1. Fetch data
-        customer_data = self.fetch_customer_data_by_id(customer_id)
-        
-        # 2. Save raw JSON (for reference)
-        os.makedirs(output_dir, exist_ok=True)
-        raw_filename = f"{output_dir}/customer_{customer_id}_raw.json"
-        with open(raw_filename, 'w') as f:
-            json.dump(customer_data, f, indent=2)
-        print(f"💾 Raw data saved: {raw_filename}")
-        
-        # 3. Encrypt
-        print(f"🔒 Encrypting data...")
-        encrypted_package = self.aes_encrypt(customer_data)
-        
-        # 4. Save encrypted package
-        encrypted_filename = f"{output_dir}/customer_{customer_id}_encrypted.json"
-        with open(encrypted_filename, 'w') as f:
-            json.dump(encrypted_package, f, indent=2)
-        print(f"✅ Encrypted data saved: {encrypted_filename}")
-        
-        # 5. Test decryption
-        print(f"🔓 Testing decryption...")
-        decrypted = self.aes_decrypt(encrypted_package)
-        assert decrypted['customer_id'] == customer_data['customer_id']
-        print(f"✅ Decryption successful!")
+        # Fetch → enrich → (unchanged?) → serialize → (compress) → encrypt → write → verify
+        ctx = self.stages.run(new_context(customer_id, output_dir, reuse=reuse))
+        customer_data = ctx['customer_data']
         
         return {
             "customer_id": customer_id,
             "customer_name": customer_data['customer_name'],
             "customer_data": customer_data,
-            "encrypted_package": encrypted_package,
-            "raw_file": raw_filename,
-            "encrypted_file": encrypted_filename
+            "encrypted_package": ctx['encrypted_package'],
+            "raw_file": ctx['files'].get('raw'),
+            "encrypted_file": ctx['files']['encrypted'],
+            "unchanged": ctx.get('unchanged', False),
+            "package_fingerprint": ctx.get('package_fingerprint')
         }
     
     def generate_gemini_package(self, customer_id, output_dir="encrypted_data"):
         """
         Generate a complete package for Gemini with decryption instructions
         """
-        result = self.process_customer_by_id(customer_id, output_dir)
+        from prompt_compaction import compact_history
+        
+        # Unchanged histories stop before encryption and keep their existing files
+        result = self.process_customer_by_id(customer_id, output_dir, reuse=True)
+        if result['unchanged']:
+            log.info("⚡ Gemini package unchanged, keeping existing files", customer_id=customer_id)
+            return result
+        
+        customer_data = result['customer_data']
+        key = self.package_key(result['encrypted_package'])
+        key_b64 = base64.b64encode(key).decode()
+        backend = get_backend(result['encrypted_package']['encryption_method'])
+        decompress = decompress_instructions(result['encrypted_package'])
+        if decompress:
+            decompress = "\n" + decompress
+        
+        paths = self.package_files(customer_id, output_dir)
+        instructions_file = paths['instructions']
+        prompt_file = paths['prompt']
         
         # Create Gemini instruction file
         instructions = f"""
@@ -287,8 +466,8 @@ This package contains encrypted banking transaction data for financial abuse det
 **Customer Name**: {result['customer_name']} (for reference only)
 
 ### Decryption Details:
-- **Encryption Method**: AES-256-CBC
-- **Key (Base64)**: {base64.b64encode(self.key).decode()}
+- **Encryption Method**: {backend.method}
+- **Key (Base64)**: {key_b64}
 
 ### Encrypted Package:
 The encrypted data is in: {result['encrypted_file']}
@@ -304,28 +483,18 @@ The encrypted data is in: {result['encrypted_file']}
 ```python
 import json
 import base64
-from cryptography.hazmat.primitives.ciphers import Cipher, algorithms, modes
-from cryptography.hazmat.primitives import padding
-from cryptography.hazmat.backends import default_backend
+{backend.imports}
 
 # Load encrypted package
 with open('{result['encrypted_file']}', 'r') as f:
     encrypted_package = json.load(f)
 
 # Decryption key
-key = base64.b64decode("{base64.b64encode(self.key).decode()}")
+key = base64.b64decode("{key_b64}")
 
 # Decrypt
-encrypted_data = base64.b64decode(encrypted_package['encrypted_data'])
-iv = base64.b64decode(encrypted_package['iv'])
-
-cipher = Cipher(algorithms.AES(key), modes.CBC(iv), backend=default_backend())
-decryptor = cipher.decryptor()
-padded_data = decryptor.update(encrypted_data) + decryptor.finalize()
-
-unpadder = padding.PKCS7(128).unpadder()
-plaintext = unpadder.update(padded_data) + unpadder.finalize()
-
+{backend.snippet}
+{decompress}
 # Parse JSON
 data = json.loads(plaintext.decode())
 print(json.dumps(data, indent=2))
@@ -341,18 +510,17 @@ print(json.dumps(data, indent=2))
 Please analyze this customer's financial patterns for signs of abuse.
 """
         
-        instructions_file = f"{output_dir}/customer_{customer_id}_gemini_instructions.txt"
         with open(instructions_file, 'w') as f:
             f.write(instructions)
         
-        print(f"\n📋 Gemini instructions saved: {instructions_file}")
+        log.info("📋 Gemini instructions saved", customer_id=customer_id, path=instructions_file)
         
         # Also create a simple prompt
         prompt = f"""
 I have encrypted banking transaction data that I need you to analyze for signs of financial abuse.
 
 Customer ID: {customer_id}
-Encryption: AES-256-CBC
+Encryption: {backend.method}
 
 Please help me:
 1. Decrypt the attached data using the provided key
@@ -361,27 +529,38 @@ Please help me:
 4. Provide a risk level: LOW / MEDIUM / HIGH
 5. Explain your reasoning with specific evidence
 
+Transaction summary (decrypt the package only if you need row-level detail):
+{compact_history(customer_data)}
+
 The encrypted package and decryption key are in the attached file.
 """
         
-        prompt_file = f"{output_dir}/customer_{customer_id}_prompt.txt"
         with open(prompt_file, 'w') as f:
             f.write(prompt)
         
-        print(f"📝 Prompt saved: {prompt_file}")
+        log.info("📝 Prompt saved", customer_id=customer_id, path=prompt_file)
+        
+        self.package_cache.put(result['package_fingerprint'] or self.package_fingerprint(customer_data), {
+            "instructions": instructions_file,
+            "prompt": prompt_file
+        }, customer_id)
         
         return result
     
     def create_customer_mapping(self, output_dir="encrypted_data"):
         """
         Create a mapping file that shows which customer IDs correspond to which profiles
+        Uses the local customer directory (refreshed only if stale).
         """
-        customers = self.list_all_customers()
+        self.directory.ensure_fresh()
+        customers = self.directory.iter_all()
         
-        mapping = {
-            "encryption_key": base64.b64encode(self.key).decode(),
-            "customers": []
-        }
+        mapping = {"customers": []}
+        if self.keyring:
+            # Per-customer data keys live (wrapped) in each package header
+            mapping["master_key_id"] = self.keyring.active
+        else:
+            mapping["encryption_key"] = base64.b64encode(self.key).decode()
         
         for customer in customers:
             mapping["customers"].append({
@@ -398,50 +577,46 @@ The encrypted package and decryption key are in the attached file.
         
         os.makedirs(output_dir, exist_ok=True)
         mapping_file = f"{output_dir}/customer_mapping.json"
-        with open(mapping_file, 'w') as f:
-            json.dump(mapping, f, indent=2)
+        serialization.dump_file(mapping, mapping_file, pretty=True)
         
-        print(f"\n📋 Customer mapping saved: {mapping_file}")
+        log.info("📋 Customer mapping saved", path=mapping_file, customers=len(mapping["customers"]))
         return mapping
 
 
+@profiled("encryption")
 def main():
     """Main execution"""
-    print("="*80)
-    print("SECURE FINANCIAL ABUSE DETECTION - ID-BASED PIPELINE")
-    print("="*80)
-    
-    # Initialize pipeline
-    pipeline = SecureDataPipeline(API_KEY)
-    
-    # Save the encryption key
-    key_file = "encryption_key.txt"
-    with open(key_file, 'w') as f:
-        f.write(base64.b64encode(pipeline.key).decode())
-    print(f"🔑 Encryption key saved to: {key_file}\n")
+    log.info("="*80)
+    log.info("SECURE FINANCIAL ABUSE DETECTION - ID-BASED PIPELINE")
+    log.info("="*80)
     
-    # List all customers and get their IDs
-    customers = pipeline.list_all_customers()
+    # Initialize pipeline with envelope encryption (per-customer data keys)
+    keyring = MasterKeyring.load_or_create()
+    pipeline = SecureDataPipeline(API_KEY, keyring=keyring)
+    log.info("🔑 Master key in use", key_id=keyring.active)
     
-    if not customers:
-        print("No customers found! Please run generate_data.py first.")
-        return
-    
-    # Process all customers by ID
-    print("\n" + "="*80)
-    print("PROCESSING ALL CUSTOMERS")
-    print("="*80)
+    # Process all customers by ID, streamed from the customer directory
+    log.info("="*80)
+    log.info("PROCESSING ALL CUSTOMERS")
+    log.info("="*80)
     
-    results = {}
-    for customer in customers:
+    processed = 0
+    for customer in pipeline.iter_customers():
         customer_id = customer['customer_id']
+        processed += 1
         try:
-            result = pipeline.generate_gemini_package(customer_id)
-            results[customer_id] = result
+            pipeline.generate_gemini_package(customer_id)
         except Exception as e:
-            print(f"❌ Error processing customer {customer_id}: {e}")
+            log.error("❌ Error processing customer", customer_id=customer_id, error=str(e))
+    
+    if not processed:
+        log.warning("No customers found! Please run generate_data.py first.")
+        return
     
     mapping = pipeline.create_customer_mapping()
+    
+    log.info("Per-stage timings", customers=processed)
+    log.info(pipeline.stages.report())
   
 
 if __name__ == "__main__":
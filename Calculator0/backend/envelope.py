@@ -0,0 +1,247 @@
+"""
+Envelope encryption for customer packages
+Each package is encrypted with its own random 256-bit data key; the data key is
+wrapped by a master key and stored in the package header together with the master
+key id. The wrap is AES-256-GCM with the key id as associated data, so a header
+whose key_id was swapped fails to unwrap; 40-byte wraps from before that (AES key
+wrap, RFC 3394) still unwrap and are converted on rotation. Rotating the master key
+only re-wraps 60-byte wrapped keys instead of re-encrypting every customer history.
+
+Usage:
+    python envelope.py rotate [--dir encrypted_data] [--scan-dir other/packages ...] [--retire]
+
+--retire drops the old master keys only when no package in --dir or any
+--scan-dir still references one of them.
+"""
+
+import base64
+import glob
+import json
+import os
+import sys
+import threading
+import time
+
+from logger import get_logger
+import serialization
+
+KEYRING_FILE = "master_keys.json"
+DATA_KEY_CACHE_TTL = int(os.getenv("DATA_KEY_CACHE_TTL", "300"))
+DATA_KEY_CACHE_MAX = 10_000
+
+# Length of an RFC 3394 wrap of a 256-bit key (the format before key-id-bound wraps)
+KEY_WRAP_LEN = 40
+
+log = get_logger("envelope")
+
+
+def _new_key_id():
+    return f"mk-{time.strftime('%Y%m%d%H%M%S')}-{os.urandom(3).hex()}"
+
+
+def _wrap(master_key, key_id, data_key):
+    """nonce + AES-256-GCM(data_key), with the key id as associated data"""
+    from cryptography.hazmat.primitives.ciphers.aead import AESGCM
+
+    nonce = os.urandom(12)
+    return nonce + AESGCM(master_key).encrypt(nonce, data_key, key_id.encode())
+
+
+def _unwrap(master_key, key_id, wrapped):
+    if len(wrapped) == KEY_WRAP_LEN:
+        from cryptography.hazmat.primitives.keywrap import aes_key_unwrap
+        return aes_key_unwrap(master_key, wrapped)
+    from cryptography.hazmat.primitives.ciphers.aead import AESGCM
+    return AESGCM(master_key).decrypt(wrapped[:12], wrapped[12:], key_id.encode())
+
+
+class DataKeyCache:
+    """In-memory cache of unwrapped data keys with a TTL"""
+
+    def __init__(self, ttl=DATA_KEY_CACHE_TTL, max_entries=DATA_KEY_CACHE_MAX):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    def get(self, cache_key):
+        with self._lock:
+            entry = self._entries.get(cache_key)
+            if entry is None:
+                return None
+            data_key, expires = entry
+            if time.monotonic() > expires:
+                del self._entries[cache_key]
+                return None
+            return data_key
+
+    def put(self, cache_key, data_key):
+        with self._lock:
+            if len(self._entries) >= self.max_entries:
+                now = time.monotonic()
+                self._entries = {k: v for k, v in self._entries.items() if v[1] > now}
+                if len(self._entries) >= self.max_entries:
+                    self._entries.pop(next(iter(self._entries)))
+            self._entries[cache_key] = (data_key, time.monotonic() + self.ttl)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+class MasterKeyring:
+    """
+    Master keys by id plus the id used for new wraps
+    Persisted as {"active": key_id, "keys": {key_id: base64_key}}
+    """
+
+    def __init__(self, keys=None, active=None, cache=None):
+        self.keys = dict(keys or {})
+        self.active = active
+        self.cache = cache or DataKeyCache()
+        if not self.keys:
+            self.add_key()
+
+    @classmethod
+    def load(cls, path=KEYRING_FILE):
+        with open(path, 'r') as f:
+            data = json.load(f)
+        keys = {kid: base64.b64decode(k) for kid, k in data['keys'].items()}
+        return cls(keys, data['active'])
+
+    @classmethod
+    def load_or_create(cls, path=KEYRING_FILE):
+        if os.path.exists(path):
+            return cls.load(path)
+        keyring = cls()
+        keyring.save(path)
+        log.info("🔑 New master keyring created", path=path, key_id=keyring.active)
+        return keyring
+
+    def save(self, path=KEYRING_FILE):
+        data = {
+            "active": self.active,
+            "keys": {kid: base64.b64encode(k).decode() for kid, k in self.keys.items()}
+        }
+        tmp = f"{path}.tmp"
+        with open(tmp, 'w') as f:
+            json.dump(data, f, indent=2)
+        os.replace(tmp, path)
+
+    def add_key(self, key=None, make_active=True):
+        key_id = _new_key_id()
+        self.keys[key_id] = key or os.urandom(32)
+        if make_active or self.active is None:
+            self.active = key_id
+        return key_id
+
+    def new_data_key(self):
+        """
+        Fresh data key for one package
+        Returns: (data_key, key_id, wrapped_key_base64)
+        """
+        data_key = os.urandom(32)
+        wrapped = _wrap(self.keys[self.active], self.active, data_key)
+        return data_key, self.active, base64.b64encode(wrapped).decode()
+
+    def unwrap(self, key_id, wrapped_b64):
+        """Unwrap a data key, served from the TTL cache when possible"""
+        cache_key = (key_id, wrapped_b64)
+        data_key = self.cache.get(cache_key)
+        if data_key is None:
+            if key_id not in self.keys:
+                raise KeyError(f"Unknown master key id: {key_id}")
+            data_key = _unwrap(self.keys[key_id], key_id, base64.b64decode(wrapped_b64))
+            self.cache.put(cache_key, data_key)
+        return data_key
+
+    def rewrap(self, package):
+        """
+        Re-wrap a package's data key under the active master key (in place)
+        Returns: True if the package changed
+        """
+        if package.get('key_id') == self.active:
+            return False
+        data_key = self.unwrap(package['key_id'], package['wrapped_key'])
+        package['key_id'] = self.active
+        package['wrapped_key'] = base64.b64encode(_wrap(self.keys[self.active], self.active, data_key)).decode()
+        return True
+
+
+def _envelope_packages(directory):
+    """(path, package) for every envelope package in a directory"""
+    for path in sorted(glob.glob(os.path.join(directory, "*_encrypted.json"))):
+        package = serialization.load_file(path)
+        if 'wrapped_key' in package:
+            yield path, package
+
+
+def rotate_directory(keyring, directory="encrypted_data"):
+    """
+    Re-wrap every envelope package in `directory` under the active master key
+    Only the header changes; ciphertext is copied through untouched. A package
+    that cannot be re-wrapped (unknown or wrong master key) is logged and left as is.
+    Returns: number of packages re-wrapped
+    """
+    from cryptography.exceptions import InvalidTag
+    from cryptography.hazmat.primitives.keywrap import InvalidUnwrap
+
+    rewrapped = 0
+    for path, package in _envelope_packages(directory):
+        try:
+            if not keyring.rewrap(package):
+                continue
+        except (KeyError, InvalidTag, InvalidUnwrap) as e:
+            log.error("❌ Re-wrap failed", path=path, key_id=package.get('key_id'), error=repr(e))
+            continue
+        serialization.dump_file(package, path)
+        rewrapped += 1
+    return rewrapped
+
+
+def packages_using(key_ids, directories):
+    """Paths of envelope packages in `directories` whose key_id is one of `key_ids`"""
+    return [path for directory in directories for path, package in _envelope_packages(directory)
+            if package.get('key_id') in key_ids]
+
+
+def main(argv=None):
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Master key management for envelope-encrypted packages")
+    sub = parser.add_subparsers(dest="command", required=True)
+    rotate = sub.add_parser("rotate", help="add a new master key and re-wrap all packages under it")
+    rotate.add_argument("--dir", default="encrypted_data")
+    rotate.add_argument("--scan-dir", action="append", default=[],
+                        help="other package directory to check before --retire (repeatable)")
+    rotate.add_argument("--keyring", default=KEYRING_FILE)
+    rotate.add_argument("--retire", action="store_true", help="drop old master keys after re-wrapping")
+    args = parser.parse_args(argv)
+
+    keyring = MasterKeyring.load(args.keyring)
+    old_ids = set(keyring.keys)
+    new_id = keyring.add_key()
+    # Save before touching packages so a crash never leaves headers under an unknown key
+    keyring.save(args.keyring)
+
+    start = time.perf_counter()
+    count = rotate_directory(keyring, args.dir)
+    elapsed = time.perf_counter() - start
+    log.info("🔄 Re-wrapped packages", packages=count, seconds=round(elapsed, 2), key_id=new_id)
+
+    if args.retire:
+        # A package still under an old key could never be decrypted once it is gone
+        remaining = packages_using(old_ids, [args.dir, *args.scan_dir])
+        if remaining:
+            log.error("❌ Not retiring: packages still use old master keys", packages=len(remaining),
+                      first=remaining[0])
+            return 1
+        for key_id in old_ids:
+            del keyring.keys[key_id]
+        keyring.save(args.keyring)
+        log.info("🗑️  Retired old master keys", retired=len(old_ids))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -3,17 +3,23 @@ Financial Abuse Detection - Mock Data Generator
 Generates realistic banking data across 3 customer profiles showing different levels of financial abuse
 """
 
-import requests
-import json
 from datetime import datetime, timedelta
 import random
 import os
-from dotenv import load_dotenv
-
-load_dotenv()
+import config
+from logger import get_logger
+from profiling import profiled
+from customer_directory import CustomerDirectory
+from merchants import MERCHANTS
+import serialization
 
 BASE_URL = "http://api.nessieisreal.com"
-API_KEY = os.getenv("NESSIE_API_KEY")
+API_KEY = config.get("NESSIE_API_KEY")
+
+log = get_logger("generate_data")
+
+# Per-transaction creation is the highest-volume event; only log a sample of it
+TRANSACTION_LOG_SAMPLE = 0.05
 
 """
 Financial Abuse Detection - Mock Data Generator
@@ -32,6 +38,7 @@ class FinancialAbuseDataGenerator:
         """Helper method to make API requests"""
         url = f"{self.base_url}{endpoint}?key={self.api_key}"
         headers = {'Content-Type': 'application/json'}
+        import requests
         
         if method == "POST":
             response = requests.post(url, json=data, headers=headers)
@@ -48,8 +55,8 @@ class FinancialAbuseDataGenerator:
             "address": address
         }
         result = self._make_request("POST", "/customers", customer_data)
-        print(f"DEBUG - Create customer response: {result}")
-        print(f"Created customer: {first_name} {last_name}")
+        log.debug("Create customer response", response=result)
+        log.info("Created customer", name=f"{first_name} {last_name}")
         return result
     
     def create_account(self, customer_id, account_type, nickname, balance, rewards=0):
@@ -62,14 +69,17 @@ class FinancialAbuseDataGenerator:
         }
         result = self._make_request("POST", f"/customers/{customer_id}/accounts", account_data)
         
-        print(f"DEBUG - Account creation for customer {customer_id}")
-        print(f"DEBUG - Account data: {account_data}")
-        print(f"DEBUG - API Response: {result}")
+        log.debug(
+            "Account creation",
+            customer_id=customer_id,
+            account_data=account_data,
+            response=result
+        )
         
         if "objectCreated" in result:
-            print(f"✅ Created account: {nickname}")
+            log.info("✅ Created account", nickname=nickname)
         else:
-            print(f"❌ Failed to create account: {result}")
+            log.error("❌ Failed to create account", nickname=nickname, response=result)
         
         return result
     
@@ -82,7 +92,7 @@ class FinancialAbuseDataGenerator:
             "geocode": geocode
         }
         result = self._make_request("POST", "/merchants", merchant_data)
-        print(f"Created merchant: {name}")
+        log.info("Created merchant", name=name)
         return result
     
     def create_purchase(self, account_id, merchant_id, amount, purchase_date, description, status="executed", medium="balance"):
@@ -96,6 +106,13 @@ class FinancialAbuseDataGenerator:
             "description": description
         }
         result = self._make_request("POST", f"/accounts/{account_id}/purchases", purchase_data)
+        log.debug(
+            "Purchase created",
+            sample=TRANSACTION_LOG_SAMPLE,
+            account_id=account_id,
+            amount=amount,
+            date=purchase_date
+        )
         return result
     
     def create_deposit(self, account_id, amount, transaction_date, description, status="executed", medium="balance"):
@@ -108,158 +125,18 @@ class FinancialAbuseDataGenerator:
             "description": description
         }
         result = self._make_request("POST", f"/accounts/{account_id}/deposits", deposit_data)
+        log.debug(
+            "Deposit created",
+            sample=TRANSACTION_LOG_SAMPLE,
+            account_id=account_id,
+            amount=amount,
+            date=transaction_date
+        )
         return result
     
     def setup_merchants(self):
         """Create common merchants used across all scenarios"""
-        merchants_list = [
-            {
-                "name": "Whole Foods Market",
-                "category": "Groceries",
-                "address": {
-                    "street_number": "1000",
-                    "street_name": "Market St",
-                    "city": "San Francisco",
-                    "state": "CA",
-                    "zip": "94102"
-                },
-                "geocode": {"lat": 37.7749, "lng": -122.4194}
-            },
-            {
-                "name": "Target",
-                "category": "Retail",
-                "address": {
-                    "street_number": "2000",
-                    "street_name": "Mission St",
-                    "city": "San Francisco",
-                    "state": "CA",
-                    "zip": "94110"
-                },
-                "geocode": {"lat": 37.7599, "lng": -122.4148}
-            },
-            {
-                "name": "Walgreens Pharmacy",
-                "category": "Pharmacy",
-                "address": {
-                    "street_number": "500",
-                    "street_name": "Powell St",
-                    "city": "San Francisco",
-                    "state": "CA",
-                    "zip": "94102"
-                },
-                "geocode": {"lat": 37.7867, "lng": -122.4088}
-            },
-            {
-                "name": "Starbucks",
-                "category": "Coffee",
-                "address": {
-                    "street_number": "300",
-                    "street_name": "Main St",
-                    "city": "San Francisco",
-                    "state": "CA",
-                    "zip": "94105"
-                },
-                "geocode": {"lat": 37.7908, "lng": -122.3954}
-            },
-            {
-                "name": "CVS Pharmacy",
-                "category": "Pharmacy",
-                "address": {
-                    "street_number": "700",
-                    "street_name": "Geary St",
-                    "city": "San Francisco",
-                    "state": "CA",
-                    "zip": "94109"
-                },
-                "geocode": {"lat": 37.7858, "lng": -122.4134}
-            },
-            {
-                "name": "Safeway",
-                "category": "Groceries",
-                "address": {
-                    "street_number": "1200",
-                    "street_name": "Webster St",
-                    "city": "San Francisco",
-                    "state": "CA",
-                    "zip": "94115"
-                },
-                "geocode": {"lat": 37.7833, "lng": -122.4324}
-            },
-            {
-                "name": "AMC Movie Theater",
-                "category": "Entertainment",
-                "address": {
-                    "street_number": "1000",
-                    "street_name": "Van Ness Ave",
-                    "city": "San Francisco",
-                    "state": "CA",
-                    "zip": "94109"
-                },
-                "geocode": {"lat": 37.7858, "lng": -122.4229}
-            },
-            {
-                "name": "Planet Fitness",
-                "category": "Fitness",
-                "address": {
-                    "street_number": "850",
-                    "street_name": "Bryant St",
-                    "city": "San Francisco",
-                    "state": "CA",
-                    "zip": "94103"
-                },
-                "geocode": {"lat": 37.7716, "lng": -122.4030}
-            },
-            {
-                "name": "Chipotle",
-                "category": "Restaurant",
-                "address": {
-                    "street_number": "450",
-                    "street_name": "Castro St",
-                    "city": "San Francisco",
-                    "state": "CA",
-                    "zip": "94114"
-                },
-                "geocode": {"lat": 37.7609, "lng": -122.4350}
-            },
-            {
-                "name": "Uber",
-                "category": "Transportation",
-                "address": {
-                    "street_number": "1455",
-                    "street_name": "Market St",
-                    "city": "San Francisco",
-                    "state": "CA",
-                    "zip": "94103"
-                },
-                "geocode": {"lat": 37.7752, "lng": -122.4175}
-            },
-            {
-                "name": "Sephora",
-                "category": "Beauty",
-                "address": {
-                    "street_number": "33",
-                    "street_name": "Powell St",
-                    "city": "San Francisco",
-                    "state": "CA",
-                    "zip": "94102"
-                },
-                "geocode": {"lat": 37.7866, "lng": -122.4084}
-            },
-            {
-                "name": "Gap",
-                "category": "Clothing",
-                "address": {
-                    "street_number": "890",
-                    "street_name": "Market St",
-                    "city": "San Francisco",
-                    "state": "CA",
-                    "zip": "94102"
-                },
-                "geocode": {"lat": 37.7833, "lng": -122.4066}
-            }
-        ]
-        
-        for merchant in merchants_list:
+        for merchant in MERCHANTS:
             result = self.create_merchant(
                 merchant["name"],
                 merchant["category"],
@@ -273,7 +150,7 @@ class FinancialAbuseDataGenerator:
     
     def generate_customer_1_no_abuse(self, customer_id, account_id):
         """Customer 1: Sarah Johnson - No Financial Abuse"""
-        print("\n=== Generating Customer 1: No Abuse (Sarah Johnson) ===")
+        log.info("=== Generating Customer 1: No Abuse (Sarah Johnson) ===")
         
         start_date = datetime.now() - timedelta(days=180)
         current_date = start_date
@@ -374,11 +251,11 @@ class FinancialAbuseDataGenerator:
                     purchase["description"]
                 )
         
-        print(f"Created {len(deposits)} deposits and {len(purchases)} purchases for Customer 1")
+        log.info("Created transactions", customer=1, deposits=len(deposits), purchases=len(purchases))
     
     def generate_customer_2_moderate_abuse(self, customer_id, account_id):
         """Customer 2: Maria Rodriguez - Moderate Financial Abuse"""
-        print("\n=== Generating Customer 2: Moderate Abuse (Maria Rodriguez) ===")
+        log.info("=== Generating Customer 2: Moderate Abuse (Maria Rodriguez) ===")
         
         start_date = datetime.now() - timedelta(days=180)
         deposits = []
@@ -510,11 +387,11 @@ class FinancialAbuseDataGenerator:
                     purchase["description"]
                 )
         
-        print(f"Created {len(deposits)} deposits and {len(purchases)} purchases for Customer 2")
+        log.info("Created transactions", customer=2, deposits=len(deposits), purchases=len(purchases))
     
     def generate_customer_3_severe_abuse(self, customer_id, account_id):
         """Customer 3: Jennifer Lee - Severe Financial Abuse"""
-        print("\n=== Generating Customer 3: Severe Abuse (Jennifer Lee) ===")
+        log.info("=== Generating Customer 3: Severe Abuse (Jennifer Lee) ===")
         
         start_date = datetime.now() - timedelta(days=180)
         deposits = []
@@ -604,11 +481,11 @@ class FinancialAbuseDataGenerator:
                     purchase["description"]
                 )
         
-        print(f"Created {len(deposits)} deposits and {len(purchases)} purchases for Customer 3")
+        log.info("Created transactions", customer=3, deposits=len(deposits), purchases=len(purchases))
     
     def generate_customer_4_recovery_pattern(self, customer_id, account_id):
         """Customer 4: Michael Thompson - Recovery Pattern"""
-        print("\n=== Generating Customer 4: Recovery Pattern (Michael Thompson) ===")
+        log.info("=== Generating Customer 4: Recovery Pattern (Michael Thompson) ===")
         
         start_date = datetime.now() - timedelta(days=180)
         deposits = []
@@ -683,11 +560,11 @@ class FinancialAbuseDataGenerator:
                     purchase["description"]
                 )
         
-        print(f"Created {len(deposits)} deposits and {len(purchases)} purchases for Customer 4")
+        log.info("Created transactions", customer=4, deposits=len(deposits), purchases=len(purchases))
     
     def generate_customer_5_sudden_abuse(self, customer_id, account_id):
         """Customer 5: David Park - Sudden Onset Abuse"""
-        print("\n=== Generating Customer 5: Sudden Abuse (David Park) ===")
+        log.info("=== Generating Customer 5: Sudden Abuse (David Park) ===")
         
         start_date = datetime.now() - timedelta(days=180)
         deposits = []
@@ -761,28 +638,29 @@ class FinancialAbuseDataGenerator:
                     purchase["description"]
                 )
         
-        print(f"Created {len(deposits)} deposits and {len(purchases)} purchases for Customer 5")
+        log.info("Created transactions", customer=5, deposits=len(deposits), purchases=len(purchases))
 
 
+@profiled("generate_data")
 def main():
     """Main execution function"""
     
     generator = FinancialAbuseDataGenerator(API_KEY)
     
-    print("=" * 80)
-    print("FINANCIAL ABUSE DETECTION - MOCK DATA GENERATOR")
-    print("=" * 80)
+    log.info("=" * 80)
+    log.info("FINANCIAL ABUSE DETECTION - MOCK DATA GENERATOR")
+    log.info("=" * 80)
     
     # Step 1: Create merchants
-    print("\n=== STEP 1: Creating Merchants ===")
+    log.info("=== STEP 1: Creating Merchants ===")
     merchants = generator.setup_merchants()
-    print(f"Created {len(merchants)} merchants")
+    log.info("Created merchants", count=len(merchants))
     
     # Track all customer IDs
     customer_data = {"customers": []}
     
     # Step 2: Create Customer 1 - No Abuse
-    print("\n=== STEP 2: Creating Customer 1 - No Financial Abuse ===")
+    log.info("=== STEP 2: Creating Customer 1 - No Financial Abuse ===")
     customer1 = generator.create_customer(
         "Sarah",
         "Johnson",
@@ -815,12 +693,12 @@ def main():
                 "expected_risk": "LOW"
             })
         else:
-            print(f"❌ Account creation failed for Customer 1")
+            log.error("❌ Account creation failed for Customer 1")
     else:
-        print(f"❌ Customer creation failed for Customer 1")
+        log.error("❌ Customer creation failed for Customer 1")
     
     # Step 3: Create Customer 2 - Moderate Abuse
-    print("\n=== STEP 3: Creating Customer 2 - Moderate Financial Abuse ===")
+    log.info("=== STEP 3: Creating Customer 2 - Moderate Financial Abuse ===")
     customer2 = generator.create_customer(
         "Maria",
         "Rodriguez",
@@ -853,12 +731,12 @@ def main():
                 "expected_risk": "MEDIUM-HIGH"
             })
         else:
-            print(f"❌ Account creation failed for Customer 2")
+            log.error("❌ Account creation failed for Customer 2")
     else:
-        print(f"❌ Customer creation failed for Customer 2")
+        log.error("❌ Customer creation failed for Customer 2")
     
     # Step 4: Create Customer 3 - Severe Abuse
-    print("\n=== STEP 4: Creating Customer 3 - Severe Financial Abuse ===")
+    log.info("=== STEP 4: Creating Customer 3 - Severe Financial Abuse ===")
     customer3 = generator.create_customer(
         "Jennifer",
         "Lee",
@@ -891,12 +769,12 @@ def main():
                 "expected_risk": "HIGH"
             })
         else:
-            print(f"❌ Account creation failed for Customer 3")
+            log.error("❌ Account creation failed for Customer 3")
     else:
-        print(f"❌ Customer creation failed for Customer 3")
+        log.error("❌ Customer creation failed for Customer 3")
     
     # Step 5: Create Customer 4 - Recovery Pattern
-    print("\n=== STEP 5: Creating Customer 4 - Recovery Pattern ===")
+    log.info("=== STEP 5: Creating Customer 4 - Recovery Pattern ===")
     customer4 = generator.create_customer(
         "Michael",
         "Thompson",
@@ -929,12 +807,12 @@ def main():
                 "expected_risk": "MEDIUM (improving)"
             })
         else:
-            print(f"❌ Account creation failed for Customer 4")
+            log.error("❌ Account creation failed for Customer 4")
     else:
-        print(f"❌ Customer creation failed for Customer 4")
+        log.error("❌ Customer creation failed for Customer 4")
     
     # Step 6: Create Customer 5 - Sudden Abuse
-    print("\n=== STEP 6: Creating Customer 5 - Sudden Onset Abuse ===")
+    log.info("=== STEP 6: Creating Customer 5 - Sudden Onset Abuse ===")
     customer5 = generator.create_customer(
         "David",
         "Park",
@@ -967,28 +845,32 @@ def main():
                 "expected_risk": "HIGH"
             })
         else:
-            print(f"❌ Account creation failed for Customer 5")
+            log.error("❌ Account creation failed for Customer 5")
     else:
-        print(f"❌ Customer creation failed for Customer 5")
+        log.error("❌ Customer creation failed for Customer 5")
     
-    print("\n" + "=" * 80)
-    print("DATA GENERATION COMPLETE!")
-    print("=" * 80)
+    log.info("=" * 80)
+    log.info("DATA GENERATION COMPLETE!")
+    log.info("=" * 80)
     
     # Save customer IDs
-    with open("customer_ids.json", "w") as f:
-        json.dump(customer_data, f, indent=2)
+    serialization.dump_file(customer_data, "customer_ids.json", pretty=True)
     
-    print("\n💾 CUSTOMER IDs SAVED TO: customer_ids.json")
-    print("\nCUSTOMER ID REFERENCE:")
+    log.info("💾 CUSTOMER IDs SAVED TO: customer_ids.json")
+    
+    # Pick up the new customers in the local directory so lookups don't need a full listing
+    CustomerDirectory(fetch=lambda endpoint: generator._make_request("GET", endpoint)).refresh()
+    log.info("CUSTOMER ID REFERENCE:")
     for customer in customer_data["customers"]:
         if customer["customer_id"]:
-            print(f"\n  {customer['name']}:")
-            print(f"    ID: {customer['customer_id']}")
-            print(f"    Profile: {customer['profile']}")
-            print(f"    Expected Risk: {customer['expected_risk']}")
+            log.info(
+                f"  {customer['name']}",
+                customer_id=customer['customer_id'],
+                profile=customer['profile'],
+                expected_risk=customer['expected_risk']
+            )
     
-    print("\n" + "=" * 80)
+    log.info("=" * 80)
 
 
 if __name__ == "__main__":
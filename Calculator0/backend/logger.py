@@ -0,0 +1,171 @@
+"""
+Non-blocking structured logging for the backend
+Log calls put a record on a bounded queue and return; one background thread
+formats and writes it, so request handlers and batch loops never block on stdout
+"""
+
+import atexit
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import random
+import sys
+import threading
+
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
+LOG_FORMAT = os.getenv("LOG_FORMAT", "text")  # "text" or "json"
+LOG_QUEUE_SIZE = int(os.getenv("LOG_QUEUE_SIZE", "10000"))
+
+ROOT_LOGGER_NAME = "calculator0"
+
+_queue = None
+_handler = None
+_listener = None
+_start_lock = threading.Lock()
+
+
+class DroppingQueueHandler(logging.handlers.QueueHandler):
+    """QueueHandler that drops records instead of blocking when the queue is full"""
+
+    def __init__(self, log_queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record):
+        # Formatting happens on the listener thread, not in the caller
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+class StructuredFormatter(logging.Formatter):
+    """
+    Render a record and its structured fields
+    text: "message key=value ..." (matches the old print() output)
+    json: one JSON object per line
+    """
+
+    def __init__(self, fmt="text"):
+        super().__init__()
+        self.fmt = fmt
+
+    def format(self, record):
+        message = record.getMessage()
+        fields = getattr(record, "fields", None) or {}
+
+        if self.fmt == "json":
+            entry = {
+                "ts": self.formatTime(record, "%Y-%m-%dT%H:%M:%S"),
+                "level": record.levelname,
+                "logger": record.name,
+                "msg": message,
+            }
+            entry.update(fields)
+            if record.exc_info:
+                entry["exc"] = self.formatException(record.exc_info)
+            return json.dumps(entry, default=str)
+
+        if fields:
+            message = f"{message}  " + " ".join(f"{k}={v}" for k, v in fields.items())
+        if record.exc_info:
+            message = f"{message}\n{self.formatException(record.exc_info)}"
+        return message
+
+
+class StructuredLogger:
+    """
+    Thin wrapper around logging.Logger that takes structured fields and a sample rate
+
+    Usage:
+        log = get_logger("app")
+        log.info("✅ User created", user_id=uid)
+        log.debug("Purchase created", sample=0.01, amount=12.5)
+    """
+
+    def __init__(self, logger):
+        self._logger = logger
+
+    def _log(self, level, msg, sample=None, exc_info=False, **fields):
+        if not self._logger.isEnabledFor(level):
+            return
+        if sample is not None and random.random() >= sample:
+            return
+        if sample is not None:
+            fields["sample"] = sample
+        self._logger.log(level, msg, exc_info=exc_info, extra={"fields": fields})
+
+    def debug(self, msg, sample=None, **fields):
+        self._log(logging.DEBUG, msg, sample, **fields)
+
+    def info(self, msg, sample=None, **fields):
+        self._log(logging.INFO, msg, sample, **fields)
+
+    def warning(self, msg, sample=None, **fields):
+        self._log(logging.WARNING, msg, sample, **fields)
+
+    def error(self, msg, sample=None, **fields):
+        self._log(logging.ERROR, msg, sample, **fields)
+
+    def exception(self, msg, **fields):
+        self._log(logging.ERROR, msg, exc_info=True, **fields)
+
+    def is_enabled(self, level):
+        return self._logger.isEnabledFor(level)
+
+
+def _start():
+    """Wire the root backend logger to the queue and start the writer thread (once)"""
+    global _queue, _handler, _listener
+
+    with _start_lock:
+        if _listener is not None:
+            return
+
+        _queue = queue.Queue(maxsize=LOG_QUEUE_SIZE)
+        _handler = DroppingQueueHandler(_queue)
+
+        output = logging.StreamHandler(sys.stdout)
+        output.setFormatter(StructuredFormatter(LOG_FORMAT))
+
+        root = logging.getLogger(ROOT_LOGGER_NAME)
+        root.setLevel(LOG_LEVEL)
+        root.addHandler(_handler)
+        root.propagate = False
+
+        _listener = logging.handlers.QueueListener(_queue, output)
+        _listener.start()
+        atexit.register(shutdown)
+
+
+def get_logger(name):
+    """Get a structured logger for a backend module"""
+    _start()
+    return StructuredLogger(logging.getLogger(f"{ROOT_LOGGER_NAME}.{name}"))
+
+
+def flush():
+    """Block until every queued record has been written"""
+    if _queue is not None:
+        _queue.join()
+
+
+def dropped_count():
+    """Number of records dropped because the queue was full"""
+    return _handler.dropped if _handler is not None else 0
+
+
+def shutdown():
+    """Drain the queue and stop the writer thread"""
+    global _listener
+    with _start_lock:
+        if _listener is None:
+            return
+        _listener.stop()
+        _listener = None
+        logging.getLogger(ROOT_LOGGER_NAME).removeHandler(_handler)
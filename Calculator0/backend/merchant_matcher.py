@@ -0,0 +1,259 @@
+"""
+Merchant matching for raw transaction descriptions
+Bank statements carry descriptors like "STARBUCKS STORE #5678" or "UBER *TRIP" and
+their own category labels ("Coffee Shops"); Nessie purchases carry merchant_name /
+merchant_category ("Starbucks" / "Coffee"). Both are mapped onto the same canonical
+merchant and category codes from merchants.py.
+
+Every merchant name and alias is compiled once into an Aho-Corasick automaton
+(expanded to a full transition table), so a description is matched against all
+patterns in a single pass over its characters. Patterns only match whole words,
+and the longest match wins. Results are cached per raw description, since the
+same descriptors repeat across millions of rows.
+
+    matcher = get_matcher()
+    matcher.match("STARBUCKS STORE #5678")     # Match('STARBUCKS', 'Starbucks', 'COFFEE', 'STARBUCKS')
+    matcher.tag(purchase)                      # adds merchant_code / category_code in place
+
+    python merchant_matcher.py customers/example1.csv
+"""
+
+import argparse
+import csv
+import json
+import os
+import sys
+from collections import Counter, namedtuple
+
+from merchants import ALIASES, CATEGORIES, MERCHANT_CATEGORIES, MERCHANTS
+
+# Distinct raw descriptions remembered by each matcher
+MATCH_CACHE_SIZE = int(os.getenv("MATCH_CACHE_SIZE", "100000"))
+
+UNKNOWN_CATEGORY = "OTHER"
+
+Match = namedtuple("Match", ["merchant_code", "merchant_name", "category_code", "pattern"])
+
+# Digits, punctuation and store numbers become spaces
+_NORMALIZE = {c: " " for c in range(128) if not chr(c).isalpha()}
+
+
+def normalize(text):
+    """'UBER *TRIP 4411' -> 'UBER TRIP'"""
+    return " ".join((text or "").upper().translate(_NORMALIZE).split())
+
+
+def merchant_code(name):
+    """'Whole Foods Market' -> 'WHOLE_FOODS_MARKET'"""
+    return normalize(name).replace(" ", "_")
+
+
+def category_lookup(categories=CATEGORIES):
+    """{normalized source label: category code}, including each code itself"""
+    lookup = {}
+    for code, entry in categories.items():
+        lookup[normalize(code)] = code
+        lookup[normalize(entry["label"])] = code
+        for synonym in entry["synonyms"]:
+            lookup[normalize(synonym)] = code
+    return lookup
+
+# ============================================================================
+# AUTOMATON
+# ============================================================================
+
+def build_automaton(patterns):
+    """
+    Aho-Corasick automaton as a full transition table
+    Args:
+        patterns: list of strings
+    Returns:
+        (delta, out): delta[state][char] -> next state (missing chars go to the
+        root), out[state] -> index of the longest pattern ending at state, or None
+    """
+    goto = [{}]
+    out = [None]
+    for index, pattern in enumerate(patterns):
+        state = 0
+        for char in pattern:
+            if char not in goto[state]:
+                goto.append({})
+                out.append(None)
+                goto[state][char] = len(goto) - 1
+            state = goto[state][char]
+        if out[state] is None:
+            out[state] = index
+
+    # Breadth-first so every state's failure target is finished before it is used.
+    # A state's own pattern is always longer than anything on its failure chain.
+    fail = [0] * len(goto)
+    delta = [None] * len(goto)
+    delta[0] = dict(goto[0])
+    queue = list(goto[0].values())
+    for state in queue:
+        delta[state] = dict(delta[fail[state]])
+        for char, child in goto[state].items():
+            fail[child] = delta[fail[state]].get(char, 0) if state else 0
+            delta[state][char] = child
+            queue.append(child)
+        if out[state] is None:
+            out[state] = out[fail[state]]
+    return delta, out
+
+
+class MerchantMatcher:
+    """
+    Maps descriptions and category labels to canonical codes
+    Args:
+        merchants: catalog entries with "name" and "category"
+        aliases: (pattern, merchant name or None, category code or None)
+        merchant_categories: {merchant name: category code}
+        categories: taxonomy {code: {"label", "synonyms"}}
+        cache_size: distinct descriptions to remember (0 disables the cache)
+    """
+
+    def __init__(self, merchants=MERCHANTS, aliases=ALIASES, merchant_categories=MERCHANT_CATEGORIES,
+                 categories=CATEGORIES, cache_size=MATCH_CACHE_SIZE):
+        self.categories = categories
+        self.category_codes = category_lookup(categories)
+        self.cache_size = cache_size
+        self._cache = {}
+
+        targets = {}  # normalized pattern -> Match
+        for merchant in merchants:
+            name = merchant["name"]
+            category = merchant_categories.get(name) or self.canonical_category(merchant.get("category"))
+            pattern = normalize(name)
+            targets[pattern] = Match(merchant_code(name), name, category, pattern)
+        names = {merchant["name"]: targets[normalize(merchant["name"])] for merchant in merchants}
+        for pattern, name, category in aliases:
+            pattern = normalize(pattern)
+            if name is not None and name not in names:
+                raise ValueError(f"Alias {pattern!r} refers to unknown merchant {name!r}")
+            if category is not None and category not in categories:
+                raise ValueError(f"Alias {pattern!r} refers to unknown category {category!r}")
+            merchant = names.get(name)
+            targets[pattern] = Match(
+                merchant.merchant_code if merchant else None,
+                merchant.merchant_name if merchant else None,
+                category or merchant.category_code,
+                pattern,
+            )
+
+        # Padding with spaces on both sides makes every pattern match whole words only
+        self.patterns = list(targets)
+        self.matches = [targets[pattern] for pattern in self.patterns]
+        self.delta, self.out = build_automaton([f" {pattern} " for pattern in self.patterns])
+
+    def canonical_category(self, label):
+        """Category code for a source label ('Coffee Shops' -> 'COFFEE'), or None"""
+        if not label:
+            return None
+        return self.category_codes.get(normalize(label))
+
+    def find(self, text):
+        """Longest catalog pattern in text (leftmost on ties), or None"""
+        delta = self.delta
+        out = self.out
+        patterns = self.patterns
+        state = 0
+        best = None
+        best_len = 0
+        for char in f" {normalize(text)} ":
+            state = delta[state].get(char, 0)
+            index = out[state]
+            if index is not None and len(patterns[index]) > best_len:
+                best = index
+                best_len = len(patterns[index])
+        return self.matches[best] if best is not None else None
+
+    def match(self, description, category=None):
+        """
+        Canonical merchant and category for one description
+        Args:
+            description: raw descriptor or merchant name
+            category: the source's own category label, used when no pattern matches
+        Returns:
+            Match; merchant fields are None when no merchant was recognised
+        """
+        key = (description, category)
+        found = self._cache.get(key)
+        if found is not None:
+            return found
+
+        found = self.find(description)
+        if found is None:
+            found = Match(None, None, self.canonical_category(category) or UNKNOWN_CATEGORY, None)
+
+        if self.cache_size:
+            if len(self._cache) >= self.cache_size:
+                self._cache.clear()
+            self._cache[key] = found
+        return found
+
+    def tag(self, row):
+        """
+        Add merchant_code and category_code to a transaction dict in place
+        Reads merchant_name / merchant_category / description (Nessie) or
+        Description / Category (bank CSV). Returns the row.
+        """
+        category = row.get('merchant_category') or row.get('Category')
+        found = None
+        if row.get('merchant_name'):
+            found = self.match(row['merchant_name'], category)
+        if found is None or found.merchant_code is None:
+            found = self.match(row.get('description') or row.get('Description'), category)
+        row['merchant_code'] = found.merchant_code
+        row['category_code'] = found.category_code
+        return row
+
+    def tag_all(self, rows):
+        for row in rows:
+            self.tag(row)
+        return rows
+
+
+_matcher = None
+
+
+def get_matcher():
+    """Process-wide matcher, compiled on first use"""
+    global _matcher
+    if _matcher is None:
+        _matcher = MerchantMatcher()
+    return _matcher
+
+# ============================================================================
+# BANK CSV EXPORTS
+# ============================================================================
+
+def read_bank_csv(path):
+    """Rows of a card/bank CSV export (Transaction Date, Description, Category, Debit, Credit ...)"""
+    with open(path, newline='') as f:
+        yield from csv.DictReader(f)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Map bank CSV descriptions to canonical merchants and categories")
+    parser.add_argument("csv", help="bank export, e.g. customers/example1.csv")
+    parser.add_argument("--json", action="store_true", help="write the tagged rows as JSON")
+    args = parser.parse_args(argv)
+
+    matcher = get_matcher()
+    rows = matcher.tag_all(list(read_bank_csv(args.csv)))
+    if args.json:
+        json.dump(rows, sys.stdout, indent=2)
+        sys.stdout.write("\n")
+        return 0
+
+    counts = Counter((row['Description'], row['Category'], row['merchant_code'], row['category_code']) for row in rows)
+    print(f"{'description':<32} {'source category':<18} {'merchant':<20} {'category':<14} rows")
+    for (description, source, merchant, category), count in sorted(counts.items()):
+        print(f"{description:<32} {source:<18} {merchant or '-':<20} {category:<14} {count}")
+    unmatched = sum(count for key, count in counts.items() if key[3] == UNKNOWN_CATEGORY)
+    print(f"\n✅ {len(rows)} rows, {len(counts)} distinct descriptors, {unmatched} rows uncategorised")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,213 @@
+"""
+Merchant catalog and category taxonomy
+MERCHANTS is the merchant list generate_data.py creates in Nessie. CATEGORIES is the
+canonical category taxonomy: each code lists the labels different sources use for
+it (Nessie merchant categories, bank CSV categories). ALIASES are descriptor
+fragments seen on bank statements that name a merchant or, for non-merchant lines
+such as payroll, only a category.
+
+merchant_matcher.py compiles all three into one automaton.
+"""
+
+MERCHANTS = [
+    {
+        "name": "Whole Foods Market",
+        "category": "Groceries",
+        "address": {
+            "street_number": "1000",
+            "street_name": "Market St",
+            "city": "San Francisco",
+            "state": "CA",
+            "zip": "94102"
+        },
+        "geocode": {"lat": 37.7749, "lng": -122.4194}
+    },
+    {
+        "name": "Target",
+        "category": "Retail",
+        "address": {
+            "street_number": "2000",
+            "street_name": "Mission St",
+            "city": "San Francisco",
+            "state": "CA",
+            "zip": "94110"
+        },
+        "geocode": {"lat": 37.7599, "lng": -122.4148}
+    },
+    {
+        "name": "Walgreens Pharmacy",
+        "category": "Pharmacy",
+        "address": {
+            "street_number": "500",
+            "street_name": "Powell St",
+            "city": "San Francisco",
+            "state": "CA",
+            "zip": "94102"
+        },
+        "geocode": {"lat": 37.7867, "lng": -122.4088}
+    },
+    {
+        "name": "Starbucks",
+        "category": "Coffee",
+        "address": {
+            "street_number": "300",
+            "street_name": "Main St",
+            "city": "San Francisco",
+            "state": "CA",
+            "zip": "94105"
+        },
+        "geocode": {"lat": 37.7908, "lng": -122.3954}
+    },
+    {
+        "name": "CVS Pharmacy",
+        "category": "Pharmacy",
+        "address": {
+            "street_number": "700",
+            "street_name": "Geary St",
+            "city": "San Francisco",
+            "state": "CA",
+            "zip": "94109"
+        },
+        "geocode": {"lat": 37.7858, "lng": -122.4134}
+    },
+    {
+        "name": "Safeway",
+        "category": "Groceries",
+        "address": {
+            "street_number": "1200",
+            "street_name": "Webster St",
+            "city": "San Francisco",
+            "state": "CA",
+            "zip": "94115"
+        },
+        "geocode": {"lat": 37.7833, "lng": -122.4324}
+    },
+    {
+        "name": "AMC Movie Theater",
+        "category": "Entertainment",
+        "address": {
+            "street_number": "1000",
+            "street_name": "Van Ness Ave",
+            "city": "San Francisco",
+            "state": "CA",
+            "zip": "94109"
+        },
+        "geocode": {"lat": 37.7858, "lng": -122.4229}
+    },
+    {
+        "name": "Planet Fitness",
+        "category": "Fitness",
+        "address": {
+            "street_number": "850",
+            "street_name": "Bryant St",
+            "city": "San Francisco",
+            "state": "CA",
+            "zip": "94103"
+        },
+        "geocode": {"lat": 37.7716, "lng": -122.4030}
+    },
+    {
+        "name": "Chipotle",
+        "category": "Restaurant",
+        "address": {
+            "street_number": "450",
+            "street_name": "Castro St",
+            "city": "San Francisco",
+            "state": "CA",
+            "zip": "94114"
+        },
+        "geocode": {"lat": 37.7609, "lng": -122.4350}
+    },
+    {
+        "name": "Uber",
+        "category": "Transportation",
+        "address": {
+            "street_number": "1455",
+            "street_name": "Market St",
+            "city": "San Francisco",
+            "state": "CA",
+            "zip": "94103"
+        },
+        "geocode": {"lat": 37.7752, "lng": -122.4175}
+    },
+    {
+        "name": "Sephora",
+        "category": "Beauty",
+        "address": {
+            "street_number": "33",
+            "street_name": "Powell St",
+            "city": "San Francisco",
+            "state": "CA",
+            "zip": "94102"
+        },
+        "geocode": {"lat": 37.7866, "lng": -122.4084}
+    },
+    {
+        "name": "Gap",
+        "category": "Clothing",
+        "address": {
+            "street_number": "890",
+            "street_name": "Market St",
+            "city": "San Francisco",
+            "state": "CA",
+            "zip": "94102"
+        },
+        "geocode": {"lat": 37.7833, "lng": -122.4066}
+    }
+]
+
+# code -> display label and the source labels that mean the same thing
+CATEGORIES = {
+    "GROCERIES": {"label": "Groceries", "synonyms": ["Groceries", "Grocery", "Supermarkets"]},
+    "RETAIL": {"label": "Retail", "synonyms": ["Retail", "Shopping", "General Merchandise"]},
+    "CLOTHING": {"label": "Clothing", "synonyms": ["Clothing", "Apparel"]},
+    "PHARMACY": {"label": "Pharmacy", "synonyms": ["Pharmacy", "Drugstores"]},
+    "COFFEE": {"label": "Coffee", "synonyms": ["Coffee", "Coffee Shops", "Cafes"]},
+    "RESTAURANTS": {"label": "Restaurants", "synonyms": ["Restaurant", "Restaurants", "Dining", "Fast Food"]},
+    "ENTERTAINMENT": {"label": "Entertainment", "synonyms": ["Entertainment", "Movies"]},
+    "FITNESS": {"label": "Health & Fitness", "synonyms": ["Fitness", "Health & Fitness", "Gym"]},
+    "PERSONAL_CARE": {"label": "Personal Care", "synonyms": ["Beauty", "Personal Care"]},
+    "TRANSPORTATION": {"label": "Transportation", "synonyms": ["Transportation", "Rideshare", "Travel"]},
+    "INCOME": {"label": "Income", "synonyms": ["Income", "Payroll", "Deposit"]},
+    "TRANSFER": {"label": "Transfer", "synonyms": ["Transfer", "Transfers"]},
+    "OTHER": {"label": "Other", "synonyms": ["Other", "Unknown", "Misc"]},
+}
+
+# Category for each catalog merchant (overrides the label it was created with)
+MERCHANT_CATEGORIES = {
+    "Whole Foods Market": "GROCERIES",
+    "Target": "RETAIL",
+    "Walgreens Pharmacy": "PHARMACY",
+    "Starbucks": "COFFEE",
+    "CVS Pharmacy": "PHARMACY",
+    "Safeway": "GROCERIES",
+    "AMC Movie Theater": "ENTERTAINMENT",
+    "Planet Fitness": "FITNESS",
+    "Chipotle": "RESTAURANTS",
+    "Uber": "TRANSPORTATION",
+    "Sephora": "PERSONAL_CARE",
+    "Gap": "CLOTHING",
+}
+
+# Statement descriptor fragments: (pattern, merchant name or None, category code or None)
+# A category of None means "the merchant's category". Longer patterns win, so
+# "UBER EATS" beats "UBER".
+ALIASES = [
+    ("WHOLE FOODS", "Whole Foods Market", None),
+    ("WFM", "Whole Foods Market", None),
+    ("WALGREENS", "Walgreens Pharmacy", None),
+    ("CVS", "CVS Pharmacy", None),
+    ("AMC", "AMC Movie Theater", None),
+    ("AMC THEATRES", "AMC Movie Theater", None),
+    ("AMC THEATERS", "AMC Movie Theater", None),
+    ("SBUX", "Starbucks", None),
+    ("CHIPOTLE MEXICAN GRILL", "Chipotle", None),
+    ("UBER TRIP", "Uber", None),
+    ("UBER EATS", "Uber", "RESTAURANTS"),
+    ("GAP ONLINE", "Gap", None),
+    ("PAYROLL", None, "INCOME"),
+    ("DIRECT DEP", None, "INCOME"),
+    ("TRANSFER", None, "TRANSFER"),
+    ("ZELLE", None, "TRANSFER"),
+    ("VENMO", None, "TRANSFER"),
+]
@@ -1,12 +1,125 @@
-import requests
-import os
-from dotenv import load_dotenv
+from urllib.parse import parse_qsl, urlencode, urlsplit
 
-load_dotenv()
+import config
 
-NESSIE_API_KEY = os.getenv('NESSIE_API_KEY')
+NESSIE_API_KEY = config.get('NESSIE_API_KEY')
 BASE_URL = 'http://api.nessieisreal.com'
 
+# Dict-shaped list responses keep their items under one of these keys; otherwise a
+# single object (it has an '_id') is a one-item list, and failing that the first
+# list of objects in the dict is used
+LIST_KEYS = ('customers', 'accounts', 'purchases', 'deposits', 'results', 'data')
+
+# Stop following "next" links after this many pages (guards against a server that loops)
+MAX_PAGES = 10000
+
+TRANSACTION_TYPES = ('purchases', 'deposits', 'withdrawals', 'transfers', 'bills')
+
+
+def _get(url):
+    import requests  # imported on first call so `import nessie_client` stays cheap
+    return requests.get(url)
+
+
+def _url(endpoint):
+    separator = '&' if '?' in endpoint else '?'
+    return f'{BASE_URL}{endpoint}{separator}key={NESSIE_API_KEY}'
+
+
+def _get_json(endpoint):
+    return _get(_url(endpoint)).json()
+
+# ============================================================================
+# LIST RESPONSES AND PAGINATION
+# ============================================================================
+
+def list_items(resp):
+    """
+    The list of items in one list response, without copying it
+    Handles a bare list, {'customers': [...]}, {'results': [...]}, {'data': [...]}
+    and the other LIST_KEYS, a single object ({'_id': ...} -> [it]) and any other
+    dict holding a list of objects; anything else (an error dict, None) gives [].
+    """
+    if isinstance(resp, list):
+        return resp
+    if not isinstance(resp, dict):
+        return []
+    for key in LIST_KEYS:
+        if isinstance(resp.get(key), list):
+            return resp[key]
+    if '_id' in resp:
+        return [resp]
+    for value in resp.values():
+        if isinstance(value, list) and (not value or isinstance(value[0], dict)):
+            return value
+    return []
+
+
+def iter_items(resp):
+    """Items of one list response, one at a time (see list_items)"""
+    yield from list_items(resp)
+
+
+def next_page(resp):
+    """
+    Endpoint of the next page, or None
+    Follows {'paging': {'next': ...}} (Nessie enterprise endpoints) and a top-level
+    {'next': ...}. Absolute links are reduced to path and query, without the API key.
+    """
+    if not isinstance(resp, dict):
+        return None
+    paging = resp.get('paging')
+    link = paging.get('next') if isinstance(paging, dict) else resp.get('next')
+    if not link or not isinstance(link, str):
+        return None
+    parts = urlsplit(link)
+    query = urlencode([(k, v) for k, v in parse_qsl(parts.query) if k != 'key'])
+    return f"{parts.path}?{query}" if query else parts.path
+
+
+def is_list_page(resp):
+    """
+    True if resp is a list response (see list_items), not an error dict or None
+    An empty list only counts under one of LIST_KEYS, so {"code": 404, "culprit": []}
+    is an error.
+    """
+    if isinstance(resp, list):
+        return True
+    if not isinstance(resp, dict):
+        return False
+    if '_id' in resp:
+        return True
+    return any(isinstance(value, list) and (key in LIST_KEYS or (value and isinstance(value[0], dict)))
+               for key, value in resp.items())
+
+
+def iter_pages(fetch, endpoint, max_pages=MAX_PAGES, strict=False):
+    """
+    Every item of a list endpoint across all of its pages
+    Pages are fetched only as the caller consumes items, so a caller that streams
+    holds one page at a time.
+    Args:
+        fetch: endpoint -> parsed JSON (e.g. SecureDataPipeline._make_request)
+        endpoint: path such as "/customers"
+        strict: raise ValueError on a page that is not a list response (e.g.
+            {"code": 500}) instead of treating it as the end of the listing
+    """
+    seen = set()
+    for _ in range(max_pages):
+        seen.add(endpoint)
+        resp = fetch(endpoint)
+        if strict and not is_list_page(resp):
+            raise ValueError(f"Not a list response from {endpoint}: {str(resp)[:200]}")
+        yield from iter_items(resp)
+        endpoint = next_page(resp)
+        if endpoint is None or endpoint in seen:
+            return
+
+
+def _post(url, data):
+    import requests
+    return requests.post(url, json=data)
+
 class NessieClient:
     
     @staticmethod
@@ -24,84 +137,102 @@ class NessieClient:
                 "zip": zip_code
             }
         }
-        response = requests.post(url, json=data)
+        response = _post(url, data)
         return response.json()
     
     @staticmethod
     def get_customer(customer_id):
         """Get customer details"""
         url = f'{BASE_URL}/customers/{customer_id}?key={NESSIE_API_KEY}'
-        response = requests.get(url)
+        response = _get(url)
         return response.json()
     
     @staticmethod
     def get_accounts(customer_id):
         """Get all accounts for a customer"""
         url = f'{BASE_URL}/customers/{customer_id}/accounts?key={NESSIE_API_KEY}'
-        response = requests.get(url)
+        response = _get(url)
         return response.json()
     
     @staticmethod
     def get_purchases(account_id):
         """Get purchases (transactions) for an account"""
         url = f'{BASE_URL}/accounts/{account_id}/purchases?key={NESSIE_API_KEY}'
-        response = requests.get(url)
+        response = _get(url)
         return response.json()
     
     @staticmethod
     def get_transfers(account_id):
         """Get transfers for an account"""
         url = f'{BASE_URL}/accounts/{account_id}/transfers?key={NESSIE_API_KEY}'
-        response = requests.get(url)
+        response = _get(url)
         return response.json()
     
     @staticmethod
     def get_deposits(account_id):
         """Get deposits for an account"""
         url = f'{BASE_URL}/accounts/{account_id}/deposits?key={NESSIE_API_KEY}'
-        response = requests.get(url)
+        response = _get(url)
         return response.json()
     
     @staticmethod
     def get_withdrawals(account_id):
         """Get withdrawals for an account"""
         url = f'{BASE_URL}/accounts/{account_id}/withdrawals?key={NESSIE_API_KEY}'
-        response = requests.get(url)
+        response = _get(url)
         return response.json()
     
     @staticmethod
     def get_bills(account_id):
         """Get bills for an account"""
         url = f'{BASE_URL}/accounts/{account_id}/bills?key={NESSIE_API_KEY}'
-        response = requests.get(url)
+        response = _get(url)
         return response.json()
     
+    # ------------------------------------------------------------------
+    # Iterators: one item at a time, following pagination
+    # ------------------------------------------------------------------
+    
+    @staticmethod
+    def iter_list(endpoint):
+        """Items of any list endpoint, e.g. /customers or /accounts/<id>/bills"""
+        return iter_pages(_get_json, endpoint)
+    
+    @staticmethod
+    def iter_customers():
+        return NessieClient.iter_list('/customers')
+    
+    @staticmethod
+    def iter_accounts(customer_id):
+        return NessieClient.iter_list(f'/customers/{customer_id}/accounts')
+    
+    @staticmethod
+    def iter_account_transactions(account_id, kind):
+        """kind: one of TRANSACTION_TYPES"""
+        return NessieClient.iter_list(f'/accounts/{account_id}/{kind}')
+    
+    @staticmethod
+    def iter_transactions(customer_id, kinds=TRANSACTION_TYPES):
+        """(kind, account_id, transaction) for every account of a customer"""
+        for account in NessieClient.iter_accounts(customer_id):
+            for kind in kinds:
+                for transaction in NessieClient.iter_account_transactions(account['_id'], kind):
+                    yield kind, account['_id'], transaction
+    
     @staticmethod
     def get_all_financial_data(customer_id):
         """
         Get EVERYTHING - purchases, transfers, deposits, withdrawals, bills
         """
-        accounts = NessieClient.get_accounts(customer_id)
-        
         all_data = {
             'customer_id': customer_id,
-            'accounts': accounts,
-            'purchases': [],
-            'transfers': [],
-            'deposits': [],
-            'withdrawals': [],
-            'bills': []
+            'accounts': list(NessieClient.iter_accounts(customer_id)),
+            **{kind: [] for kind in TRANSACTION_TYPES}
         }
         
-        for account in accounts:
-            account_id = account['_id']
-            
-            # Get all transaction types
-            all_data['purchases'].extend(NessieClient.get_purchases(account_id))
-            all_data['transfers'].extend(NessieClient.get_transfers(account_id))
-            all_data['deposits'].extend(NessieClient.get_deposits(account_id))
-            all_data['withdrawals'].extend(NessieClient.get_withdrawals(account_id))
-            all_data['bills'].extend(NessieClient.get_bills(account_id))
+        for account in all_data['accounts']:
+            for kind in TRANSACTION_TYPES:
+                all_data[kind].extend(NessieClient.iter_account_transactions(account['_id'], kind))
         
         return all_data
 
@@ -0,0 +1,326 @@
+"""
+Composable, instrumented stage pipeline for SecureDataPipeline
+Each stage is a pluggable component that processes a context dict. Stages are
+chained as generators, so a stream of customers flows through one at a time, and
+every stage records its own timing and byte counters.
+
+    stages = build_customer_pipeline(secure, write_raw=False, verify_sample=0.01)
+    for ctx in stages.run_many(new_context(cid) for cid in customer_ids):
+        ...
+    log.info(stages.report())
+"""
+
+import abc
+import os
+import random
+import time
+
+from compression import compress_payload
+from logger import get_logger
+import serialization
+
+# Defaults for the nightly run; override per call or through the environment
+PIPELINE_WRITE_RAW = os.getenv("PIPELINE_WRITE_RAW", "1") == "1"
+PIPELINE_VERIFY_SAMPLE = float(os.getenv("PIPELINE_VERIFY_SAMPLE", "1.0"))
+# Compression before encryption: "0" off, "1" the default codec, or a codec name
+# (see compression.CODECS), with an optional level and dictionary id
+PIPELINE_COMPRESS = os.getenv("PIPELINE_COMPRESS", "0")
+PIPELINE_COMPRESS_LEVEL = int(os.getenv("PIPELINE_COMPRESS_LEVEL")) if os.getenv("PIPELINE_COMPRESS_LEVEL") else None
+PIPELINE_COMPRESS_DICT = os.getenv("PIPELINE_COMPRESS_DICT") or None
+
+log = get_logger("pipeline")
+
+
+class StageStats:
+    """Counters for one stage"""
+
+    __slots__ = ("calls", "skipped", "errors", "seconds", "bytes_in", "bytes_out")
+
+    def __init__(self):
+        self.calls = 0
+        self.skipped = 0
+        self.errors = 0
+        self.seconds = 0.0
+        self.bytes_in = 0   # only counted by stages that transform a payload
+        self.bytes_out = 0
+
+    def as_dict(self):
+        return {
+            "calls": self.calls,
+            "skipped": self.skipped,
+            "errors": self.errors,
+            "seconds": round(self.seconds, 6),
+            "avg_ms": round(self.seconds / self.calls * 1000, 3) if self.calls else 0.0,
+            "bytes_out": self.bytes_out,
+            "ratio": round(self.bytes_in / self.bytes_out, 2) if self.bytes_in and self.bytes_out else None,
+        }
+
+
+class Stage(abc.ABC):
+    """
+    Base class for a pipeline stage
+    Subclasses implement process(ctx) and return the number of bytes they produced
+    (or 0). `sample` runs the stage on only that fraction of items.
+    """
+
+    name = "stage"
+
+    def __init__(self, enabled=True, sample=1.0):
+        self.enabled = enabled
+        self.sample = sample
+        self.stats = StageStats()
+
+    @abc.abstractmethod
+    def process(self, ctx):
+        """Work on ctx in place; bytes produced (or 0)"""
+
+    def should_run(self, ctx):
+        if not self.enabled or 'error' in ctx or ctx.get('unchanged'):
+            return False
+        return self.sample >= 1.0 or random.random() < self.sample
+
+    def __call__(self, contexts):
+        """Generator: pull contexts from upstream, process each, pass it on"""
+        for ctx in contexts:
+            if not self.should_run(ctx):
+                self.stats.skipped += 1
+                yield ctx
+                continue
+
+            start = time.perf_counter()
+            try:
+                self.stats.bytes_out += self.process(ctx) or 0
+            except Exception as e:
+                self.stats.errors += 1
+                ctx['error'] = e
+                ctx['failed_stage'] = self.name
+            finally:
+                self.stats.calls += 1
+                self.stats.seconds += time.perf_counter() - start
+            yield ctx
+
+
+class StagePipeline:
+    """An ordered list of stages, run lazily over a stream of contexts"""
+
+    def __init__(self, stages):
+        self.stages = list(stages)
+
+    def stage(self, name):
+        for stage in self.stages:
+            if stage.name == name:
+                return stage
+        raise KeyError(name)
+
+    def run_many(self, contexts):
+        """Yield each context after it has passed through every stage"""
+        stream = iter(contexts)
+        for stage in self.stages:
+            stream = stage(stream)
+        return stream
+
+    def run(self, ctx):
+        """Run a single context; re-raise the first stage error"""
+        for result in self.run_many([ctx]):
+            if 'error' in result:
+                raise result['error']
+            return result
+
+    def stats(self):
+        return {stage.name: stage.stats.as_dict() for stage in self.stages}
+
+    def report(self):
+        lines = [f"{'stage':<16} {'calls':>6} {'skip':>6} {'err':>4} {'avg ms':>9} {'bytes':>12}"]
+        for name, s in self.stats().items():
+            ratio = f"  ({s['ratio']:.2f}x)" if s['ratio'] else ""
+            lines.append(f"{name:<16} {s['calls']:>6} {s['skipped']:>6} {s['errors']:>4} "
+                         f"{s['avg_ms']:>9.3f} {s['bytes_out']:>12,}{ratio}")
+        return "\n".join(lines)
+
+
+def new_context(customer_id, output_dir="encrypted_data", reuse=False):
+    """reuse=True lets an UnchangedStage keep existing outputs for unchanged data"""
+    return {"customer_id": customer_id, "output_dir": output_dir, "files": {}, "reuse": reuse}
+
+# ============================================================================
+# CUSTOMER STAGES
+# ============================================================================
+
+class FetchStage(Stage):
+    """Customer, account, purchases and deposits from the Nessie API"""
+    name = "fetch"
+
+    def __init__(self, secure, **kwargs):
+        super().__init__(**kwargs)
+        self.secure = secure
+
+    def process(self, ctx):
+        ctx['records'] = self.secure.fetch_customer_records(ctx['customer_id'])
+        return 0
+
+
+class EnrichStage(Stage):
+    """Merchant names/categories, then the customer_data structure"""
+    name = "enrich"
+
+    def __init__(self, secure, **kwargs):
+        super().__init__(**kwargs)
+        self.secure = secure
+
+    def process(self, ctx):
+        records = ctx.pop('records')
+        records['purchases'] = self.secure.enrich_purchases(records['purchases'])
+        ctx['customer_data'] = self.secure.build_customer_data(ctx['customer_id'], records)
+        return 0
+
+
+class UnchangedStage(Stage):
+    """
+    Stop early when a customer's outputs are already current
+    `check(ctx)` returns True when nothing downstream needs redoing (and may fill
+    in the existing files); the context is marked unchanged and every later
+    stage passes it through untouched.
+    """
+    name = "unchanged"
+
+    def __init__(self, check, **kwargs):
+        super().__init__(**kwargs)
+        self.check = check
+
+    def should_run(self, ctx):
+        return ctx.get('reuse', False) and super().should_run(ctx)
+
+    def process(self, ctx):
+        ctx['unchanged'] = bool(self.check(ctx))
+        return 0
+
+
+class SerializeStage(Stage):
+    """customer_data -> compact JSON bytes (see serialization.py)"""
+    name = "serialize"
+
+    def process(self, ctx):
+        ctx['plaintext'] = serialization.dumps(ctx['customer_data'])
+        ctx['payload'] = ctx['plaintext']
+        return len(ctx['payload'])
+
+
+class CompressStage(Stage):
+    """
+    Optional compression of the payload before encryption (see compression.py)
+    The codec, level and dictionary go into the package header; the stage's
+    ratio is reported with the other stage stats.
+    """
+    name = "compress"
+
+    def __init__(self, codec=None, level=None, dictionary=None, **kwargs):
+        super().__init__(**kwargs)
+        self.codec = codec
+        self.level = level
+        self.dictionary = dictionary
+
+    def process(self, ctx):
+        plaintext_bytes = len(ctx['payload'])
+        ctx['payload'], ctx['compression'] = compress_payload(ctx['payload'], self.codec, self.level,
+                                                              self.dictionary)
+        self.stats.bytes_in += plaintext_bytes
+        log.debug("🗜️ Compressed payload", customer_id=ctx['customer_id'], codec=ctx['compression']['compression'],
+                  ratio=round(plaintext_bytes / max(len(ctx['payload']), 1), 2))
+        return len(ctx['payload'])
+
+
+class EncryptStage(Stage):
+    name = "encrypt"
+
+    def __init__(self, secure, **kwargs):
+        super().__init__(**kwargs)
+        self.secure = secure
+
+    def process(self, ctx):
+        # The compression header is bound to the ciphertext (see crypto.AAD_FIELDS)
+        package = self.secure.encrypt_bytes(ctx['payload'], ctx.get('compression'))
+        ctx['encrypted_package'] = package
+        return len(package['encrypted_data'])
+
+
+class WriteStage(Stage):
+    """
+    Write one artifact to output_dir
+    kind="raw" dumps customer_data indented for people to read, kind="encrypted"
+    the encrypted package (compact)
+    """
+
+    def __init__(self, kind, **kwargs):
+        super().__init__(**kwargs)
+        self.kind = kind
+        self.name = f"write_{kind}"
+
+    def process(self, ctx):
+        os.makedirs(ctx['output_dir'], exist_ok=True)
+        filename = f"{ctx['output_dir']}/customer_{ctx['customer_id']}_{self.kind}.json"
+
+        if self.kind == "raw":
+            data = serialization.dumps(ctx['customer_data'], pretty=True)
+        else:
+            data = serialization.dumps(ctx['encrypted_package'])
+
+        with open(filename, 'wb') as f:
+            f.write(data)
+        ctx['files'][self.kind] = filename
+        log.info("💾 Data saved", customer_id=ctx['customer_id'], kind=self.kind, path=filename, size=len(data))
+        return len(data)
+
+
+class VerifyStage(Stage):
+    """Decrypt round-trip check; usually sampled on large runs"""
+    name = "verify"
+
+    def __init__(self, secure, **kwargs):
+        super().__init__(**kwargs)
+        self.secure = secure
+
+    def process(self, ctx):
+        decrypted = self.secure.aes_decrypt(ctx['encrypted_package'])
+        if decrypted['customer_id'] != ctx['customer_id']:
+            raise ValueError(f"Round-trip verification failed for {ctx['customer_id']}")
+        ctx['verified'] = True
+        log.debug("✅ Decryption verified", customer_id=ctx['customer_id'])
+        return 0
+
+
+def build_customer_pipeline(secure, write_raw=None, verify_sample=None, compress=None,
+                            compress_level=None, compress_dict=None, unchanged=None):
+    """
+    Standard fetch → enrich → (unchanged?) → serialize → compress → encrypt → write → verify chain
+    Args:
+        secure: SecureDataPipeline providing fetch/encrypt/decrypt
+        write_raw: write the plaintext _raw.json dump (default PIPELINE_WRITE_RAW)
+        verify_sample: fraction of customers to round-trip verify (default PIPELINE_VERIFY_SAMPLE)
+        compress: compress before encrypting: False, True (default codec) or a codec
+            name (default PIPELINE_COMPRESS)
+        compress_level / compress_dict: codec level and dictionary id
+            (default PIPELINE_COMPRESS_LEVEL / PIPELINE_COMPRESS_DICT)
+        unchanged: check(ctx) for UnchangedStage, run for contexts created with
+            reuse=True (None: always rebuild)
+    """
+    write_raw = PIPELINE_WRITE_RAW if write_raw is None else write_raw
+    verify_sample = PIPELINE_VERIFY_SAMPLE if verify_sample is None else verify_sample
+    compress = PIPELINE_COMPRESS if compress is None else compress
+    if compress in (True, "1"):
+        compress = None  # compression.DEFAULT_CODEC
+    elif compress in (False, "0", ""):
+        compress = False
+
+    return StagePipeline([
+        FetchStage(secure),
+        EnrichStage(secure),
+        UnchangedStage(unchanged, enabled=unchanged is not None),
+        SerializeStage(),
+        WriteStage("raw", enabled=write_raw),
+        CompressStage(codec=compress or None, enabled=compress is not False,
+                      level=PIPELINE_COMPRESS_LEVEL if compress_level is None else compress_level,
+                      dictionary=PIPELINE_COMPRESS_DICT if compress_dict is None else compress_dict),
+        EncryptStage(secure),
+        WriteStage("encrypted"),
+        VerifyStage(secure, enabled=verify_sample > 0, sample=verify_sample),
+    ])
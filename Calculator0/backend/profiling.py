@@ -0,0 +1,256 @@
+"""
+Opt-in profiling for API requests and batch runs
+Off unless PROFILE is set, in which case each profiled request or CLI run writes
+its own files to PROFILE_DIR:
+
+    PROFILE=cprofile   deterministic (cProfile) -> <name>.pstats + <name>.collapsed
+    PROFILE=sample     stack sampling thread    -> <name>.collapsed
+
+.collapsed files are in the "frame;frame;frame count" format read by
+flamegraph.pl, speedscope and inferno. For cProfile runs the stacks are
+reconstructed from the caller graph, so time is split across callers in
+proportion to what each caller spent in the function.
+
+    @profiled("encryption")
+    def main(): ...
+
+    profiling.install_flask(app)     # before/teardown request hooks
+
+When PROFILE is unset the decorator returns the function unchanged and no request
+hooks are registered.
+"""
+
+import functools
+import os
+import random
+import re
+import sys
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+
+from logger import get_logger
+
+PROFILE_MODE = os.getenv("PROFILE", "").lower()          # "", "cprofile" or "sample"
+PROFILE_DIR = os.getenv("PROFILE_DIR", "profiles")
+PROFILE_SAMPLE_INTERVAL = float(os.getenv("PROFILE_SAMPLE_INTERVAL", "0.005"))
+PROFILE_REQUEST_SAMPLE = float(os.getenv("PROFILE_REQUEST_SAMPLE", "1.0"))  # fraction of requests
+
+MAX_STACK_DEPTH = 64
+MAX_PATHS_PER_FUNCTION = 50
+
+log = get_logger("profiling")
+
+_counter = 0
+_counter_lock = threading.Lock()
+
+# Only one cProfile profiler can be active per process (sys.monitoring on 3.12+)
+_cprofile_lock = threading.Lock()
+
+
+def enabled():
+    return PROFILE_MODE in ("cprofile", "sample")
+
+
+def _output_base(name):
+    global _counter
+    with _counter_lock:
+        _counter += 1
+        n = _counter
+    safe = re.sub(r'[^A-Za-z0-9_.-]+', '_', name).strip('_') or "run"
+    os.makedirs(PROFILE_DIR, exist_ok=True)
+    return os.path.join(PROFILE_DIR, f"{safe}-{time.strftime('%Y%m%d-%H%M%S')}-{os.getpid()}-{n}")
+
+
+def _frame_label(filename, lineno, funcname):
+    return f"{os.path.basename(filename)}:{funcname}"
+
+# ============================================================================
+# SAMPLING PROFILER
+# ============================================================================
+
+class StackSampler:
+    """Samples one thread's stack every `interval` seconds from a daemon thread"""
+
+    def __init__(self, thread_id=None, interval=PROFILE_SAMPLE_INTERVAL):
+        self.thread_id = thread_id or threading.get_ident()
+        self.interval = interval
+        self.stacks = Counter()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def _sample(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None and len(stack) < MAX_STACK_DEPTH:
+                code = frame.f_code
+                stack.append(_frame_label(code.co_filename, frame.f_lineno, code.co_name))
+                frame = frame.f_back
+            if stack:
+                self.stacks[";".join(reversed(stack))] += 1
+
+    def start(self):
+        self._thread = threading.Thread(target=self._sample, name="profile-sampler", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def write_collapsed(self, path):
+        with open(path, 'w') as f:
+            for stack, count in self.stacks.most_common():
+                f.write(f"{stack} {count}\n")
+
+# ============================================================================
+# cPROFILE -> COLLAPSED STACKS
+# ============================================================================
+
+def collapse_pstats(stats):
+    """
+    Approximate collapsed stacks from a pstats.Stats caller graph
+    Each function's own time is spread over the paths that reach it, weighted by
+    the cumulative time each caller edge accounts for. Returns {stack: microseconds}.
+    """
+    raw = stats.stats  # func -> (cc, nc, tt, ct, callers{caller: (cc, nc, tt, ct)})
+    memo = {}
+    active = set()
+
+    def paths(func):
+        if func in memo:
+            return memo[func]
+        if func in active or len(active) >= MAX_STACK_DEPTH:
+            # Recursion: cut the cycle here
+            return [((func,), 1.0)]
+
+        active.add(func)
+        callers = raw.get(func, (0, 0, 0, 0, {}))[4]
+        edges = [(caller, edge[3]) for caller, edge in callers.items() if caller not in active]
+        total = sum(weight for _, weight in edges)
+        if not edges or total <= 0:
+            result = [((func,), 1.0)]
+        else:
+            result = []
+            for caller, weight in edges:
+                for stack, share in paths(caller):
+                    result.append((stack + (func,), share * weight / total))
+            result.sort(key=lambda item: item[1], reverse=True)
+            result = result[:MAX_PATHS_PER_FUNCTION]
+        active.discard(func)
+        memo[func] = result
+        return result
+
+    collapsed = Counter()
+    for func, (cc, nc, tt, ct, callers) in raw.items():
+        if tt <= 0:
+            continue
+        for stack, share in paths(func):
+            micros = int(tt * share * 1_000_000)
+            if micros:
+                collapsed[";".join(_frame_label(*f) for f in stack)] += micros
+    return collapsed
+
+# ============================================================================
+# PUBLIC HOOKS
+# ============================================================================
+
+class ProfileRun:
+    """One profiled region; start() then stop() writes the files"""
+
+    def __init__(self, name, mode=None):
+        self.name = name
+        self.mode = mode or PROFILE_MODE
+        self._profiler = None
+        self._sampler = None
+        self._start = None
+
+    def start(self):
+        self._start = time.perf_counter()
+        if self.mode == "cprofile":
+            if not _cprofile_lock.acquire(blocking=False):
+                # Another request is already being profiled; skip this one
+                self.mode = None
+                return self
+            import cProfile
+            self._profiler = cProfile.Profile()
+            self._profiler.enable()
+        elif self.mode == "sample":
+            self._sampler = StackSampler()
+            self._sampler.start()
+        return self
+
+    def stop(self):
+        if self.mode is None:
+            return []
+        elapsed = time.perf_counter() - self._start
+        base = _output_base(self.name)
+        files = []
+        if self._profiler is not None:
+            self._profiler.disable()
+            _cprofile_lock.release()
+            self._profiler.dump_stats(f"{base}.pstats")
+            files.append(f"{base}.pstats")
+            import pstats
+            stats = pstats.Stats(self._profiler)
+            with open(f"{base}.collapsed", 'w') as f:
+                for stack, micros in collapse_pstats(stats).most_common():
+                    f.write(f"{stack} {micros}\n")
+            files.append(f"{base}.collapsed")
+        elif self._sampler is not None:
+            self._sampler.stop()
+            self._sampler.write_collapsed(f"{base}.collapsed")
+            files.append(f"{base}.collapsed")
+        log.info("🔬 Profile written", name=self.name, mode=self.mode,
+                 seconds=round(elapsed, 3), files=",".join(files))
+        return files
+
+
+@contextmanager
+def profile_run(name, mode=None):
+    """Profile the enclosed block when profiling is enabled (or mode is given)"""
+    if not (mode or enabled()):
+        yield None
+        return
+    run = ProfileRun(name, mode).start()
+    try:
+        yield run
+    finally:
+        run.stop()
+
+
+def profiled(name):
+    """Decorator for CLI entry points; a no-op unless PROFILE is set at import time"""
+    def decorate(func):
+        if not enabled():
+            return func
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with profile_run(name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorate
+
+
+def install_flask(app):
+    """Profile a PROFILE_REQUEST_SAMPLE fraction of requests; registers nothing when disabled"""
+    if not enabled():
+        return
+
+    from flask import g, request
+
+    @app.before_request
+    def _start_profile():
+        if PROFILE_REQUEST_SAMPLE >= 1.0 or random.random() < PROFILE_REQUEST_SAMPLE:
+            g._profile_run = ProfileRun(f"{request.method}{request.path}").start()
+
+    @app.teardown_request
+    def _stop_profile(exc):
+        run = g.pop('_profile_run', None)
+        if run is not None:
+            run.stop()
+
+    log.info("🔬 Request profiling enabled", mode=PROFILE_MODE, sample=PROFILE_REQUEST_SAMPLE,
+             directory=PROFILE_DIR)
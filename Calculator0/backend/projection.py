@@ -0,0 +1,249 @@
+"""
+Savings-goal projection
+Answers "when will this goal be reached?" for the safety-plan goals. A customer's
+deposit and purchase history (the customer_data structure from
+fetch_customer_data_by_id) is binned into weekly income and spend; future weeks are
+drawn from those historical weeks (a bootstrap that keeps each week's income and
+spend together), for thousands of paths at once with NumPy.
+
+Savings never go below zero: the balance follows S_t = max(0, S_{t-1} + saved_t),
+computed for all paths in one pass as the cumulative sum minus its running minimum.
+
+    result = project_goals(customer_data, paths=10_000)
+    result["goals"]["emergency"]    # {"amount", "probability", "p10_weeks", "p50_weeks", "p90_weeks"}
+
+    python projection.py encrypted_data/customer_<id>_raw.json [--paths 10000] [--rent 1400]
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+from datetime import date
+
+import numpy as np
+
+# Weeks simulated ahead (goals not reached by then count as not reached)
+PROJECTION_HORIZON_WEEKS = int(os.getenv("PROJECTION_HORIZON_WEEKS", "104"))
+PROJECTION_PATHS = int(os.getenv("PROJECTION_PATHS", "10000"))
+
+# Rent assumed when the caller doesn't provide one
+DEFAULT_RENT = float(os.getenv("PROJECTION_DEFAULT_RENT", "1500"))
+DEFAULT_MOVING_COST = float(os.getenv("PROJECTION_DEFAULT_MOVING_COST", "800"))
+
+PERCENTILES = (10, 50, 90)
+
+DAYS_PER_MONTH = 365.25 / 12
+
+
+def _days(rows, date_key):
+    """(ordinal days, amounts) arrays for rows with a parseable ISO date"""
+    days, amounts = [], []
+    for row in rows:
+        value = row.get(date_key)
+        if not value:
+            continue
+        try:
+            days.append(date.fromisoformat(value[:10]).toordinal())
+        except ValueError:
+            continue
+        amounts.append(row.get('amount', 0) or 0)
+    return np.asarray(days, dtype=np.int64), np.asarray(amounts, dtype=np.float64)
+
+
+def weekly_flows(deposits, purchases):
+    """
+    Weekly income and spend over the span of the history
+    Returns:
+        (income, spend) float arrays with one entry per week (empty if no dated rows)
+    """
+    deposit_days, deposit_amounts = _days(deposits, 'transaction_date')
+    purchase_days, purchase_amounts = _days(purchases, 'purchase_date')
+    all_days = np.concatenate([deposit_days, purchase_days])
+    if not all_days.size:
+        return np.zeros(0), np.zeros(0)
+
+    first = all_days.min()
+    weeks = int((all_days.max() - first) // 7) + 1
+    income = np.bincount((deposit_days - first) // 7, weights=deposit_amounts, minlength=weeks)
+    spend = np.bincount((purchase_days - first) // 7, weights=purchase_amounts, minlength=weeks)
+    return income, spend
+
+
+def default_goals(spend, rent=None, moving_cost=None):
+    """
+    The safety-plan goals
+        rent        first month's rent
+        deposit     security deposit (one month's rent)
+        emergency   one month of this customer's living expenses
+        moving      moving costs
+    """
+    rent = DEFAULT_RENT if rent is None else rent
+    monthly_spend = float(spend.mean()) * DAYS_PER_MONTH / 7 if spend.size else 0.0
+    return {
+        "rent": rent,
+        "deposit": rent,
+        "emergency": round(monthly_spend, 2),
+        "moving": DEFAULT_MOVING_COST if moving_cost is None else moving_cost,
+    }
+
+
+def simulate_savings(income, spend, paths=PROJECTION_PATHS, horizon=PROJECTION_HORIZON_WEEKS,
+                     save_fraction=1.0, start=0.0, seed=None):
+    """
+    Savings balance paths
+    Args:
+        income / spend: weekly history arrays (same length)
+        paths: number of simulated futures
+        horizon: weeks per path
+        save_fraction: share of each week's income minus spend that is put aside
+        start: amount already saved
+        seed: RNG seed for reproducible runs
+    Returns:
+        (paths, horizon) float array of end-of-week balances
+    """
+    rng = np.random.default_rng(seed)
+    weeks = rng.integers(0, income.size, size=(paths, horizon), dtype=np.int32)
+    net = income - spend
+    if save_fraction != 1.0:
+        net = net * save_fraction
+    balances = np.take(net, weeks)
+
+    # Balance floored at zero: cumulative sum minus its running minimum (when
+    # negative). Every step after the gather works in place on the one array.
+    np.cumsum(balances, axis=1, out=balances)
+    balances += start
+    floor = np.minimum.accumulate(balances, axis=1)
+    np.minimum(floor, 0.0, out=floor)
+    balances -= floor
+    return balances
+
+
+def weeks_to_goals(balances, amounts):
+    """
+    First week (1-based) each path reaches each amount
+    Returns:
+        (paths, goals) int array; horizon + 1 where the goal is never reached
+    """
+    paths, horizon = balances.shape
+    peak = np.maximum.accumulate(balances, axis=1)
+    if not peak.size:
+        return np.full((paths, len(amounts)), horizon + 1)
+
+    # Each path's running peak is sorted; shifting path i by i * span makes the
+    # flattened array sorted too, so one searchsorted answers every path at once.
+    span = float(peak.max()) + 1.0
+    shift = np.arange(paths, dtype=np.float64)[:, None] * span
+    peak += shift
+    targets = np.asarray(amounts, dtype=np.float64)
+    queries = np.minimum(targets[None, :], span) + shift
+    first = np.searchsorted(peak.ravel(), queries.ravel(), side='left').reshape(paths, targets.size)
+    # Unreached goals land somewhere in the next path's range
+    return np.minimum(first - np.arange(paths)[:, None] * horizon, horizon) + 1
+
+
+def summarize(weeks, horizon):
+    """Probability within the horizon and week percentiles (None when not reached in that share of paths)"""
+    reached = weeks <= horizon
+    summary = {"probability": round(float(reached.mean()), 4)}
+    for pct, value in zip(PERCENTILES, np.percentile(weeks, PERCENTILES, method='higher')):
+        summary[f"p{pct}_weeks"] = int(value) if value <= horizon else None
+    return summary
+
+
+def request_paths(value):
+    """
+    Validated path count from an API request
+    None/missing means PROJECTION_PATHS; larger counts are capped at it. Raises
+    ValueError for anything that is not a positive whole number.
+    """
+    if value is None:
+        return PROJECTION_PATHS
+    if isinstance(value, str) and value.strip().isdigit():
+        value = int(value)
+    elif isinstance(value, float) and value.is_integer():
+        value = int(value)
+    if isinstance(value, bool) or not isinstance(value, int) or value < 1:
+        raise ValueError(f"paths must be a positive integer, got {value!r}")
+    return min(value, PROJECTION_PATHS)
+
+
+def project_goals(customer_data, goals=None, paths=PROJECTION_PATHS, horizon=PROJECTION_HORIZON_WEEKS,
+                  save_fraction=1.0, start=0.0, rent=None, seed=None):
+    """
+    Time-to-goal percentiles for one customer
+    Args:
+        customer_data: dict with "deposits" and "purchases" lists
+        goals: {name: amount}; defaults to default_goals() plus their total
+        paths / horizon / save_fraction / start / seed: see simulate_savings
+        rent: monthly rent used by the default goals
+    Returns:
+        Dictionary with weekly history means and, per goal, amount, probability
+        of reaching it within the horizon and p10/p50/p90 weeks
+    """
+    income, spend = weekly_flows(customer_data.get('deposits', []), customer_data.get('purchases', []))
+    if goals is None:
+        goals = default_goals(spend, rent)
+        goals["all"] = round(sum(goals.values()), 2)
+
+    result = {
+        "customer_id": customer_data.get('customer_id'),
+        "paths": paths,
+        "horizon_weeks": horizon,
+        "history_weeks": int(income.size),
+        "weekly": {
+            "income_mean": round(float(income.mean()), 2) if income.size else 0.0,
+            "spend_mean": round(float(spend.mean()), 2) if spend.size else 0.0,
+        },
+        "goals": {},
+    }
+    if not income.size:
+        for name, amount in goals.items():
+            result["goals"][name] = {"amount": amount, "probability": 0.0,
+                                     **{f"p{pct}_weeks": None for pct in PERCENTILES}}
+        return result
+
+    balances = simulate_savings(income, spend, paths, horizon, save_fraction, start, seed)
+    weeks = weeks_to_goals(balances, list(goals.values()))
+    for i, (name, amount) in enumerate(goals.items()):
+        result["goals"][name] = {"amount": amount, **summarize(weeks[:, i], horizon)}
+    return result
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Project when a customer's savings goals will be reached")
+    parser.add_argument("path", help="customer_data JSON (e.g. encrypted_data/customer_<id>_raw.json)")
+    parser.add_argument("--paths", type=int, default=PROJECTION_PATHS)
+    parser.add_argument("--horizon", type=int, default=PROJECTION_HORIZON_WEEKS, help="weeks")
+    parser.add_argument("--save-fraction", type=float, default=1.0)
+    parser.add_argument("--rent", type=float)
+    parser.add_argument("--seed", type=int)
+    parser.add_argument("--json", action="store_true")
+    args = parser.parse_args(argv)
+
+    with open(args.path, 'r') as f:
+        customer_data = json.load(f)
+
+    start = time.perf_counter()
+    result = project_goals(customer_data, paths=args.paths, horizon=args.horizon,
+                           save_fraction=args.save_fraction, rent=args.rent, seed=args.seed)
+    elapsed_ms = (time.perf_counter() - start) * 1000
+
+    if args.json:
+        print(json.dumps(result, indent=2))
+        return 0
+
+    weekly = result["weekly"]
+    print(f"{result['history_weeks']} weeks of history: income ${weekly['income_mean']:,.2f}/week, "
+          f"spend ${weekly['spend_mean']:,.2f}/week")
+    print(f"{'goal':<10} {'amount':>10} {'reached':>8} {'p10':>5} {'p50':>5} {'p90':>5}  (weeks)")
+    for name, goal in result["goals"].items():
+        weeks = [str(goal[f"p{pct}_weeks"]) if goal[f"p{pct}_weeks"] is not None else "-" for pct in PERCENTILES]
+        print(f"{name:<10} {goal['amount']:>10,.2f} {goal['probability']:>8.0%} {weeks[0]:>5} {weeks[1]:>5} {weeks[2]:>5}")
+    print(f"\n✅ {result['paths']:,} paths x {result['horizon_weeks']} weeks in {elapsed_ms:.1f} ms")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,259 @@
+"""
+Prompt compaction for LLM analysis
+Condenses a customer's deposits/purchases into a dense, fixed-size feature summary
+(monthly category totals, deposit cadence, gaps, top merchants, notable changes)
+so the prompt size no longer grows with the length of the history.
+"""
+
+import statistics
+from collections import defaultdict
+from datetime import date, datetime
+
+# Rough chars-per-token ratio for English/JSON text; good enough for budgeting
+CHARS_PER_TOKEN = 4
+DEFAULT_TOKEN_BUDGET = 600
+
+MAX_CATEGORIES = 8
+TOP_MERCHANTS = 5
+MAX_GAPS = 3
+MAX_CHANGES = 6
+
+# A month-over-month move bigger than this (as a fraction) is called out
+CHANGE_THRESHOLD = 0.5
+
+
+def estimate_tokens(text):
+    return len(text) // CHARS_PER_TOKEN + 1
+
+
+def _parse_date(value):
+    """date for an ISO or US date string (or a date/datetime); None for anything else"""
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    if not value or not isinstance(value, str):
+        return None
+    for fmt in ("%Y-%m-%d", "%m/%d/%Y"):
+        try:
+            return datetime.strptime(value[:10], fmt).date()
+        except ValueError:
+            continue
+    return None
+
+
+def split_flat_transactions(transactions):
+    """
+    Convert the analyzer's flat CSV rows ({date, description, category, amount},
+    negative amount = money in) into deposits and purchases
+    """
+    deposits, purchases = [], []
+    for t in transactions:
+        amount = t.get('amount') or 0
+        if amount < 0:
+            deposits.append({
+                'transaction_date': t.get('date'),
+                'amount': -amount,
+                'description': t.get('description')
+            })
+        else:
+            purchases.append({
+                'purchase_date': t.get('date'),
+                'amount': amount,
+                'merchant_name': t.get('description'),
+                'merchant_category': t.get('category'),
+                'description': t.get('description')
+            })
+    return deposits, purchases
+
+
+def summarize_history(deposits, purchases):
+    """
+    Build the feature summary for one customer
+    Returns: dict of plain values (JSON-serializable)
+    """
+    dep_rows = sorted(
+        (day, float(d.get('amount') or 0))
+        for d, day in ((d, _parse_date(d.get('transaction_date'))) for d in deposits)
+        if day
+    )
+
+    monthly = defaultdict(lambda: defaultdict(float))
+    category_totals = defaultdict(float)
+    merchant_totals = defaultdict(lambda: [0.0, 0])
+    total_spent = 0.0
+    purchase_count = 0
+    dates = []
+
+    for p in purchases:
+        day = _parse_date(p.get('purchase_date'))
+        if day is None:
+            continue
+        amount = float(p.get('amount') or 0)
+        category = p.get('merchant_category') or 'Unknown'
+        merchant = p.get('merchant_name') or p.get('description') or 'Unknown'
+        month = day.strftime("%Y-%m")
+
+        monthly[month][category] += amount
+        category_totals[category] += amount
+        stats = merchant_totals[merchant]
+        stats[0] += amount
+        stats[1] += 1
+        total_spent += amount
+        purchase_count += 1
+        dates.append(day)
+
+    for day, amount in dep_rows:
+        monthly[day.strftime("%Y-%m")]['income'] += amount
+        dates.append(day)
+
+    # Keep the table a fixed width: top categories by spend, everything else in "Other"
+    top_categories = [c for c, _ in sorted(category_totals.items(), key=lambda kv: -kv[1])[:MAX_CATEGORIES]]
+    months = sorted(monthly)
+    table = {}
+    for month in months:
+        row = {'income': round(monthly[month].get('income', 0.0), 2)}
+        other = 0.0
+        for category, amount in monthly[month].items():
+            if category == 'income':
+                continue
+            if category in top_categories:
+                row[category] = round(amount, 2)
+            else:
+                other += amount
+        if other:
+            row['Other'] = round(other, 2)
+        table[month] = row
+
+    # Deposit cadence and gaps
+    intervals = [(b[0] - a[0]).days for a, b in zip(dep_rows, dep_rows[1:])]
+    cadence = None
+    gaps = []
+    if intervals:
+        median = statistics.median(intervals)
+        cadence = {
+            'median_days': median,
+            'min_days': min(intervals),
+            'max_days': max(intervals),
+            'stdev_days': round(statistics.pstdev(intervals), 1),
+        }
+        long_gaps = [
+            (days, a[0], b[0]) for days, a, b in zip(intervals, dep_rows, dep_rows[1:])
+            if median and days > 1.5 * median
+        ]
+        gaps = [
+            {'from': str(a), 'to': str(b), 'days': days}
+            for days, a, b in sorted(long_gaps, reverse=True)[:MAX_GAPS]
+        ]
+
+    deposit_amounts = [a for _, a in dep_rows]
+
+    return {
+        'period': {
+            'start': str(min(dates)) if dates else None,
+            'end': str(max(dates)) if dates else None,
+            'months': len(months),
+        },
+        'totals': {
+            # Both counts cover the dated rows the rest of the summary is built from
+            'deposits': len(deposit_amounts),
+            'purchases': purchase_count,
+            'deposited': round(sum(deposit_amounts), 2),
+            'spent': round(total_spent, 2),
+            'deposit_median': round(statistics.median(deposit_amounts), 2) if deposit_amounts else 0,
+        },
+        'deposit_cadence': cadence,
+        'deposit_gaps': gaps,
+        'monthly': table,
+        'top_merchants': [
+            {'merchant': m, 'total': round(t, 2), 'count': n}
+            for m, (t, n) in sorted(merchant_totals.items(), key=lambda kv: -kv[1][0])[:TOP_MERCHANTS]
+        ],
+        'changes': _notable_changes(table, top_categories + ['income']),
+    }
+
+
+def _notable_changes(table, series):
+    """Large month-over-month moves and categories that stop entirely"""
+    months = sorted(table)
+    changes = []
+    for name in series:
+        values = [table[m].get(name, 0.0) for m in months]
+        for prev_month, month, prev, cur in zip(months, months[1:], values, values[1:]):
+            if prev <= 0:
+                continue
+            move = (cur - prev) / prev
+            if abs(move) >= CHANGE_THRESHOLD:
+                changes.append((abs(move), f"{name} {move:+.0%} {prev_month}->{month}"))
+
+        active = [m for m, v in zip(months, values) if v > 0]
+        if active and active[-1] != months[-1] and len(months) > 1:
+            changes.append((2.0, f"{name} stopped after {active[-1]}"))
+
+    changes.sort(key=lambda c: -c[0])
+    return [text for _, text in changes[:MAX_CHANGES]]
+
+
+def render_summary(summary, token_budget=DEFAULT_TOKEN_BUDGET):
+    """
+    Render the summary as compact text that fits in `token_budget` tokens
+    Sections are added in priority order; the monthly table is trimmed to the
+    most recent months if it doesn't fit.
+    """
+    period, totals = summary['period'], summary['totals']
+    sections = [[
+        f"Period: {period['start']} to {period['end']} ({period['months']} months)",
+        f"Totals: {totals['deposits']} deposits ${totals['deposited']:,.2f} "
+        f"(median ${totals['deposit_median']:,.2f}); "
+        f"{totals['purchases']} purchases ${totals['spent']:,.2f}",
+    ]]
+
+    cadence = summary['deposit_cadence']
+    if cadence:
+        sections.append([
+            f"Deposit cadence: median {cadence['median_days']}d, "
+            f"range {cadence['min_days']}-{cadence['max_days']}d, sd {cadence['stdev_days']}d"
+        ])
+    if summary['deposit_gaps']:
+        sections.append(["Deposit gaps: " + "; ".join(
+            f"{g['from']}->{g['to']} ({g['days']}d)" for g in summary['deposit_gaps']
+        )])
+    if summary['changes']:
+        sections.append(["Notable changes: " + "; ".join(summary['changes'])])
+    if summary['top_merchants']:
+        sections.append(["Top merchants: " + "; ".join(
+            f"{m['merchant']} ${m['total']:,.0f}/{m['count']}x" for m in summary['top_merchants']
+        )])
+
+    lines = []
+    for section in sections:
+        candidate = lines + section
+        if estimate_tokens("\n".join(candidate)) > token_budget:
+            break
+        lines = candidate
+
+    # Monthly table last, newest months first until the budget runs out
+    monthly_lines = []
+    for month in sorted(summary['monthly'], reverse=True):
+        row = summary['monthly'][month]
+        line = f"{month}: " + ", ".join(f"{k} {v:.0f}" for k, v in row.items())
+        if estimate_tokens("\n".join(lines + ["Monthly totals ($):"] + monthly_lines + [line])) > token_budget:
+            break
+        monthly_lines.append(line)
+    if monthly_lines:
+        lines += ["Monthly totals ($):"] + sorted(monthly_lines)
+
+    return "\n".join(lines)
+
+
+def compact_history(transaction_data, token_budget=DEFAULT_TOKEN_BUDGET):
+    """
+    Compact text summary for a customer record ({deposits, purchases}) or the
+    analyzer's flat transaction list
+    """
+    if isinstance(transaction_data, dict):
+        deposits = transaction_data.get('deposits', [])
+        purchases = transaction_data.get('purchases', [])
+    else:
+        deposits, purchases = split_flat_transactions(transaction_data)
+    return render_summary(summarize_history(deposits, purchases), token_budget)
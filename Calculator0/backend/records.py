@@ -0,0 +1,232 @@
+"""
+Compact transaction records
+Nessie deposits and purchases arrive as one JSON dict per transaction. For large
+populations that's several hundred bytes of dict overhead per row, plus a fresh
+copy of every repeated string (merchant, category, status, date).
+
+Two lighter layouts, both converting to and from the JSON shape:
+
+    Transaction        one object per row with __slots__, interned strings and
+                       integer-cent amounts
+    TransactionBatch   struct-of-arrays: one array per column, strings stored once
+                       in a table and referenced by integer code
+
+    batch = TransactionBatch.from_dicts(purchases, "purchase")
+    batch.total_cents(), batch.totals_by("merchant_category")
+    rows = list(batch.to_dicts())        # back to the original dict shape
+
+Amounts come back as floats (cents / 100). Keys the layouts don't model are kept
+per row in `extra`, so nothing is lost on a round trip.
+
+See benchmarks/bench_records.py for measured bytes per row.
+"""
+
+import sys
+from array import array
+
+DATE_KEYS = {"deposit": "transaction_date", "purchase": "purchase_date"}
+
+# Columns held as interned strings / string-table codes
+STRING_FIELDS = ("description", "status", "medium", "merchant_id", "merchant_name", "merchant_category")
+
+_intern = sys.intern
+
+
+def to_cents(amount):
+    """Dollar amount (float/int/None) -> integer cents"""
+    return int(round((amount or 0) * 100))
+
+
+def _split_row(row, kind):
+    """(id, date, cents, extra or None) for one JSON row"""
+    date_key = DATE_KEYS[kind]
+    extra = None
+    for key in row:
+        if key not in _KNOWN_KEYS[kind]:
+            if extra is None:
+                extra = {}
+            extra[key] = row[key]
+    return row.get('_id'), row.get(date_key), to_cents(row.get('amount')), extra
+
+
+_KNOWN_KEYS = {kind: {'_id', 'amount', date_key, *STRING_FIELDS} for kind, date_key in DATE_KEYS.items()}
+
+# ============================================================================
+# ONE OBJECT PER ROW
+# ============================================================================
+
+class Transaction:
+    """A deposit or purchase with __slots__ instead of a per-row dict"""
+
+    __slots__ = ("kind", "id", "date", "amount_cents", "description", "status", "medium",
+                 "merchant_id", "merchant_name", "merchant_category", "extra")
+
+    def __init__(self, kind, id=None, date=None, amount_cents=0, description=None, status=None,
+                 medium=None, merchant_id=None, merchant_name=None, merchant_category=None, extra=None):
+        self.kind = kind
+        self.id = id
+        self.date = date
+        self.amount_cents = amount_cents
+        self.description = description
+        self.status = status
+        self.medium = medium
+        self.merchant_id = merchant_id
+        self.merchant_name = merchant_name
+        self.merchant_category = merchant_category
+        self.extra = extra
+
+    @property
+    def amount(self):
+        return self.amount_cents / 100
+
+    @classmethod
+    def from_dict(cls, row, kind):
+        row_id, date, cents, extra = _split_row(row, kind)
+        strings = {}
+        for field in STRING_FIELDS:
+            value = row.get(field)
+            strings[field] = _intern(value) if isinstance(value, str) else value
+        return cls(kind, row_id, _intern(date) if date else date, cents, extra=extra, **strings)
+
+    def to_dict(self):
+        row = {}
+        if self.id is not None:
+            row['_id'] = self.id
+        if self.date is not None:
+            row[DATE_KEYS[self.kind]] = self.date
+        row['amount'] = self.amount_cents / 100
+        for field in STRING_FIELDS:
+            value = getattr(self, field)
+            if value is not None:
+                row[field] = value
+        if self.extra:
+            row.update(self.extra)
+        return row
+
+    def __repr__(self):
+        return f"Transaction({self.kind}, {self.date}, {self.amount_cents / 100:.2f}, {self.description!r})"
+
+
+def from_dicts(rows, kind):
+    return [Transaction.from_dict(row, kind) for row in rows]
+
+
+def to_dicts(records):
+    return [record.to_dict() for record in records]
+
+# ============================================================================
+# STRUCT OF ARRAYS
+# ============================================================================
+
+class StringTable:
+    """Each distinct string stored once; code 0 means None"""
+
+    def __init__(self):
+        self.strings = [None]
+        self.codes = {None: 0}
+
+    def code(self, value):
+        code = self.codes.get(value)
+        if code is None:
+            code = len(self.strings)
+            self.codes[value] = code
+            self.strings.append(value)
+        return code
+
+    def __len__(self):
+        return len(self.strings) - 1
+
+
+class TransactionBatch:
+    """
+    Column-oriented deposits or purchases
+    Amounts live in a signed 64-bit array of cents; dates and the STRING_FIELDS
+    columns are 32-bit codes into one shared StringTable. Ids are kept as a list
+    since they are unique per row.
+    """
+
+    def __init__(self, kind):
+        if kind not in DATE_KEYS:
+            raise ValueError(f"Unknown transaction kind: {kind}")
+        self.kind = kind
+        self.table = StringTable()
+        self.ids = []
+        self.dates = array('I')
+        self.amount_cents = array('q')
+        self.columns = {field: array('I') for field in STRING_FIELDS}
+        self.extra = {}  # row index -> dict of unmodelled keys
+
+    @classmethod
+    def from_dicts(cls, rows, kind):
+        batch = cls(kind)
+        for row in rows:
+            batch.append(row)
+        return batch
+
+    def append(self, row):
+        row_id, date, cents, extra = _split_row(row, self.kind)
+        code = self.table.code
+        if extra:
+            self.extra[len(self.ids)] = extra
+        self.ids.append(row_id)
+        self.dates.append(code(date))
+        self.amount_cents.append(cents)
+        for field, column in self.columns.items():
+            column.append(code(row.get(field)))
+
+    def __len__(self):
+        return len(self.ids)
+
+    def row(self, i):
+        """One row in the original JSON shape"""
+        strings = self.table.strings
+        row = {}
+        if self.ids[i] is not None:
+            row['_id'] = self.ids[i]
+        date = strings[self.dates[i]]
+        if date is not None:
+            row[DATE_KEYS[self.kind]] = date
+        row['amount'] = self.amount_cents[i] / 100
+        for field, column in self.columns.items():
+            value = strings[column[i]]
+            if value is not None:
+                row[field] = value
+        if i in self.extra:
+            row.update(self.extra[i])
+        return row
+
+    def to_dicts(self):
+        for i in range(len(self.ids)):
+            yield self.row(i)
+
+    def records(self):
+        """Rows as slotted Transaction objects"""
+        for i in range(len(self.ids)):
+            yield Transaction.from_dict(self.row(i), self.kind)
+
+    def total_cents(self):
+        return sum(self.amount_cents)
+
+    def totals_by(self, field):
+        """{value: total cents} for a string column, e.g. merchant_category"""
+        column = self.columns[field]
+        totals = {}
+        for code, cents in zip(column, self.amount_cents):
+            totals[code] = totals.get(code, 0) + cents
+        strings = self.table.strings
+        return {strings[code]: cents for code, cents in totals.items()}
+
+    def date_range(self):
+        strings = self.table.strings
+        dates = [strings[code] for code in set(self.dates) if code]
+        return (min(dates), max(dates)) if dates else (None, None)
+
+    def nbytes(self):
+        """Approximate memory held by the batch (arrays, id list, string table)"""
+        size = sys.getsizeof(self.ids) + sum(sys.getsizeof(i) for i in self.ids if i is not None)
+        size += self.dates.buffer_info()[1] * self.dates.itemsize
+        size += self.amount_cents.buffer_info()[1] * self.amount_cents.itemsize
+        size += sum(c.buffer_info()[1] * c.itemsize for c in self.columns.values())
+        size += sys.getsizeof(self.table.strings) + sys.getsizeof(self.table.codes)
+        size += sum(sys.getsizeof(s) for s in self.table.strings if s is not None)
+        return size
@@ -0,0 +1,276 @@
+"""
+Covert savings capacity
+How much can a customer set aside each period without it showing in their
+spending? For every spending category the per-period spend has a historical mean
+and standard deviation; trimming a category by up to `sigma` standard deviations
+keeps its spend inside the band it already moves in. Categories that are bought
+only now and then have a deviation as large as their mean, so a trim is also
+capped at a share of the category's usual spend; otherwise the estimator would
+suggest dropping whole categories. The capacity is the sum of the trims.
+
+Estimates are computed for a whole population at once: transactions are parsed
+into flat (customer, period, category, amount) arrays, binned into a
+customers x periods x categories tensor with np.bincount, and the means and
+variances come from sums over the period axis. Shorter histories are zero-padded
+and divided by their own period count, so no masking is needed. Customers are
+sorted by history length and binned SAVINGS_CHUNK at a time, so a tensor is only
+as wide as the longest history in its chunk and one long-history customer doesn't
+inflate memory for everyone.
+
+    results = estimate_capacity([customer_data, ...], period="week")
+    results[0]["capacity"], results[0]["by_category"]
+
+    python savings_capacity.py customers/*.json [--period month] [--sigma 0.5]
+"""
+
+import argparse
+import json
+import os
+import sys
+from datetime import date
+
+import numpy as np
+
+from merchant_matcher import UNKNOWN_CATEGORY, get_matcher
+from merchants import CATEGORIES
+
+# Trim each category by at most this many standard deviations of its spend
+SAVINGS_BAND_SIGMA = float(os.getenv("SAVINGS_BAND_SIGMA", "1.0"))
+
+# ...and by at most this share of its mean spend
+MAX_TRIM_SHARE = float(os.getenv("SAVINGS_MAX_TRIM_SHARE", "0.25"))
+
+# Fewer periods than this and the variance isn't trusted (capacity reported as 0)
+MIN_PERIODS = int(os.getenv("SAVINGS_MIN_PERIODS", "4"))
+
+# Customers binned into one tensor at a time
+SAVINGS_CHUNK = int(os.getenv("SAVINGS_CHUNK", "1024"))
+
+PERIODS = ("week", "month")
+
+CATEGORY_CODES = list(CATEGORIES)
+_CATEGORY_INDEX = {code: i for i, code in enumerate(CATEGORY_CODES)}
+_UNKNOWN_INDEX = _CATEGORY_INDEX[UNKNOWN_CATEGORY]
+
+
+class _Parser:
+    """Row -> period number and category index, memoized per distinct date / label"""
+
+    def __init__(self, period):
+        if period not in PERIODS:
+            raise ValueError(f"Unknown period: {period}")
+        self.period = period
+        self.matcher = get_matcher()
+        self._periods = {}
+        self._categories = {}
+
+    def period_of(self, value):
+        found = self._periods.get(value)
+        if found is None and value:
+            try:
+                day = date.fromisoformat(value[:10])
+            except ValueError:
+                return None
+            found = day.toordinal() // 7 if self.period == "week" else day.year * 12 + day.month - 1
+            self._periods[value] = found
+        return found
+
+    def category_of(self, row):
+        """Index into CATEGORY_CODES: category_code, else the source label, else the matcher"""
+        code = row.get('category_code')
+        if code is None:
+            label = row.get('merchant_category')
+            code = self._categories.get(label) if label else None
+            if code is None:
+                code = self.matcher.canonical_category(label)
+                if code is not None:
+                    self._categories[label] = code
+                else:
+                    code = self.matcher.match(row.get('merchant_name') or row.get('description'), label).category_code
+        return _CATEGORY_INDEX.get(code, _UNKNOWN_INDEX)
+
+
+def flatten(customers, period="week"):
+    """
+    Parse a population into flat arrays
+    Returns:
+        (purchases, deposits) where purchases is (customer, period, category, amount)
+        and deposits is (customer, period, amount), each a tuple of NumPy arrays
+    """
+    parser = _Parser(period)
+    period_of = parser.period_of
+    category_of = parser.category_of
+    p_cust, p_period, p_cat, p_amount = [], [], [], []
+    d_cust, d_period, d_amount = [], [], []
+    for c, customer in enumerate(customers):
+        for row in customer.get('purchases', ()):
+            number = period_of(row.get('purchase_date'))
+            if number is not None:
+                p_cust.append(c)
+                p_period.append(number)
+                p_cat.append(category_of(row))
+                p_amount.append(row.get('amount') or 0)
+        for row in customer.get('deposits', ()):
+            number = period_of(row.get('transaction_date'))
+            if number is not None:
+                d_cust.append(c)
+                d_period.append(number)
+                d_amount.append(row.get('amount') or 0)
+
+    purchases = (np.asarray(p_cust, dtype=np.int64), np.asarray(p_period, dtype=np.int64),
+                 np.asarray(p_cat, dtype=np.int64), np.asarray(p_amount, dtype=np.float64))
+    deposits = (np.asarray(d_cust, dtype=np.int64), np.asarray(d_period, dtype=np.int64),
+                np.asarray(d_amount, dtype=np.float64))
+    return purchases, deposits
+
+
+def _chunk_rows(slot, cust, chunk, chunks):
+    """Row indices sorted by chunk, and where each chunk's rows start and end"""
+    position = slot[cust]
+    order = np.argsort(position, kind='stable')
+    bounds = np.searchsorted(position[order], np.arange(chunks + 1) * chunk)
+    return order, bounds
+
+
+def capacity_arrays(purchases, deposits, customers, sigma=SAVINGS_BAND_SIGMA, max_share=MAX_TRIM_SHARE,
+                    min_periods=MIN_PERIODS, chunk=SAVINGS_CHUNK):
+    """
+    Vectorized estimate over flat arrays (see flatten)
+    Args:
+        customers: population size
+        chunk: customers binned per tensor (sorted by history length)
+    Returns:
+        Dictionary of arrays: periods (C,), income_mean (C,), spend_mean (C, K),
+        spend_std (C, K), capacity (C, K)
+    """
+    p_cust, p_period, p_cat, p_amount = purchases
+    d_cust, d_period, d_amount = deposits
+    categories = len(CATEGORY_CODES)
+
+    # Each customer's history runs from their first to their last period
+    first = np.full(customers, np.iinfo(np.int64).max)
+    last = np.full(customers, np.iinfo(np.int64).min)
+    for cust, period in ((p_cust, p_period), (d_cust, d_period)):
+        np.minimum.at(first, cust, period)
+        np.maximum.at(last, cust, period)
+    active = last >= first
+    periods = np.where(active, last - first + 1, 0)
+    first = np.where(active, first, 0)
+
+    # Customers in order of history length; slot = position in that order
+    by_width = np.argsort(periods, kind='stable')
+    slot = np.empty(customers, dtype=np.int64)
+    slot[by_width] = np.arange(customers)
+    chunks = -(-customers // chunk)
+    p_order, p_bounds = _chunk_rows(slot, p_cust, chunk, chunks)
+    d_order, d_bounds = _chunk_rows(slot, d_cust, chunk, chunks)
+
+    income_mean = np.zeros(customers)
+    spend_mean = np.zeros((customers, categories))
+    spend_std = np.zeros((customers, categories))
+    for k in range(chunks):
+        members = by_width[k * chunk:(k + 1) * chunk]
+        size = len(members)
+        width = max(int(periods[members].max()), 1)
+        n = np.maximum(periods[members], 1)[:, None]
+
+        rows = p_order[p_bounds[k]:p_bounds[k + 1]]
+        local = slot[p_cust[rows]] - k * chunk
+        p_rel = p_period[rows] - first[p_cust[rows]]
+        spend = np.bincount((local * width + p_rel) * categories + p_cat[rows], weights=p_amount[rows],
+                            minlength=size * width * categories).reshape(size, width, categories)
+        rows = d_order[d_bounds[k]:d_bounds[k + 1]]
+        local = slot[d_cust[rows]] - k * chunk
+        income = np.bincount(local * width + (d_period[rows] - first[d_cust[rows]]), weights=d_amount[rows],
+                             minlength=size * width).reshape(size, width)
+
+        # Padding periods are zero, so plain sums divided by each customer's own count
+        mean = spend.sum(axis=1) / n
+        variance = np.einsum('cwk,cwk->ck', spend, spend) / n - mean ** 2
+        variance *= n / np.maximum(n - 1, 1)  # sample variance
+        spend_mean[members] = mean
+        spend_std[members] = np.sqrt(np.maximum(variance, 0.0))
+        income_mean[members] = income.sum(axis=1) / n[:, 0]
+
+    capacity = np.minimum(max_share * spend_mean, sigma * spend_std)
+    capacity[periods < min_periods] = 0.0
+    return {
+        "periods": periods,
+        "income_mean": income_mean,
+        "spend_mean": spend_mean,
+        "spend_std": spend_std,
+        "capacity": capacity,
+    }
+
+
+def estimate_capacity(customers, period="week", sigma=SAVINGS_BAND_SIGMA, max_share=MAX_TRIM_SHARE,
+                      min_periods=MIN_PERIODS):
+    """
+    Savings capacity for each customer
+    Args:
+        customers: list of customer_data dicts (deposits, purchases)
+        period: "week" or "month"
+        sigma: band width in standard deviations
+        max_share: largest share of a category's mean spend to trim
+        min_periods: history needed before recommending anything
+    Returns:
+        List of dicts (same order): customer_id, period, periods, capacity,
+        income_mean, spend_mean, by_category {code: amount per period}, and
+        insufficient_history
+    """
+    purchases, deposits = flatten(customers, period)
+    arrays = capacity_arrays(purchases, deposits, len(customers), sigma, max_share, min_periods)
+
+    # Convert to Python floats once rather than per element
+    capacity = np.round(arrays["capacity"], 2).tolist()
+    totals = np.round(arrays["capacity"].sum(axis=1), 2).tolist()
+    spend = np.round(arrays["spend_mean"].sum(axis=1), 2).tolist()
+    income = np.round(arrays["income_mean"], 2).tolist()
+    periods = arrays["periods"].tolist()
+
+    results = []
+    for c, customer in enumerate(customers):
+        results.append({
+            "customer_id": customer.get('customer_id'),
+            "period": period,
+            "periods": periods[c],
+            "capacity": totals[c],
+            "income_mean": income[c],
+            "spend_mean": spend[c],
+            "by_category": {code: amount for code, amount in zip(CATEGORY_CODES, capacity[c]) if amount},
+            "insufficient_history": periods[c] < min_periods,
+        })
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Estimate how much each customer can set aside unnoticed")
+    parser.add_argument("paths", nargs="+", help="customer_data JSON files (customers/*.json, *_raw.json)")
+    parser.add_argument("--period", choices=PERIODS, default="week")
+    parser.add_argument("--sigma", type=float, default=SAVINGS_BAND_SIGMA)
+    parser.add_argument("--max-share", type=float, default=MAX_TRIM_SHARE)
+    parser.add_argument("--json", action="store_true")
+    args = parser.parse_args(argv)
+
+    customers = []
+    for path in args.paths:
+        with open(path, 'r') as f:
+            customers.append(json.load(f))
+
+    results = estimate_capacity(customers, args.period, args.sigma, args.max_share)
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return 0
+
+    for result in results:
+        note = " (not enough history)" if result["insufficient_history"] else ""
+        print(f"\n💰 {result['customer_id']}: ${result['capacity']:,.2f} per {args.period}{note}")
+        print(f"   income ${result['income_mean']:,.2f}, spend ${result['spend_mean']:,.2f} "
+              f"over {result['periods']} {args.period}s")
+        for code, amount in sorted(result["by_category"].items(), key=lambda item: -item[1]):
+            print(f"   {CATEGORIES[code]['label']:<18} ${amount:>9,.2f}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
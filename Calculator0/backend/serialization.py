@@ -0,0 +1,100 @@
+"""
+JSON serialization for backend artifacts
+One place that decides how data becomes JSON bytes and back:
+
+    dumps(obj)                compact UTF-8 bytes, for everything machines read
+                              (plaintext before encryption, encrypted packages, caches)
+    dumps(obj, pretty=True)   2-space indented, for files people open (raw and
+                              decrypted dumps, the customer mapping, customer_ids.json)
+    canonical(obj)            sorted keys, compact, ASCII: stable input for hashing
+    loads(data)               bytes or str
+
+dumps/loads use orjson when it is installed (several times faster on the
+customer_data structure) and the standard library otherwise; JSON_BACKEND=json
+forces the standard library. Values orjson refuses (integers over 64 bits, custom
+types handled by `default`) fall back to the standard library, so both backends
+accept the same input. canonical() always uses the standard library: hashes must not
+change with the installed packages, and existing cache keys stay valid.
+
+    python benchmarks/bench_serialization.py
+"""
+
+import json
+import os
+
+# "auto" (orjson if installed), "orjson" or "json"
+JSON_BACKEND = os.getenv("JSON_BACKEND", "auto")
+
+_orjson = None
+_resolved = False
+
+
+def _accelerated():
+    """The orjson module, or None (resolved on first use so importing this module stays cheap)"""
+    global _orjson, _resolved
+    if not _resolved:
+        _resolved = True
+        if JSON_BACKEND != "json":
+            try:
+                import orjson
+                _orjson = orjson
+            except ImportError:
+                if JSON_BACKEND == "orjson":
+                    raise
+    return _orjson
+
+
+def backend():
+    """Name of the library dumps/loads use"""
+    return "orjson" if _accelerated() else "json"
+
+
+def dumps(obj, pretty=False, default=None):
+    """
+    Serialize to UTF-8 JSON bytes
+    Args:
+        obj: JSON-compatible data
+        pretty: indent for human readers (otherwise compact)
+        default: called for objects that aren't JSON types, as in json.dumps
+    Returns:
+        bytes
+    """
+    orjson = _accelerated()
+    if orjson is not None:
+        option = orjson.OPT_INDENT_2 if pretty else 0
+        try:
+            return orjson.dumps(obj, default=default, option=option | orjson.OPT_NON_STR_KEYS)
+        except TypeError:
+            pass  # e.g. an int over 64 bits; the standard library handles it
+    if pretty:
+        return json.dumps(obj, indent=2, ensure_ascii=False, default=default).encode()
+    return json.dumps(obj, separators=(",", ":"), ensure_ascii=False, default=default).encode()
+
+
+def loads(data):
+    """Parse JSON from bytes or str"""
+    orjson = _accelerated()
+    if orjson is not None:
+        try:
+            return orjson.loads(data)
+        except orjson.JSONDecodeError:
+            pass  # e.g. NaN or big integers, which the standard library accepts
+    return json.loads(data)
+
+
+def canonical(obj):
+    """Deterministic text for hashing: sorted keys, no whitespace, ASCII, str() for other types"""
+    return json.dumps(obj, sort_keys=True, separators=(",", ":"), default=str)
+
+
+def dump_file(obj, path, pretty=False):
+    """Write obj to path (atomically: through a temporary file)"""
+    tmp = f"{path}.tmp"
+    with open(tmp, 'wb') as f:
+        f.write(dumps(obj, pretty=pretty))
+    os.replace(tmp, path)
+
+
+def load_file(path):
+    with open(path, 'rb') as f:
+        return loads(f.read())
@@ -0,0 +1,291 @@
+"""
+Customer statement report
+Prints a customer's account, the first (or latest) N purchases and deposits in a
+date range, and totals. Rows are selected with a bounded heap instead of sorting
+the whole history, totals are computed in one pass, and output is written as it
+is produced, so statements stay fast for customers with very long histories.
+
+Usage:
+    python statement_report.py Sarah [--limit 20] [--from 2025-01-01] [--to 2025-06-30]
+                               [--newest] [--json] [--source auto|local|api] [--account <id>]
+
+--source auto reads the customer_<id>_raw.json dump written by encryption.py when
+it exists and falls back to the Nessie API. Both sources cover all of the
+customer's accounts; --account <account id> limits the statement to one.
+"""
+
+import argparse
+import heapq
+import json
+import os
+import sys
+from itertools import islice
+
+import config
+from customer_directory import CustomerDirectory
+from nessie_client import iter_pages
+import serialization
+
+BASE_URL = "http://api.nessieisreal.com"
+API_KEY = config.get("NESSIE_API_KEY")
+
+DEFAULT_LIMIT = 20
+DATA_DIR = "encrypted_data"
+
+DATE_KEYS = {"purchases": "purchase_date", "deposits": "transaction_date"}
+
+
+def fetch(endpoint):
+    import requests
+    separator = '&' if '?' in endpoint else '?'
+    return requests.get(f"{BASE_URL}{endpoint}{separator}key={API_KEY}").json()
+
+# ============================================================================
+# SELECTION AND AGGREGATES
+# ============================================================================
+
+def in_range(rows, date_key, start=None, end=None):
+    """Lazily filter rows to start <= date <= end (ISO date strings compare as text)"""
+    for row in rows:
+        date = row.get(date_key) or ''
+        if start and date < start:
+            continue
+        if end and date[:len(end)] > end:
+            continue
+        yield row
+
+
+def select_rows(rows, date_key, limit=DEFAULT_LIMIT, newest=False):
+    """
+    The `limit` earliest (or newest) rows by date
+    Uses a heap of size `limit` (O(n log k)); limit=None returns every row in order.
+    """
+    key = lambda row: row.get(date_key) or ''
+    if limit is None:
+        return sorted(rows, key=key, reverse=newest)
+    pick = heapq.nlargest if newest else heapq.nsmallest
+    return pick(limit, rows, key=key)
+
+
+def aggregate(rows, date_key):
+    """Count, total, first and last date in a single pass"""
+    count = 0
+    total = 0.0
+    first = last = None
+    for row in rows:
+        count += 1
+        total += row.get('amount') or 0
+        date = row.get(date_key)
+        if date:
+            if first is None or date < first:
+                first = date
+            if last is None or date > last:
+                last = date
+    return {"count": count, "total": round(total, 2), "first_date": first, "last_date": last}
+
+
+def build_statement(customer, account, purchases, deposits, start=None, end=None,
+                    limit=DEFAULT_LIMIT, newest=False):
+    """
+    Statement dict for one customer
+    Args:
+        customer: directory entry (customer_id, first_name, last_name, address)
+        account: account dict (nickname, balance, rewards)
+        purchases / deposits: transaction rows
+        start / end: optional ISO date bounds (inclusive)
+        limit: rows to list per section (None = all)
+        newest: list the latest rows instead of the earliest
+    """
+    statement = {
+        "customer": {
+            "customer_id": customer['customer_id'],
+            "name": f"{customer['first_name']} {customer['last_name']}",
+            "address": customer.get('address', {}),
+        },
+        "account": {
+            "nickname": account.get('nickname'),
+            "balance": account.get('balance', 0),
+            "rewards": account.get('rewards', 0),
+        },
+        "range": {"from": start, "to": end},
+    }
+    for section, rows in (("purchases", purchases), ("deposits", deposits)):
+        date_key = DATE_KEYS[section]
+        if start or end:
+            rows = list(in_range(rows, date_key, start, end))
+        statement[section] = {
+            "summary": aggregate(rows, date_key),
+            "rows": select_rows(rows, date_key, limit, newest),
+        }
+
+    statement["totals"] = {
+        "spent": statement["purchases"]["summary"]["total"],
+        "deposited": statement["deposits"]["summary"]["total"],
+        "net": round(statement["deposits"]["summary"]["total"] - statement["purchases"]["summary"]["total"], 2),
+    }
+    return statement
+
+# ============================================================================
+# OUTPUT
+# ============================================================================
+
+def iter_text(statement):
+    """Yield the text statement line by line"""
+    customer = statement['customer']
+    account = statement['account']
+
+    yield f"\n{'='*80}"
+    yield f"Customer: {customer['name']}"
+    yield f"ID: {customer['customer_id']}"
+    yield f"Address: {customer['address'].get('city', 'N/A')}, {customer['address'].get('state', 'N/A')}"
+    yield f"{'='*80}"
+    yield f"Account: {account['nickname']}"
+    yield f"Balance: ${account['balance']:,.2f}"
+    yield f"Rewards: {account['rewards']}\n"
+
+    for section, icon, title in (("purchases", "📦", "PURCHASES"), ("deposits", "💰", "DEPOSITS")):
+        date_key = DATE_KEYS[section]
+        block = statement[section]
+        yield f"{icon} {title} ({block['summary']['count']} total):"
+        yield "-" * 80
+        if not block['rows']:
+            yield f"No {section} found."
+        for row in block['rows']:
+            yield f"{row.get(date_key)}: ${row.get('amount') or 0:>8.2f} - {row.get('description', 'N/A')}"
+        yield ""
+
+    totals = statement['totals']
+    yield f"{'='*80}"
+    yield f"Total Spent: ${totals['spent']:,.2f}"
+    yield f"Total Deposited: ${totals['deposited']:,.2f}"
+    yield f"Net: ${totals['net']:,.2f}"
+    yield f"{'='*80}"
+
+
+def write_text(statement, out=sys.stdout):
+    for line in iter_text(statement):
+        out.write(line + "\n")
+
+
+def write_json(statement, out=sys.stdout):
+    # json.dump encodes incrementally, so large row lists are never joined in memory
+    json.dump(statement, out, indent=2)
+    out.write("\n")
+
+# ============================================================================
+# DATA SOURCES
+# ============================================================================
+
+def account_id(account):
+    """Id of an API account (_id) or of a customer_data account summary (account_id)"""
+    return account.get('account_id') or account.get('_id')
+
+
+def load_local(customer_id, data_dir=DATA_DIR):
+    """Accounts, purchases, deposits from the raw dump written by encryption.py, or None"""
+    path = os.path.join(data_dir, f"customer_{customer_id}_raw.json")
+    if not os.path.exists(path):
+        return None
+    data = serialization.load_file(path)
+    # Dumps from before multi-account fetching only have the one account
+    accounts = data.get('accounts') or [data.get('account', {})]
+    return accounts, data.get('purchases', []), data.get('deposits', [])
+
+
+def load_remote(customer_id):
+    """Accounts, purchases, deposits of every account from the Nessie API, or None if there is no account"""
+    accounts = list(iter_pages(fetch, f"/customers/{customer_id}/accounts"))
+    if not accounts:
+        return None
+    rows = {"purchases": [], "deposits": []}
+    for account in accounts:
+        for kind, kind_rows in rows.items():
+            for row in iter_pages(fetch, f"/accounts/{account['_id']}/{kind}"):
+                row['account_id'] = account['_id']
+                kind_rows.append(row)
+    return accounts, rows["purchases"], rows["deposits"]
+
+
+def scope_records(accounts, purchases, deposits, only=None):
+    """
+    (account, purchases, deposits) for the statement
+    only=None keeps every account, with nicknames joined and balance and rewards
+    summed; otherwise just that account id and its rows. Returns None for an
+    unknown account.
+    """
+    if only is not None:
+        accounts = [a for a in accounts if account_id(a) == only]
+        if not accounts:
+            return None
+        # Rows without an account_id come from a single-account dump
+        purchases = [r for r in purchases if r.get('account_id', only) == only]
+        deposits = [r for r in deposits if r.get('account_id', only) == only]
+    if len(accounts) == 1:
+        return accounts[0], purchases, deposits
+    account = {
+        "nickname": ", ".join(a.get('nickname') or account_id(a) or '?' for a in accounts),
+        "balance": sum(a.get('balance') or 0 for a in accounts),
+        "rewards": sum(a.get('rewards') or 0 for a in accounts),
+    }
+    return account, purchases, deposits
+
+
+def resolve_customer(directory, query):
+    """Customer by exact id, else the most recent name/prefix match"""
+    customer = directory.get(query)
+    if customer:
+        return customer
+    matches = directory.find(query, limit=1)
+    return matches[0] if matches else None
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Print a customer's account statement")
+    parser.add_argument("customer", nargs="?", default="Sarah", help="customer id, or name / name prefix")
+    parser.add_argument("--limit", type=int, default=DEFAULT_LIMIT, help="rows per section (0 = all)")
+    parser.add_argument("--from", dest="start", help="first date to include (YYYY-MM-DD)")
+    parser.add_argument("--to", dest="end", help="last date to include (YYYY-MM-DD)")
+    parser.add_argument("--newest", action="store_true", help="list the latest rows instead of the earliest")
+    parser.add_argument("--json", action="store_true", help="write the statement as JSON")
+    parser.add_argument("--source", choices=("auto", "local", "api"), default="auto")
+    parser.add_argument("--account", help="only this account id (default: all of the customer's accounts)")
+    parser.add_argument("--data-dir", default=DATA_DIR)
+    args = parser.parse_args(argv)
+
+    directory = CustomerDirectory(fetch=fetch)
+    directory.ensure_fresh()
+
+    customer = resolve_customer(directory, args.customer)
+    if not customer:
+        names = [c['first_name'] for c in islice(directory.iter_all(), 50)]
+        print(f"Customer '{args.customer}' not found.")
+        print(f"Available customers: {names}")
+        return 1
+
+    records = None
+    if args.source in ("auto", "local"):
+        records = load_local(customer['customer_id'], args.data_dir)
+    if records is None and args.source != "local":
+        records = load_remote(customer['customer_id'])
+    if records is None:
+        print(f"❌ No account data found for {customer['name']}!")
+        print("This customer might be from an old run. Use the latest customer IDs from customer_ids.json")
+        return 1
+
+    records = scope_records(*records, only=args.account)
+    if records is None:
+        print(f"❌ {customer['name']} has no account {args.account}")
+        return 1
+
+    account, purchases, deposits = records
+    statement = build_statement(customer, account, purchases, deposits, args.start, args.end,
+                                limit=args.limit or None, newest=args.newest)
+    if args.json:
+        write_json(statement)
+    else:
+        write_text(statement)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
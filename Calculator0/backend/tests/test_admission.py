@@ -0,0 +1,72 @@
+import sys
+import threading
+from pathlib import Path
+
+# Add backend root so imports like admission work when running from tests/
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import pytest
+
+from admission import AdmissionController, ConcurrencyLimiter, RateLimiter, Rejected
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_bucket_allows_burst_then_refills():
+    clock = FakeClock()
+    limiter = RateLimiter(rate=1, burst=3, clock=clock)
+
+    assert [limiter.check("ip") for _ in range(3)] == [0, 0, 0]
+    assert limiter.check("ip") == pytest.approx(1.0)
+
+    clock.now = 1.0
+    assert limiter.check("ip") == 0
+
+
+def test_buckets_are_per_key_and_bounded():
+    limiter = RateLimiter(rate=1, burst=1, max_keys=2, clock=FakeClock())
+    limiter.check("a")
+    assert limiter.check("b") == 0
+    limiter.check("c")
+    assert len(limiter) == 2
+    # "a" was evicted so it starts with a full bucket again
+    assert limiter.check("a") == 0
+
+
+def test_rate_limit_rejects_with_429():
+    controller = AdmissionController(user_rate=1, user_burst=1)
+    with controller.admit(user_id="u1", ip="1.2.3.4"):
+        pass
+    with pytest.raises(Rejected) as exc:
+        with controller.admit(user_id="u1", ip="1.2.3.4"):
+            pass
+    assert exc.value.status == 429
+    assert exc.value.retry_after_header == "1"
+
+
+def test_full_queue_rejects_immediately():
+    limiter = ConcurrencyLimiter(max_active=1, max_waiting=0, timeout=5)
+    assert limiter.acquire()
+    assert not limiter.acquire()
+    limiter.release()
+    assert limiter.acquire()
+
+
+def test_waiter_is_admitted_when_slot_frees():
+    limiter = ConcurrencyLimiter(max_active=1, max_waiting=1, timeout=5)
+    assert limiter.acquire()
+
+    result = []
+    waiter = threading.Thread(target=lambda: result.append(limiter.acquire()))
+    waiter.start()
+    limiter.release()
+    waiter.join(timeout=5)
+
+    assert result == [True]
+    assert limiter.active == 1
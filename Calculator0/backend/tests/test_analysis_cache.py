@@ -0,0 +1,57 @@
+import sys
+from pathlib import Path
+
+# Add backend root so imports like analysis_cache work when running from tests/
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from analysis import run_analysis
+from analysis_cache import AnalysisCache, fingerprint
+
+DEPOSITS = [{"transaction_date": "2025-08-10", "amount": 2850.0, "description": "Payroll"}]
+PURCHASES = [
+    {"purchase_date": "2025-08-11", "amount": 95.3, "merchant_name": "Safeway"},
+    {"purchase_date": "2025-08-13", "amount": 12.5, "merchant_name": "Starbucks"},
+]
+
+
+def test_fingerprint_ignores_row_and_key_order():
+    shuffled = [dict(reversed(list(p.items()))) for p in reversed(PURCHASES)]
+    assert fingerprint(DEPOSITS, PURCHASES, "v1") == fingerprint(DEPOSITS, shuffled, "v1")
+
+
+def test_fingerprint_changes_with_data_and_version():
+    base = fingerprint(DEPOSITS, PURCHASES, "v1", "model")
+    assert fingerprint(DEPOSITS, PURCHASES[:1], "v1", "model") != base
+    assert fingerprint(DEPOSITS, PURCHASES, "v2", "model") != base
+    assert fingerprint(PURCHASES, DEPOSITS, "v1", "model") != base
+
+
+def test_cache_ttl_and_size_eviction(tmp_path):
+    cache = AnalysisCache(db_path=str(tmp_path / "cache.db"), ttl=3600, max_entries=2)
+    cache.put("a", {"analysis": "A"})
+    cache.put("b", {"analysis": "B"})
+    assert cache.get("a") == {"analysis": "A"}  # "b" is now least recently used
+    cache.put("c", {"analysis": "C"})
+
+    assert cache.get("b") is None
+    assert cache.stats()["entries"] == 2
+
+    expired = AnalysisCache(db_path=str(tmp_path / "cache.db"), ttl=-1)
+    assert expired.get("a") is None
+
+
+def test_run_analysis_only_calls_model_on_miss(tmp_path):
+    cache = AnalysisCache(db_path=str(tmp_path / "cache.db"))
+    calls = []
+
+    def fake_generate(prompt, model):
+        calls.append(model)
+        return "Risk Level: Low"
+
+    data = {"deposits": DEPOSITS, "purchases": PURCHASES}
+    first = run_analysis(data, cache=cache, generate=fake_generate)
+    second = run_analysis(data, cache=cache, generate=fake_generate)
+
+    assert first[:2] == ("Risk Level: Low", False)
+    assert second[:2] == ("Risk Level: Low", True)
+    assert len(calls) == 1
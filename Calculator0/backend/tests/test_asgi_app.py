@@ -0,0 +1,145 @@
+import asyncio
+import sys
+from pathlib import Path
+
+# Add backend root so imports like asgi_app work when running from tests/
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import pytest
+
+import analysis
+import app as flask_app
+import asgi_app
+import db
+from admission import AdmissionController
+
+
+@pytest.fixture
+def clients(tmp_path, monkeypatch):
+    """Flask and Quart test clients sharing one fresh database and generous limits"""
+    monkeypatch.setattr(db, "DB_PATH", str(tmp_path / "users.db"))
+    monkeypatch.setattr(db, "_initialized", False)
+    for module in (flask_app, asgi_app):
+        monkeypatch.setattr(module, "auth_admission", AdmissionController(user_rate=0.001, user_burst=3))
+    return flask_app.app.test_client(), asgi_app.app.test_client()
+
+
+def flask_call(client, method, path, body=None):
+    response = client.open(path, method=method, json=body)
+    return response.status_code, response.get_json(), response.headers.get('Retry-After')
+
+
+def quart_call(client, method, path, body=None):
+    async def call():
+        response = await client.open(path, method=method, json=body)
+        return response.status_code, await response.get_json(), response.headers.get('Retry-After')
+    return asyncio.run(call())
+
+
+def both(clients, method, path, body=None):
+    flask_client, quart_client = clients
+    return flask_call(flask_client, method, path, body), quart_call(quart_client, method, path, body)
+
+
+def test_auth_endpoints_match(clients, tmp_path, monkeypatch):
+    steps = [
+        ("POST", "/api/auth/setup", {"user_id": "u1", "password": "1234", "customer_id": "c1"}),
+        ("POST", "/api/auth/setup", {"user_id": "u1", "password": "1234", "customer_id": "c1"}),
+        ("POST", "/api/auth/setup", {"user_id": "u2", "password": "1234"}),
+        ("POST", "/api/auth/login", {"user_id": "u1", "password": "0000"}),
+        ("POST", "/api/auth/login", {"user_id": "u1"}),
+        ("POST", "/api/auth/verify", {"user_id": "u1", "password": "9999"}),
+        ("POST", "/api/auth/update-password", {"user_id": "u1", "old_password": "nope", "new_password": "5678"}),
+        ("POST", "/api/auth/update-password", {"user_id": "u1", "old_password": "1234", "new_password": "5678"}),
+        ("POST", "/api/auth/login", {"user_id": "u1", "password": "5678"}),
+        ("POST", "/api/auth/delete-account", {"user_id": "u1", "password": "5678"}),
+        ("POST", "/api/auth/delete-account", {"user_id": "u1", "password": "5678", "confirm": "DELETE"}),
+        ("POST", "/api/auth/verify", {"user_id": "u1", "password": "5678"}),
+    ]
+    flask_client, quart_client = clients
+    results = {}
+    for name, client, call in (("flask", flask_client, flask_call), ("quart", quart_client, quart_call)):
+        # Same steps against an empty database for each API
+        monkeypatch.setattr(db, "DB_PATH", str(tmp_path / f"{name}.db"))
+        monkeypatch.setattr(db, "_initialized", False)
+        for module in (flask_app, asgi_app):
+            monkeypatch.setattr(module, "auth_admission", AdmissionController(user_burst=100))
+        results[name] = [call(client, method, path, body) for method, path, body in steps]
+
+    assert results["flask"] == results["quart"]
+    assert [status for status, _, _ in results["flask"]] == [200, 409, 400, 200, 400, 200, 401, 200, 200, 400, 200, 200]
+
+
+def test_login_and_verify_match(clients):
+    flask_client, quart_client = clients
+    for client, call in ((flask_client, flask_call), (quart_client, quart_call)):
+        call(client, "POST", "/api/auth/setup", {"user_id": "u1", "password": "1234", "customer_id": "c1"})
+
+    flask_result, quart_result = both(clients, "POST", "/api/auth/login", {"user_id": "u1", "password": "1234"})
+    assert flask_result == quart_result
+    assert flask_result[1]["customer_id"] == "c1"
+
+    flask_result, quart_result = both(clients, "POST", "/api/auth/verify", {"user_id": "u1", "password": "1234"})
+    assert flask_result == quart_result
+    assert flask_result[1]["valid"] is True
+
+    flask_result, quart_result = both(clients, "GET", "/api/users/list")
+    assert flask_result[0] == quart_result[0] == 200
+    assert [u["user_id"] for u in flask_result[1]["users"]] == ["u1"]
+
+
+def test_admission_rejections_match(clients):
+    flask_client, quart_client = clients
+    body = {"user_id": "u1", "password": "bad"}
+    flask_results = [flask_call(flask_client, "POST", "/api/auth/login", body) for _ in range(4)]
+    quart_results = [quart_call(quart_client, "POST", "/api/auth/login", body) for _ in range(4)]
+
+    assert [r[0] for r in flask_results] == [r[0] for r in quart_results] == [401, 401, 401, 429]
+    assert flask_results[-1][1] == quart_results[-1][1]
+    assert flask_results[-1][2] and quart_results[-1][2]
+
+
+def test_health(clients):
+    flask_result, quart_result = both(clients, "GET", "/api/health")
+    assert flask_result[0] == quart_result[0] == 200
+    assert flask_result[1]["status"] == quart_result[1]["status"] == "healthy"
+
+
+def test_analysis_requires_credentials(clients, monkeypatch):
+    calls = []
+
+    def fake_analysis(transaction_data, model=None, customer_id=None):
+        calls.append(customer_id)
+        return "Risk Level: Low", False, "f" * 64
+
+    monkeypatch.setattr(analysis, "run_analysis", fake_analysis)
+    flask_client, quart_client = clients
+    for client, call in ((flask_client, flask_call), (quart_client, quart_call)):
+        call(client, "POST", "/api/auth/setup", {"user_id": "u1", "password": "1234", "customer_id": "c1"})
+
+    transactions = {"deposits": [{"amount": 10}], "purchases": []}
+    anonymous = both(clients, "POST", "/api/analysis/run", {"transactions": transactions, "customer_id": "c9"})
+    wrong = both(clients, "POST", "/api/analysis/run", {"user_id": "u1", "password": "9999",
+                                                        "transactions": transactions})
+    assert [r[0] for r in anonymous + wrong] == [400, 400, 401, 401]
+    assert calls == []
+
+    # The customer comes from the verified user, not from the request
+    ok = both(clients, "POST", "/api/analysis/run", {"user_id": "u1", "password": "1234", "customer_id": "c9",
+                                                     "transactions": transactions})
+    assert ok[0] == ok[1]
+    assert ok[0][0] == 200 and ok[0][1]["analysis"] == "Risk Level: Low"
+    assert calls == ["c1", "c1"]
+
+
+def test_projection_rejects_bad_path_counts(clients):
+    transactions = {"deposits": [{"transaction_date": "2025-01-06", "amount": 500}],
+                    "purchases": [{"purchase_date": "2025-01-07", "amount": 100}]}
+    for paths in (-5, 0, 2.5, "many", True, [100]):
+        flask_result, quart_result = both(clients, "POST", "/api/projection/run", dict(transactions, paths=paths))
+        assert flask_result[0] == quart_result[0] == 400
+        assert flask_result[1]["error"] == quart_result[1]["error"]
+
+    ok = both(clients, "POST", "/api/projection/run", dict(transactions, paths="50"))
+    assert ok[0][0] == ok[1][0] == 200
+    assert ok[0][1]["projection"]["paths"] == ok[1][1]["projection"]["paths"] == 50
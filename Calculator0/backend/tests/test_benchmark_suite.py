@@ -0,0 +1,60 @@
+import json
+import sys
+from pathlib import Path
+
+# Add backend root and benchmarks/ (suite.py imports its sibling profiles.py) to the path
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BACKEND_DIR))
+sys.path.insert(0, str(BACKEND_DIR / "benchmarks"))
+
+import suite
+
+
+def result(relative, median_ms=1.0):
+    return {"relative": relative, "median_ms": median_ms, "best_ms": median_ms * 0.9}
+
+
+def test_check_flags_only_cases_over_the_threshold():
+    baselines = {"aes_encrypt/1k": result(2.0), "json_dumps/1k": result(10.0), "statistics/1k": result(0.1)}
+    results = {
+        "aes_encrypt/1k": result(2.8),     # 40% slower relative to the reference: within 50%
+        "json_dumps/1k": result(16.0),     # 60% slower
+        "statistics/1k": result(0.05),     # faster
+    }
+
+    assert suite.check(results, baselines, threshold=0.5) == ["json_dumps/1k"]
+    assert results["aes_encrypt/1k"]["ratio"] == 1.4
+    assert results["json_dumps/1k"]["baseline_relative"] == 10.0
+    assert results["statistics/1k"]["ratio"] == 0.5
+    assert suite.check(results, baselines, threshold=0.25) == ["aes_encrypt/1k", "json_dumps/1k"]
+
+
+def test_check_skips_cases_without_a_usable_baseline():
+    results = {"new_case/1k": result(5.0), "json_dumps/1k": result(5.0)}
+    # An absolute-only baseline from before the reference workload is not comparable
+    baselines = {"json_dumps/1k": {"best_ms": 1.0, "median_ms": 1.1}}
+
+    assert suite.check(results, baselines, threshold=0.5) == []
+    assert "ratio" not in results["new_case/1k"] and "ratio" not in results["json_dumps/1k"]
+
+
+def test_check_ignores_jitter_on_sub_microsecond_cases():
+    baselines = {"unwrap_list/1k": result(0.003, 0.0003), "unwrap_list/100k": result(0.003, 0.0003)}
+    results = {"unwrap_list/1k": result(0.006, 0.0006), "unwrap_list/100k": result(6.0, 0.6)}
+
+    assert suite.check(results, baselines, threshold=0.5) == ["unwrap_list/100k"]
+    assert results["unwrap_list/1k"]["ratio"] == 2.0
+
+
+def test_cases_are_timed_against_the_reference():
+    median, best, runs, relative = suite.measure(lambda: [suite.reference() for _ in range(3)], min_seconds=0.05)
+    assert best <= median and runs >= 3
+    assert 2 < relative < 4.5
+
+
+def test_committed_baselines_cover_every_case():
+    with open(suite.BASELINE_FILE, 'r') as f:
+        baselines = json.load(f)["results"]
+    covered = {entry["case"] for entry in baselines.values()}
+    assert set(suite.CASES) <= covered
+    assert all(entry.get("relative") for entry in baselines.values())
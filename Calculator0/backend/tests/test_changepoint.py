@@ -0,0 +1,68 @@
+import sys
+from datetime import date, timedelta
+from pathlib import Path
+
+# Add backend root so imports like changepoint work when running from tests/
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from changepoint import ChangeDetector, DetectorStore
+
+START = date(2025, 1, 6)
+
+
+def history(weeks, income, spend):
+    """Biweekly paychecks and a weekly grocery run; income(week) / spend(week) give the amounts"""
+    data = {"deposits": [], "purchases": []}
+    for week in range(weeks):
+        day = (START + timedelta(days=7 * week)).isoformat()
+        if week % 2 == 0:
+            data["deposits"].append({"transaction_date": day, "amount": income(week)})
+        data["purchases"].append({"purchase_date": day, "amount": spend(week)})
+    return data
+
+
+def test_sudden_income_cut_is_flagged_quickly():
+    data = history(30, income=lambda w: 2900 + 10 * (w % 3) if w < 16 else 300, spend=lambda w: 100 + w % 4)
+    events = ChangeDetector("c5").replay(data)
+    income = [e for e in events if e["series"] == "income"]
+    assert len(income) == 1
+    event = income[0]
+    # Flagged before the window has fully moved, so the magnitude is an early (partial) estimate
+    assert event["direction"] == "down" and event["magnitude"] < -500
+    changed = START + timedelta(weeks=16)
+    assert abs(date.fromisoformat(event["date"]) - changed) <= timedelta(days=14)
+    assert date.fromisoformat(event["detected"]) - changed <= timedelta(days=14)
+
+
+def test_recovery_in_spend_and_steady_history_is_quiet():
+    quiet = ChangeDetector("c1").replay(history(30, income=lambda w: 2900, spend=lambda w: 100 + w % 4))
+    assert quiet == []
+
+    recovery = ChangeDetector("c4").replay(history(30, income=lambda w: 2000, spend=lambda w: 40 if w < 15 else 110))
+    assert [(e["series"], e["direction"]) for e in recovery] == [("spend", "up")]
+
+
+def test_rows_with_bad_dates_are_skipped():
+    data = history(30, income=lambda w: 2900 + 10 * (w % 3) if w < 16 else 300, spend=lambda w: 100 + w % 4)
+    expected = ChangeDetector("c5").replay(data)
+
+    detector = ChangeDetector("c5")
+    assert detector.update({"transaction_date": "2025-13-45", "amount": 10}, "deposit") == []
+    assert detector.update({"purchase_date": 20250301, "amount": 10}, "purchase") == []
+    data["deposits"] += [{"transaction_date": "not a date", "amount": 5000}, {"transaction_date": 20250301}]
+    assert ChangeDetector("c5").replay(data) == expected
+
+
+def test_state_round_trips_through_the_store(tmp_path):
+    store = DetectorStore(db_path=str(tmp_path / "cp.db"))
+    data = history(30, income=lambda w: 2900 if w < 16 else 300, spend=lambda w: 100)
+    rows = sorted([(r["transaction_date"], "deposit", r) for r in data["deposits"]] +
+                  [(r["purchase_date"], "purchase", r) for r in data["purchases"]], key=lambda item: item[0])
+
+    events = []
+    for _, kind, row in rows:
+        # Reload the detector for every transaction, as a per-customer worker would
+        detector = store.load("c5")
+        events.extend(detector.update(row, kind))
+        store.save(detector)
+    assert events == ChangeDetector("c5").replay(data)
@@ -0,0 +1,74 @@
+import sys
+from pathlib import Path
+
+import pytest
+
+# Add backend root so imports like compression work when running from tests/
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import compression
+import serialization
+from benchmarks.profiles import synthetic_customer_data
+from encryption import SecureDataPipeline
+from pipeline import CompressStage, EncryptStage, StagePipeline
+
+
+@pytest.fixture(autouse=True)
+def dict_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(compression, "DICT_DIR", str(tmp_path / "dicts"))
+    monkeypatch.setattr(compression, "_dictionaries", {})
+
+
+def payload(rows, seed=0):
+    return serialization.dumps(synthetic_customer_data(rows, seed=seed, customer_id=f"c{seed}"))
+
+
+@pytest.mark.parametrize("codec", compression.available_codecs())
+def test_round_trip_and_header(codec):
+    data = payload(2000)
+    compressed, header = compression.compress_payload(data, codec)
+    assert header == {"compression": codec, "compression_level": compression.get_codec(codec).default_level}
+    assert len(data) / len(compressed) > 4
+    assert compression.decompress_payload(header, compressed) == data
+    assert compression.decompress_payload({}, data) == data
+
+
+def test_dictionary_helps_small_histories():
+    dictionary = compression.train_dictionary([payload(300, seed) for seed in range(1, 6)], "zlib")
+    data = payload(20, seed=9)
+    plain, _ = compression.compress_payload(data, "zlib", 9)
+    primed, header = compression.compress_payload(data, "zlib", 9, dictionary)
+    assert header["compression_dict"] == dictionary
+    assert len(primed) < 0.8 * len(plain)
+
+    # A fresh process finds the dictionary on disk by id
+    compression._dictionaries.clear()
+    assert compression.decompress_payload(header, primed) == data
+
+
+def test_invalid_options():
+    with pytest.raises(ValueError):
+        compression.compress_payload(b"{}", "snappy")
+    with pytest.raises(ValueError):
+        compression.compress_payload(b"{}", "zlib", level=12)
+    with pytest.raises(ValueError):
+        compression.train_dictionary([b"{}"], "lzma")
+
+
+def test_codec_interface_is_abstract():
+    with pytest.raises(TypeError):
+        compression.Codec()
+
+
+def test_pipeline_compresses_before_encrypting_and_reports_ratio():
+    secure = SecureDataPipeline(api_key=None)
+    data = synthetic_customer_data(1000)
+    stages = StagePipeline([CompressStage(codec="zlib", level=9), EncryptStage(secure)])
+    plaintext = serialization.dumps(data)
+    ctx = stages.run({"customer_id": "c0", "payload": plaintext, "files": {}})
+
+    package = ctx['encrypted_package']
+    assert package["compression"] == "zlib" and package["compression_level"] == 9
+    assert secure.aes_decrypt(package) == data
+    assert stages.stats()["compress"]["ratio"] > 4
+    assert "x)" in stages.report()
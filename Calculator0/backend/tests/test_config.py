@@ -0,0 +1,48 @@
+import os
+import sys
+from pathlib import Path
+
+# Add backend root so imports like config work when running from tests/
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import config
+
+
+def test_load_env_parses_and_keeps_existing(tmp_path, monkeypatch):
+    env_file = tmp_path / ".env"
+    env_file.write_text(
+        "# comment\n"
+        "export CFG_TEST_A=plain # trailing comment\n"
+        "CFG_TEST_B=\"quoted # not a comment\"\n"
+        "CFG_TEST_C='single'\n"
+        "CFG_TEST_KEEP=from-file\n"
+        "not a pair\n"
+    )
+    monkeypatch.setenv("CFG_TEST_KEEP", "from-env")
+    for name in ("CFG_TEST_A", "CFG_TEST_B", "CFG_TEST_C"):
+        monkeypatch.delenv(name, raising=False)
+
+    assert config.load_env(str(env_file)) == str(env_file)
+    assert os.environ["CFG_TEST_A"] == "plain"
+    assert os.environ["CFG_TEST_B"] == "quoted # not a comment"
+    assert os.environ["CFG_TEST_C"] == "single"
+    assert os.environ["CFG_TEST_KEEP"] == "from-env"
+    for name in ("CFG_TEST_A", "CFG_TEST_B", "CFG_TEST_C"):
+        monkeypatch.delenv(name)
+
+
+def test_analysis_reads_the_gemini_key_through_config(tmp_path, monkeypatch):
+    import importlib
+    import analysis
+
+    monkeypatch.delenv("GEMINI_API_KEY", raising=False)
+    monkeypatch.setattr(config, "_loaded", False)
+    monkeypatch.setattr(config, "BACKEND_DIR", str(tmp_path))
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / ".env").write_text("GEMINI_API_KEY=from-dotenv\n")
+
+    try:
+        assert importlib.reload(analysis).GEMINI_API_KEY == "from-dotenv"
+    finally:
+        monkeypatch.delenv("GEMINI_API_KEY", raising=False)
+        importlib.reload(analysis)
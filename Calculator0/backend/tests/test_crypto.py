@@ -0,0 +1,76 @@
+import base64
+import os
+import sys
+from pathlib import Path
+
+import pytest
+from cryptography.exceptions import InvalidTag
+
+# Add backend root so imports like crypto work when running from tests/
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from crypto import CIPHERS, AEADBackend, CipherBackend, decrypt_package, encrypt_package
+
+
+@pytest.mark.parametrize("method", list(CIPHERS))
+def test_round_trip(method):
+    key = os.urandom(32)
+    for plaintext in (b"", b"x", os.urandom(4097)):
+        package = encrypt_package(key, plaintext, method)
+        assert package["encryption_method"] == method
+        assert decrypt_package(key, package) == plaintext
+
+
+def test_legacy_package_without_method_is_cbc():
+    key = os.urandom(32)
+    package = encrypt_package(key, b'{"customer_id": "c1"}', "AES-256-CBC")
+    del package["encryption_method"]
+    assert decrypt_package(key, package) == b'{"customer_id": "c1"}'
+
+
+def test_backend_interface_is_abstract():
+    class NoDecrypt(CipherBackend):
+        def encrypt(self, key, plaintext, associated_data=None):
+            return {}
+
+    class NoAead(AEADBackend):
+        method = "none"
+
+    for backend in (CipherBackend, AEADBackend, NoDecrypt, NoAead):
+        with pytest.raises(TypeError):
+            backend()
+
+
+def test_aead_detects_tampering():
+    key = os.urandom(32)
+    package = encrypt_package(key, b"balance: 100", "AES-256-GCM")
+    data = bytearray(base64.b64decode(package["encrypted_data"]))
+    data[0] ^= 1
+    package["encrypted_data"] = base64.b64encode(bytes(data)).decode()
+    with pytest.raises(InvalidTag):
+        decrypt_package(key, package)
+
+
+@pytest.mark.parametrize("method", ["AES-256-GCM", "ChaCha20-Poly1305"])
+def test_header_fields_are_bound_to_the_ciphertext(method):
+    key = os.urandom(32)
+    header = {"compression": "zlib", "compression_level": 6, "key_id": "mk-1"}
+    package = encrypt_package(key, b"payload", method, header)
+    assert package["aad"] == ["compression", "compression_level"]
+    assert decrypt_package(key, package) == b"payload"
+
+    for field, value in (("compression", "zstd"), ("compression_level", 1), ("aad", ["compression"])):
+        with pytest.raises(InvalidTag):
+            decrypt_package(key, dict(package, **{field: value}))
+    with pytest.raises(InvalidTag):
+        decrypt_package(key, {k: v for k, v in package.items() if k != "aad"})
+
+
+@pytest.mark.parametrize("method", ["AES-256-GCM", "ChaCha20-Poly1305"])
+def test_instruction_snippet_decrypts_bound_packages(method):
+    key = os.urandom(32)
+    backend = CIPHERS[method]
+    for header in (None, {"compression": "zlib", "compression_level": 6}):
+        namespace = {"key": key, "encrypted_package": encrypt_package(key, b"payload", method, header)}
+        exec(f"import base64\nimport json\n{backend.imports}\n{backend.snippet}", namespace)
+        assert namespace["plaintext"] == b"payload"
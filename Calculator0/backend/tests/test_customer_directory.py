@@ -0,0 +1,121 @@
+import sqlite3
+import sys
+from pathlib import Path
+
+# Add backend root so imports like customer_directory work when running from tests/
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import pytest
+
+from customer_directory import CustomerDirectory
+
+
+class FakeAPI:
+    def __init__(self, customers):
+        self.customers = customers
+        self.calls = []
+
+    def __call__(self, endpoint):
+        self.calls.append(endpoint)
+        if endpoint == "/customers":
+            return list(self.customers)
+        return [{"_id": f"acct-{endpoint.split('/')[2]}", "type": "Checking"}]
+
+
+def customer(customer_id, first, last, city="Austin"):
+    return {"_id": customer_id, "first_name": first, "last_name": last, "address": {"city": city}}
+
+
+def test_prefix_lookup_newest_first(tmp_path):
+    api = FakeAPI([customer("c1", "Sarah", "Johnson"), customer("c2", "Maria", "Rodriguez"),
+                   customer("c3", "Sarah", "Lee")])
+    directory = CustomerDirectory(fetch=api, db_path=str(tmp_path / "dir.db"))
+    directory.refresh()
+
+    assert [c["customer_id"] for c in directory.find("sar")] == ["c3", "c1"]
+    assert [c["customer_id"] for c in directory.find("Rodr")] == ["c2"]
+    assert [c["customer_id"] for c in directory.find("sarah j")] == ["c1"]
+    assert directory.find("zz") == []
+    assert directory.get("c2")["accounts"][0]["_id"] == "acct-c2"
+
+
+def test_refresh_is_incremental(tmp_path):
+    api = FakeAPI([customer("c1", "Sarah", "Johnson"), customer("c2", "Maria", "Rodriguez")])
+    directory = CustomerDirectory(fetch=api, db_path=str(tmp_path / "dir.db"))
+    directory.refresh()
+
+    api.customers = [customer("c1", "Sarah", "Johnson", city="Dallas"), customer("c3", "Jen", "Lee")]
+    api.calls.clear()
+    counts = directory.refresh()
+
+    assert counts == {"added": 1, "updated": 1, "removed": 1, "unchanged": 0}
+    # Only the new customer's accounts are fetched
+    assert api.calls == ["/customers", "/customers/c3/accounts"]
+    assert directory.get("c1")["address"]["city"] == "Dallas"
+    assert directory.get("c1")["accounts"] is not None
+    assert directory.get("c2") is None
+
+
+def test_ensure_fresh_skips_recent_refresh(tmp_path):
+    api = FakeAPI([customer("c1", "Sarah", "Johnson")])
+    directory = CustomerDirectory(fetch=api, db_path=str(tmp_path / "dir.db"), max_age=3600)
+    assert directory.ensure_fresh() is not None
+    assert directory.ensure_fresh() is None
+    assert len(directory) == 1
+
+
+def test_paged_listing_and_batched_iteration(tmp_path):
+    api = FakeAPI([customer(f"c{i}", f"First{i}", "Last") for i in range(7)])
+    pages = {"/customers": {"results": api.customers[:4], "paging": {"next": "/customers?page=2"}},
+             "/customers?page=2": {"results": api.customers[4:], "paging": {}}}
+    fetch = lambda endpoint: pages[endpoint] if endpoint in pages else api(endpoint)
+    directory = CustomerDirectory(fetch=fetch, db_path=str(tmp_path / "dir.db"))
+
+    assert directory.refresh(with_accounts=False)["added"] == 7
+    assert [c["customer_id"] for c in directory.iter_all(batch_size=3)] == [f"c{i}" for i in range(7)]
+
+
+def test_error_page_aborts_refresh_without_removing(tmp_path):
+    customers = [customer("c1", "Sarah", "Johnson"), customer("c2", "Maria", "Rodriguez")]
+    pages = {"/customers": {"results": customers[:1], "paging": {"next": "/customers?page=2"}},
+             "/customers?page=2": {"results": customers[1:], "paging": {}}}
+    directory = CustomerDirectory(fetch=lambda endpoint: pages[endpoint], db_path=str(tmp_path / "dir.db"))
+    directory.refresh(with_accounts=False)
+
+    pages["/customers?page=2"] = {"code": 500, "message": "Internal error"}
+    with pytest.raises(ValueError):
+        directory.refresh(with_accounts=False)
+    assert directory.get("c2") is not None
+
+    # A rejected key on the first page
+    pages["/customers"] = {"code": 401, "message": "unauthorized"}
+    with pytest.raises(ValueError):
+        directory.refresh(with_accounts=False)
+    assert len(directory) == 2
+
+
+def test_empty_listing_keeps_a_populated_directory(tmp_path):
+    api = FakeAPI([customer("c1", "Sarah", "Johnson")])
+    directory = CustomerDirectory(fetch=api, db_path=str(tmp_path / "dir.db"))
+    directory.refresh()
+
+    api.customers = []
+    assert directory.refresh()["removed"] == 0
+    assert len(directory) == 1
+
+
+def test_refresh_holds_no_write_lock_during_api_calls(tmp_path):
+    path = str(tmp_path / "dir.db")
+    api = FakeAPI([customer(f"c{i}", f"First{i}", "Last") for i in range(5)])
+
+    def fetch(endpoint):
+        # Another writer (e.g. an auth request) must not wait on the sync
+        conn = sqlite3.connect(path, timeout=0.05)
+        conn.execute("INSERT OR REPLACE INTO customer_directory_meta VALUES ('probe', ?)", (endpoint,))
+        conn.commit()
+        conn.close()
+        return api(endpoint)
+
+    directory = CustomerDirectory(fetch=fetch, db_path=path)
+    assert directory.refresh(batch_size=2)["added"] == 5
+    assert directory.get("c4")["accounts"][0]["_id"] == "acct-c4"
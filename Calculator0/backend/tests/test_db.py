@@ -0,0 +1,84 @@
+import sqlite3
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+# Add backend root so imports like db work when running from tests/
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import pytest
+
+import db
+
+
+@pytest.fixture(autouse=True)
+def fresh_db(tmp_path, monkeypatch):
+    monkeypatch.setattr(db, "DB_PATH", str(tmp_path / "users.db"))
+    monkeypatch.setattr(db, "_initialized", False)
+
+
+def test_schema_is_created_once_across_threads(monkeypatch):
+    calls = []
+    create = db._create_tables
+
+    def counting_create():
+        calls.append(threading.current_thread().name)
+        time.sleep(0.05)  # widen the race
+        create()
+
+    monkeypatch.setattr(db, "_create_tables", counting_create)
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        results = list(pool.map(lambda i: db.verify_user(f"u{i}", "1234"), range(8)))
+
+    assert len(calls) == 1
+    assert results == [(False, None)] * 8
+
+
+def test_user_lifecycle():
+    assert db.create_user("u1", "1234", "c1")
+    assert db.verify_user("u1", "1234") == (True, "c1")
+    assert db.verify_user("u1", "9999") == (False, None)
+
+    db.update_password("u1", "5678")
+    assert db.verify_user("u1", "5678") == (True, "c1")
+
+    db.delete_user("u1")
+    assert db.verify_user("u1", "5678") == (False, None)
+    assert db.list_users() == []
+
+
+def test_concurrent_setup_of_one_user_succeeds_once():
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        results = list(pool.map(lambda i: db.create_user("u1", f"pin{i}", "c1"), range(16)))
+
+    assert results.count(True) == 1
+    assert [u["user_id"] for u in db.list_users()] == ["u1"]
+
+
+def test_writer_waits_for_a_held_lock():
+    db.init_db()
+    holder = sqlite3.connect(db.DB_PATH, check_same_thread=False)
+    holder.execute("BEGIN IMMEDIATE")  # another process mid-transaction
+    threading.Timer(0.2, holder.commit).start()
+
+    start = time.perf_counter()
+    assert db.create_user("u1", "1234", "c1")
+    assert time.perf_counter() - start >= 0.15
+    holder.close()
+
+
+def test_lock_held_past_the_timeout_fails(monkeypatch):
+    monkeypatch.setattr(db, "DB_TIMEOUT", 0.05)
+    db.init_db()
+    holder = sqlite3.connect(db.DB_PATH)
+    holder.execute("BEGIN IMMEDIATE")
+    try:
+        with pytest.raises(sqlite3.OperationalError, match="locked"):
+            db.create_user("u1", "1234", "c1")
+        # Readers are not blocked by a pending write
+        assert db.verify_user("u1", "1234") == (False, None)
+    finally:
+        holder.rollback()
+        holder.close()
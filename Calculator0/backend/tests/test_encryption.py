@@ -0,0 +1,151 @@
+import sys
+import threading
+import time
+from pathlib import Path
+
+# Add backend root so imports like encryption work when running from tests/
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from analysis_cache import AnalysisCache
+from encryption import SecureDataPipeline
+from envelope import MasterKeyring
+
+ACCOUNTS = [{"_id": "chk", "type": "Checking", "nickname": "Main"},
+            {"_id": "sav", "type": "Savings", "nickname": "Rainy day"},
+            {"_id": "cc", "type": "Credit Card", "nickname": "Visa"}]
+
+ROWS = {
+    "/accounts/chk/deposits": [{"_id": "d1", "transaction_date": "2025-03-01", "amount": 2000}],
+    "/accounts/chk/purchases": [{"_id": "p1", "purchase_date": "2025-03-04", "amount": 50}],
+    "/accounts/sav/deposits": [{"_id": "d2", "transaction_date": "2025-02-20", "amount": 300}],
+    "/accounts/sav/purchases": [],
+    "/accounts/cc/deposits": [],
+    "/accounts/cc/purchases": [{"_id": "p2", "purchase_date": "2025-03-02", "amount": 900},
+                               {"_id": "p3", "purchase_date": "2025-03-06", "amount": 25}],
+    "/accounts/chk/withdrawals": [{"_id": "w1", "transaction_date": "2025-03-03", "amount": 400}],
+    "/accounts/chk/transfers": [{"_id": "t1", "transaction_date": "2025-03-05", "amount": 1200,
+                                 "payer_id": "chk", "payee_id": "partner"},
+                                {"_id": "t2", "transaction_date": "2025-03-01", "amount": 100,
+                                 "payer_id": "chk", "payee_id": "sav"}],
+    "/accounts/sav/transfers": [{"_id": "t2", "transaction_date": "2025-03-01", "amount": 100,
+                                 "payer_id": "chk", "payee_id": "sav"}],
+    "/accounts/cc/bills": [{"_id": "b1", "payment_date": "2025-03-10", "amount": 60}],
+}
+
+
+MERCHANTS = {"m1": {"_id": "m1", "name": "Starbucks", "category": "Coffee"},
+             "m2": {"_id": "m2", "name": "Uber", "category": "Transportation"}}
+
+
+class SlowAPI:
+    """Every account endpoint takes `delay` seconds; records the peak number of requests in flight"""
+
+    def __init__(self, delay=0.05):
+        self.delay = delay
+        self.in_flight = self.peak = 0
+        self.lock = threading.Lock()
+        self.calls = []
+
+    def __call__(self, endpoint):
+        with self.lock:
+            self.in_flight += 1
+            self.peak = max(self.peak, self.in_flight)
+            self.calls.append(endpoint)
+        try:
+            if endpoint == "/customers/c1":
+                return {"_id": "c1", "first_name": "Jennifer", "last_name": "Lee", "address": {}}
+            if endpoint == "/customers/c1/accounts":
+                return [dict(account) for account in ACCOUNTS]
+            time.sleep(self.delay)
+            if endpoint.startswith("/merchants/"):
+                merchant_id = endpoint.rsplit("/", 1)[1]
+                if merchant_id == "down":
+                    raise ValueError("Expecting value: line 1 column 1 (char 0)")  # non-JSON error page
+                return dict(MERCHANTS.get(merchant_id, {"code": 404, "message": "No merchant found"}))
+            return [dict(row) for row in ROWS.get(endpoint, [])]
+        finally:
+            with self.lock:
+                self.in_flight -= 1
+
+
+def test_all_accounts_and_transaction_types_fetched_concurrently_and_merged():
+    secure = SecureDataPipeline(api_key=None)
+    api = secure._make_request = SlowAPI()
+
+    start = time.perf_counter()
+    records = secure.fetch_customer_records("c1")
+    elapsed = time.perf_counter() - start
+
+    # Fifteen account requests (five types x three accounts) of 50 ms each: about
+    # one delay when run concurrently
+    assert api.peak >= 15
+    assert elapsed < 4 * api.delay
+
+    data = secure.build_customer_data("c1", records)
+    assert data["account"]["account_id"] == "chk"
+    assert [a["type"] for a in data["accounts"]] == ["Checking", "Savings", "Credit Card"]
+    assert [(p["_id"], p["account_id"]) for p in data["purchases"]] == [("p2", "cc"), ("p1", "chk"), ("p3", "cc")]
+    assert [(d["_id"], d["account_id"]) for d in data["deposits"]] == [("d2", "sav"), ("d1", "chk")]
+
+    statistics = data["statistics"]
+    assert statistics["total_spent"] == 975
+    assert statistics["accounts"] == 3
+    assert statistics["by_account"]["cc"]["total_spent"] == 925
+    assert statistics["by_account"]["sav"]["total_deposited"] == 300
+    assert statistics["by_account"]["sav"]["total_purchases"] == 0
+
+    # The other three types, with an internal transfer listed by both accounts kept once
+    assert [w["_id"] for w in data["withdrawals"]] == ["w1"]
+    assert [(t["_id"], t["direction"]) for t in data["transfers"]] == [("t2", "internal"), ("t1", "out")]
+    assert data["bills"][0]["account_id"] == "cc"
+    assert statistics["total_withdrawn"] == 400
+    assert statistics["total_transferred_out"] == 1200
+    assert statistics["total_transferred_in"] == 0
+    assert statistics["total_billed"] == 60
+    assert statistics["by_account"]["chk"]["total_transfers"] == 2
+
+
+def test_merchants_fetched_once_each_and_concurrently():
+    secure = SecureDataPipeline(api_key=None)
+    api = secure._make_request = SlowAPI()
+    purchases = [{"_id": f"p{i}", "merchant_id": merchant_id, "amount": 5}
+                 for i, merchant_id in enumerate(["m1", "m2", "m1", "gone", "down", "m2", None])]
+
+    start = time.perf_counter()
+    enriched = secure.enrich_purchases(purchases)
+    elapsed = time.perf_counter() - start
+
+    assert sorted(api.calls) == ["/merchants/down", "/merchants/gone", "/merchants/m1", "/merchants/m2"]
+    assert api.peak == 4 and elapsed < 3 * api.delay
+    assert [p.get("merchant_name") for p in enriched] == ["Starbucks", "Uber", "Starbucks", "Unknown", "Unknown",
+                                                          "Uber", None]
+    assert enriched[0]["merchant_category"] == "Coffee" and enriched[4]["merchant_category"] == "Unknown"
+
+
+def test_unchanged_history_keeps_the_existing_package(tmp_path, monkeypatch):
+    keyring = MasterKeyring()
+    cache = AnalysisCache(db_path=str(tmp_path / "cache.db"))
+
+    def pipeline():
+        secure = SecureDataPipeline(api_key=None, keyring=keyring)
+        secure._make_request = SlowAPI(delay=0)
+        secure._package_cache = cache
+        return secure
+
+    secure = pipeline()
+    first = secure.generate_gemini_package("c1", str(tmp_path))
+    assert not first["unchanged"]
+
+    # A later run draws new data keys but the same history needs no new package
+    secure = pipeline()
+    second = secure.generate_gemini_package("c1", str(tmp_path))
+    assert second["unchanged"]
+    assert second["encrypted_package"] == first["encrypted_package"]
+    assert secure.stages.stage("encrypt").stats.calls == 0
+    assert secure.stages.stage("write_encrypted").stats.skipped == 1
+
+    monkeypatch.setitem(ROWS, "/accounts/chk/purchases", [{"_id": "p4", "purchase_date": "2025-03-08", "amount": 5}])
+    third = secure.generate_gemini_package("c1", str(tmp_path))
+    assert not third["unchanged"]
+    assert secure.stages.stage("encrypt").stats.calls == 1
+    assert secure.aes_decrypt(third["encrypted_package"])["purchases"][-1]["_id"] == "p4"
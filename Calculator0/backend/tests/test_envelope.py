@@ -0,0 +1,103 @@
+import base64
+import json
+import sys
+from pathlib import Path
+
+import pytest
+
+# Add backend root so imports like envelope work when running from tests/
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import envelope
+from envelope import MasterKeyring, packages_using, rotate_directory
+
+
+def test_data_keys_are_unique_and_unwrap():
+    keyring = MasterKeyring()
+    key_a, key_id, wrapped_a = keyring.new_data_key()
+    key_b, _, wrapped_b = keyring.new_data_key()
+
+    assert key_a != key_b
+    assert keyring.unwrap(key_id, wrapped_a) == key_a
+    assert keyring.unwrap(key_id, wrapped_b) == key_b
+
+
+def test_rotation_rewraps_headers_only(tmp_path):
+    keyring = MasterKeyring()
+    data_key, key_id, wrapped = keyring.new_data_key()
+    package = {"encrypted_data": "Y2lwaGVydGV4dA==", "iv": "aXY=", "key_id": key_id, "wrapped_key": wrapped}
+    path = tmp_path / "customer_1_encrypted.json"
+    path.write_text(json.dumps(package))
+
+    new_id = keyring.add_key()
+    assert rotate_directory(keyring, str(tmp_path)) == 1
+    assert rotate_directory(keyring, str(tmp_path)) == 0
+
+    rotated = json.loads(path.read_text())
+    assert rotated["key_id"] == new_id
+    assert rotated["encrypted_data"] == package["encrypted_data"]
+
+    # A fresh keyring holding only the new master key can still recover the data key
+    only_new = MasterKeyring({new_id: keyring.keys[new_id]}, new_id)
+    assert only_new.unwrap(new_id, rotated["wrapped_key"]) == data_key
+
+
+def test_keyring_round_trips_through_file(tmp_path):
+    path = str(tmp_path / "keys.json")
+    keyring = MasterKeyring.load_or_create(path)
+    loaded = MasterKeyring.load(path)
+    assert loaded.active == keyring.active
+    assert loaded.keys == keyring.keys
+
+
+def test_wrap_is_bound_to_the_key_id():
+    keyring = MasterKeyring()
+    other_id = keyring.add_key(key=keyring.keys[keyring.active], make_active=False)  # same bytes, other id
+    _, key_id, wrapped = keyring.new_data_key()
+    with pytest.raises(Exception):
+        keyring.unwrap(other_id, wrapped)
+
+
+def test_legacy_key_wrap_unwraps_and_is_converted(tmp_path):
+    from cryptography.hazmat.primitives.keywrap import aes_key_wrap
+
+    keyring = MasterKeyring()
+    old_id = keyring.active
+    data_key = bytes(range(32))
+    legacy = base64.b64encode(aes_key_wrap(keyring.keys[old_id], data_key)).decode()
+    assert keyring.unwrap(old_id, legacy) == data_key
+
+    path = tmp_path / "customer_1_encrypted.json"
+    path.write_text(json.dumps({"encrypted_data": "", "key_id": old_id, "wrapped_key": legacy}))
+    new_id = keyring.add_key()
+    assert rotate_directory(keyring, str(tmp_path)) == 1
+    rotated = json.loads(path.read_text())
+    assert len(base64.b64decode(rotated["wrapped_key"])) == 60
+    assert MasterKeyring({new_id: keyring.keys[new_id]}, new_id).unwrap(new_id, rotated["wrapped_key"]) == data_key
+
+
+def test_retire_refuses_while_packages_use_old_keys(tmp_path):
+    keyring_path = str(tmp_path / "keys.json")
+    keyring = MasterKeyring.load_or_create(keyring_path)
+    main_dir, other_dir = tmp_path / "main", tmp_path / "archive"
+    for directory in (main_dir, other_dir):
+        directory.mkdir()
+        _, key_id, wrapped = keyring.new_data_key()
+        (directory / "customer_1_encrypted.json").write_text(
+            json.dumps({"encrypted_data": "", "key_id": key_id, "wrapped_key": wrapped}))
+    # A package whose re-wrap fails stays under its (unknown) key
+    (main_dir / "customer_2_encrypted.json").write_text(
+        json.dumps({"encrypted_data": "", "key_id": "mk-lost", "wrapped_key": "AAAA"}))
+
+    args = ["rotate", "--keyring", keyring_path, "--dir", str(main_dir), "--scan-dir", str(other_dir), "--retire"]
+    assert envelope.main(args) == 1
+    assert len(MasterKeyring.load(keyring_path).keys) == 2
+    assert packages_using({keyring.active}, [str(main_dir)]) == []
+
+    (main_dir / "customer_2_encrypted.json").unlink()
+    assert envelope.main(args) == 1  # the archive is still under the first key
+
+    # Once the archived package is re-encrypted elsewhere (here: moved under --dir) retiring succeeds
+    (other_dir / "customer_1_encrypted.json").rename(main_dir / "customer_3_encrypted.json")
+    assert envelope.main(args) == 0
+    assert len(MasterKeyring.load(keyring_path).keys) == 1
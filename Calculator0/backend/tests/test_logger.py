@@ -0,0 +1,116 @@
+import json
+import logging
+import queue
+import sys
+from pathlib import Path
+
+# Add backend root so imports like logger work when running from tests/
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import logger
+from logger import DroppingQueueHandler, StructuredFormatter, StructuredLogger
+
+
+class Capture(logging.Handler):
+    def __init__(self):
+        super().__init__()
+        self.records = []
+
+    def emit(self, record):
+        self.records.append(record)
+
+
+def make_logger(name):
+    """A StructuredLogger writing straight to a capturing handler (no queue)"""
+    base = logging.getLogger(f"test_logger.{name}")
+    base.handlers = []
+    base.propagate = False
+    base.setLevel(logging.DEBUG)
+    capture = Capture()
+    base.addHandler(capture)
+    return StructuredLogger(base), capture
+
+
+def record(msg, exc_info=None, **fields):
+    entry = logging.LogRecord("calculator0.test", logging.INFO, __file__, 1, msg, None, exc_info)
+    entry.fields = fields
+    return entry
+
+
+def test_full_queue_drops_instead_of_blocking():
+    handler = DroppingQueueHandler(queue.Queue(maxsize=2))
+    for i in range(5):
+        handler.enqueue(record(f"message {i}"))
+
+    assert handler.queue.qsize() == 2
+    assert handler.dropped == 3
+
+
+def test_records_are_formatted_on_the_listener_not_the_caller():
+    handler = DroppingQueueHandler(queue.Queue())
+    entry = record("raw", amount=1)
+    assert handler.prepare(entry) is entry
+
+
+def test_sampling_keeps_the_configured_fraction(monkeypatch):
+    log, capture = make_logger("sampling")
+    draws = iter([0.05, 0.5, 0.09, 0.95])
+    monkeypatch.setattr(logger.random, "random", lambda: next(draws))
+
+    for _ in range(4):
+        log.debug("Purchase created", sample=0.1, amount=12.5)
+
+    assert len(capture.records) == 2
+    assert all(r.fields == {"amount": 12.5, "sample": 0.1} for r in capture.records)
+
+
+def test_unsampled_and_disabled_levels():
+    log, capture = make_logger("levels")
+    log.info("always", customer_id="c1")
+    log._logger.setLevel(logging.WARNING)
+    log.info("filtered", customer_id="c2")
+
+    assert [r.getMessage() for r in capture.records] == ["always"]
+    assert capture.records[0].fields == {"customer_id": "c1"}
+    assert not log.is_enabled(logging.INFO)
+
+
+def test_text_format_appends_fields():
+    line = StructuredFormatter("text").format(record("✅ User created", user_id=7, ok=True))
+    assert line == "✅ User created  user_id=7 ok=True"
+    assert StructuredFormatter("text").format(record("plain")) == "plain"
+
+
+def test_json_format_is_one_object_per_line():
+    line = StructuredFormatter("json").format(record("Fetched", customer_id="c1", when=object))
+
+    assert "\n" not in line
+    entry = json.loads(line)
+    assert entry["msg"] == "Fetched"
+    assert entry["level"] == "INFO"
+    assert entry["logger"] == "calculator0.test"
+    assert entry["customer_id"] == "c1"
+    assert entry["when"] == str(object)
+    assert "ts" in entry
+
+
+def test_json_format_includes_exceptions():
+    try:
+        raise ValueError("boom")
+    except ValueError:
+        entry = json.loads(StructuredFormatter("json").format(record("failed", exc_info=sys.exc_info())))
+    assert "ValueError: boom" in entry["exc"]
+
+
+def test_queue_listener_writes_every_record():
+    log = logger.get_logger("test")
+    capture = Capture()
+    handlers = logger._listener.handlers
+    logger._listener.handlers = handlers + (capture,)
+    try:
+        log.warning("queued", customer_id="c9")
+        logger.flush()
+    finally:
+        logger._listener.handlers = handlers
+
+    assert [(r.getMessage(), r.fields) for r in capture.records] == [("queued", {"customer_id": "c9"})]
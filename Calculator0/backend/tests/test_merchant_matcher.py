@@ -0,0 +1,48 @@
+import sys
+from pathlib import Path
+
+# Add backend root so imports like merchant_matcher work when running from tests/
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import pytest
+
+from merchant_matcher import MerchantMatcher, build_automaton, read_bank_csv
+
+EXAMPLE_CSV = Path(__file__).resolve().parent.parent / "customers" / "example1.csv"
+
+
+def test_automaton_reports_longest_pattern_per_state():
+    delta, out = build_automaton(["he", "she", "hers"])
+    state = 0
+    seen = []
+    for char in "ushers":
+        state = delta[state].get(char, 0)
+        if out[state] is not None:
+            seen.append(out[state])
+    assert seen == [1, 2]  # "she" (covers "he"), then "hers"
+
+
+def test_descriptors_map_to_catalog_codes():
+    matcher = MerchantMatcher()
+    assert matcher.match("STARBUCKS STORE #5678")[:3] == ("STARBUCKS", "Starbucks", "COFFEE")
+    assert matcher.match("UBER *TRIP").merchant_code == "UBER"
+    assert matcher.match("UBER EATS 1234").category_code == "RESTAURANTS"
+    assert matcher.match("PAYROLL DEPOSIT - ABC COMPANY")[::2] == (None, "INCOME")
+    # Whole words only: GAP must not match inside SINGAPORE
+    assert matcher.match("SINGAPORE AIR", "Travel")[:3] == (None, None, "TRANSPORTATION")
+    assert matcher.match("SOMEWHERE NEW").category_code == "OTHER"
+
+
+def test_nessie_and_csv_rows_agree():
+    matcher = MerchantMatcher(cache_size=0)
+    nessie = matcher.tag({"merchant_name": "Starbucks", "merchant_category": "Coffee", "description": "Morning coffee"})
+    csv_row = matcher.tag({"Description": "STARBUCKS STORE #5678", "Category": "Coffee Shops"})
+    assert (nessie["merchant_code"], nessie["category_code"]) == (csv_row["merchant_code"], csv_row["category_code"])
+
+    rows = matcher.tag_all(list(read_bank_csv(EXAMPLE_CSV)))
+    assert all(row["category_code"] != "OTHER" for row in rows)
+
+
+def test_alias_to_unknown_merchant_is_rejected():
+    with pytest.raises(ValueError):
+        MerchantMatcher(aliases=[("FOO", "Not In Catalog", None)])
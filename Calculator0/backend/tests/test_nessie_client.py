@@ -0,0 +1,64 @@
+import sys
+from pathlib import Path
+
+# Add backend root so imports like nessie_client work when running from tests/
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from customer_directory import unwrap_list
+from nessie_client import is_list_page, iter_items, iter_pages, list_items, next_page
+
+
+def test_response_shapes():
+    rows = [{"_id": "a"}, {"_id": "b"}]
+    assert list(iter_items(rows)) == rows
+    assert list(iter_items({"customers": rows})) == rows
+    assert list(iter_items({"results": rows, "paging": {}})) == rows
+    assert list(iter_items({"tags": ["x"], "items": rows})) == rows
+    assert list(iter_items({"accounts": rows})) == rows
+    assert list(iter_items({"_id": "c1", "first_name": "Sarah"})) == [{"_id": "c1", "first_name": "Sarah"}]
+    assert list(iter_items({"code": 404, "message": "not found"})) == []
+    assert list(iter_items(None)) == []
+
+
+def test_list_pages_and_error_pages():
+    assert is_list_page([]) and is_list_page({"results": []}) and is_list_page({"_id": "c1"})
+    assert is_list_page({"items": [{"_id": "a"}]})
+    assert not is_list_page({"code": 404, "culprit": []})
+    assert not is_list_page({"code": 500, "message": "error"})
+    assert not is_list_page(None)
+
+
+def test_list_responses_are_not_copied():
+    rows = [{"_id": "a"}, {"_id": "b"}]
+    assert list_items(rows) is rows
+    assert list_items({"count": 2, "results": rows}) is rows
+    assert unwrap_list({"customers": rows}) is rows
+    assert list_items({"code": 500}) == []
+
+
+def test_next_page_links():
+    assert next_page({"results": [], "paging": {"next": "/enterprise/customers?page=2"}}) == \
+        "/enterprise/customers?page=2"
+    assert next_page({"next": "http://api.nessieisreal.com/customers?page=3&key=secret"}) == "/customers?page=3"
+    assert next_page({"paging": {"previous": "/customers?page=1"}}) is None
+    assert next_page([{"_id": "a"}]) is None
+
+
+def test_pages_are_fetched_lazily_and_loops_stop():
+    pages = {
+        "/customers": {"results": [{"_id": "1"}, {"_id": "2"}], "paging": {"next": "/customers?page=2"}},
+        "/customers?page=2": {"results": [{"_id": "3"}], "paging": {"next": "/customers?page=3"}},
+        # A server that points back at an earlier page
+        "/customers?page=3": {"results": [{"_id": "4"}], "paging": {"next": "/customers?page=2"}},
+    }
+    calls = []
+
+    def fetch(endpoint):
+        calls.append(endpoint)
+        return pages[endpoint]
+
+    items = iter_pages(fetch, "/customers")
+    assert next(items)["_id"] == "1"
+    assert calls == ["/customers"]
+    assert [item["_id"] for item in items] == ["2", "3", "4"]
+    assert calls == ["/customers", "/customers?page=2", "/customers?page=3"]
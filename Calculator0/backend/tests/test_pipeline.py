@@ -0,0 +1,75 @@
+import sys
+from pathlib import Path
+
+# Add backend root so imports like pipeline work when running from tests/
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import pytest
+
+from pipeline import Stage, StagePipeline
+
+
+class Double(Stage):
+    name = "double"
+
+    def process(self, ctx):
+        ctx['value'] *= 2
+        return 8
+
+
+class FailOn(Stage):
+    name = "fail"
+
+    def __init__(self, bad, **kwargs):
+        super().__init__(**kwargs)
+        self.bad = bad
+
+    def process(self, ctx):
+        if ctx['value'] == self.bad:
+            raise ValueError("bad value")
+        return 0
+
+
+def test_stage_without_process_cannot_be_built():
+    class Incomplete(Stage):
+        name = "incomplete"
+
+    with pytest.raises(TypeError):
+        Incomplete()
+
+
+def test_stages_stream_lazily_and_count():
+    stages = StagePipeline([Double(), Double()])
+    seen = []
+
+    def source():
+        for i in range(3):
+            seen.append(i)
+            yield {'value': i}
+
+    stream = stages.run_many(source())
+    assert seen == []  # nothing runs until the consumer pulls
+    assert [ctx['value'] for ctx in stream] == [0, 4, 8]
+
+    assert [s.stats.calls for s in stages.stages] == [3, 3]
+    assert sum(s.stats.bytes_out for s in stages.stages) == 48
+
+
+def test_disabled_and_sampled_stages_are_skipped():
+    stages = StagePipeline([Double(enabled=False)])
+    assert stages.run({'value': 3})['value'] == 3
+    assert stages.stats()['double']['skipped'] == 1
+
+    sampled = StagePipeline([Double(sample=0.0)])
+    assert sampled.run({'value': 3})['value'] == 3
+
+
+def test_failed_items_skip_later_stages_but_stream_continues():
+    stages = StagePipeline([FailOn(bad=1), Double()])
+    results = list(stages.run_many({'value': v} for v in (0, 1, 2)))
+
+    assert [r.get('failed_stage') for r in results] == [None, 'fail', None]
+    assert [r['value'] for r in results] == [0, 1, 4]
+
+    with pytest.raises(ValueError):
+        stages.run({'value': 1})
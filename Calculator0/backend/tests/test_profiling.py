@@ -0,0 +1,46 @@
+import os
+import sys
+import time
+from pathlib import Path
+
+# Add backend root so imports like profiling work when running from tests/
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import profiling
+
+
+def busy(seconds):
+    end = time.perf_counter() + seconds
+    total = 0
+    while time.perf_counter() < end:
+        total += sum(range(100))
+    return total
+
+
+def test_disabled_is_a_no_op(monkeypatch):
+    monkeypatch.setattr(profiling, "PROFILE_MODE", "")
+    with profiling.profile_run("nothing") as run:
+        assert run is None
+    assert profiling.profiled("x")(busy) is busy
+
+
+def test_cprofile_writes_pstats_and_collapsed(tmp_path, monkeypatch):
+    monkeypatch.setattr(profiling, "PROFILE_DIR", str(tmp_path))
+    with profiling.profile_run("POST/api/run", mode="cprofile") as run:
+        busy(0.05)
+    files = sorted(os.listdir(tmp_path))
+    assert [Path(f).suffix for f in files] == [".collapsed", ".pstats"]
+
+    lines = (tmp_path / files[0]).read_text().splitlines()
+    assert any("test_profiling.py:busy" in line for line in lines)
+    stack, micros = lines[0].rsplit(" ", 1)
+    assert int(micros) > 0
+
+
+def test_sampler_collects_stacks(tmp_path, monkeypatch):
+    monkeypatch.setattr(profiling, "PROFILE_DIR", str(tmp_path))
+    with profiling.profile_run("batch", mode="sample"):
+        busy(0.1)
+    (collapsed,) = tmp_path.iterdir()
+    text = collapsed.read_text()
+    assert "test_profiling.py:busy" in text
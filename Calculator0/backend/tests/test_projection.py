@@ -0,0 +1,60 @@
+import sys
+from pathlib import Path
+
+# Add backend root so imports like projection work when running from tests/
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import numpy as np
+import pytest
+
+import projection
+from projection import project_goals, request_paths, simulate_savings, weekly_flows, weeks_to_goals
+
+HISTORY = {
+    "customer_id": "c1",
+    # $500 every other week, $100 of spending every week
+    "deposits": [{"transaction_date": f"2025-01-{day:02d}", "amount": 500} for day in (1, 15, 29)],
+    "purchases": [{"purchase_date": f"2025-01-{day:02d}", "amount": 100} for day in (2, 9, 16, 23, 30)],
+}
+
+
+def test_weekly_flows_bin_by_week():
+    income, spend = weekly_flows(HISTORY["deposits"], HISTORY["purchases"])
+    assert income.tolist() == [500, 0, 500, 0, 500]
+    assert spend.tolist() == [100, 100, 100, 100, 100]
+
+
+def test_balance_never_goes_negative():
+    balances = simulate_savings(np.array([0.0, 300.0]), np.array([200.0, 0.0]), paths=500, horizon=30, seed=3)
+    assert balances.min() >= 0
+
+
+def test_weeks_to_goals_matches_brute_force():
+    balances = simulate_savings(np.array([500.0, 0.0]), np.array([100.0, 250.0]), paths=300, horizon=20, seed=1)
+    amounts = [0, 150, 400, 1000, 1e9]
+    peak = np.maximum.accumulate(balances, axis=1)
+    expected = (peak[:, :, None] < np.array(amounts)).sum(axis=1) + 1
+    assert (weeks_to_goals(balances, amounts) == expected).all()
+
+
+def test_project_goals_percentiles():
+    result = project_goals(HISTORY, goals={"small": 100, "never": 1e9}, paths=2000, horizon=52, seed=0)
+    small = result["goals"]["small"]
+    assert small["probability"] == 1.0
+    assert 1 <= small["p10_weeks"] <= small["p50_weeks"] <= small["p90_weeks"]
+    assert result["goals"]["never"] == {"amount": 1e9, "probability": 0.0,
+                                        "p10_weeks": None, "p50_weeks": None, "p90_weeks": None}
+
+
+def test_default_goals_include_safety_plan_targets():
+    goals = project_goals(HISTORY, paths=100, seed=0)["goals"]
+    assert set(goals) == {"rent", "deposit", "emergency", "moving", "all"}
+
+
+def test_request_paths_validates_and_caps():
+    assert request_paths(None) == projection.PROJECTION_PATHS
+    assert request_paths(200) == request_paths("200") == request_paths(200.0) == 200
+    assert request_paths(projection.PROJECTION_PATHS * 10) == projection.PROJECTION_PATHS
+    for bad in (0, -1, 1.5, "-3", "", "ten", True, {}):
+        with pytest.raises(ValueError):
+            request_paths(bad)
@@ -0,0 +1,67 @@
+import sys
+from datetime import date
+from pathlib import Path
+
+# Add backend root so imports like prompt_compaction work when running from tests/
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from prompt_compaction import compact_history, estimate_tokens, summarize_history
+
+
+def make_history(months=12):
+    deposits, purchases = [], []
+    for m in range(months):
+        year, month = 2025 + m // 12, m % 12 + 1
+        for day in (1, 15):
+            deposits.append({"transaction_date": f"{year}-{month:02d}-{day:02d}", "amount": 2000})
+        for day in range(1, 28, 3):
+            purchases.append({"purchase_date": f"{year}-{month:02d}-{day:02d}", "amount": 20,
+                              "merchant_name": "Safeway", "merchant_category": "Groceries"})
+        if m < months // 2:
+            purchases.append({"purchase_date": f"{year}-{month:02d}-20", "amount": 60,
+                              "merchant_name": "AMC", "merchant_category": "Entertainment"})
+    return deposits, purchases
+
+
+def test_summary_captures_cadence_and_stopped_categories():
+    deposits, purchases = make_history()
+    summary = summarize_history(deposits, purchases)
+
+    assert summary["totals"]["deposits"] == 24
+    assert summary["deposit_cadence"]["median_days"] in (14, 15, 16)
+    assert any(c.startswith("Entertainment stopped") for c in summary["changes"])
+    assert summary["top_merchants"][0]["merchant"] == "Safeway"
+
+
+def test_rendered_summary_respects_token_budget():
+    deposits, purchases = make_history(months=36)
+    history = {"deposits": deposits, "purchases": purchases}
+
+    for budget in (80, 200, 600):
+        assert estimate_tokens(compact_history(history, token_budget=budget)) <= budget
+
+
+def test_flat_csv_transactions_are_split_by_sign():
+    flat = [
+        {"date": "08/10/2025", "description": "PAYROLL", "category": "Income", "amount": -2850.0},
+        {"date": "08/11/2025", "description": "WHOLE FOODS", "category": "Groceries", "amount": 125.5},
+    ]
+    text = compact_history(flat)
+    assert "1 deposits $2,850.00" in text
+    assert "1 purchases $125.50" in text
+
+
+def test_missing_amounts_and_non_string_dates_are_tolerated():
+    deposits = [{"transaction_date": "2025-03-01", "amount": None},
+                {"transaction_date": date(2025, 3, 15), "amount": 500},
+                {"transaction_date": 20250320, "amount": 100}]
+    purchases = [{"purchase_date": "2025-03-02", "amount": None, "merchant_name": "Safeway"},
+                 {"purchase_date": None, "amount": 10},
+                 {"purchase_date": "2025-03-04", "amount": 30, "merchant_name": "Safeway"}]
+    summary = summarize_history(deposits, purchases)
+
+    assert summary["totals"]["deposits"] == 2
+    assert summary["totals"]["deposited"] == 500
+    assert summary["totals"]["purchases"] == 2  # the undated purchase is left out, like the deposit
+    assert summary["totals"]["spent"] == 30
+    assert summary["top_merchants"][0]["merchant"] == "Safeway"
@@ -0,0 +1,43 @@
+import sys
+from pathlib import Path
+
+# Add backend root so imports like records work when running from tests/
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from records import Transaction, TransactionBatch, from_dicts, to_cents, to_dicts
+
+PURCHASES = [
+    {"_id": "p1", "purchase_date": "2025-01-02", "amount": 19.99, "description": "Groceries",
+     "merchant_id": "m1", "merchant_name": "Safeway", "merchant_category": "Groceries",
+     "status": "executed", "medium": "balance", "payer_id": "acct-1"},
+    {"_id": "p2", "purchase_date": "2025-01-05", "amount": 0.1 + 0.2, "merchant_name": "Safeway",
+     "merchant_category": "Groceries"},
+    {"_id": "p3", "purchase_date": "2025-01-03", "amount": 60, "merchant_name": "AMC",
+     "merchant_category": "Entertainment"},
+]
+
+
+def test_cents_are_exact():
+    assert to_cents(0.1 + 0.2) == 30
+    assert to_cents(19.99) == 1999
+    assert to_cents(None) == 0
+
+
+def test_slotted_round_trip_keeps_unknown_keys():
+    records = from_dicts(PURCHASES, "purchase")
+    assert not hasattr(records[0], "__dict__")
+    assert records[0].extra == {"payer_id": "acct-1"}
+    assert to_dicts(records)[0] == PURCHASES[0]
+    assert records[1].amount == 0.3
+
+
+def test_batch_round_trip_and_aggregates():
+    batch = TransactionBatch.from_dicts(PURCHASES, "purchase")
+    assert len(batch) == 3
+    assert list(batch.to_dicts())[0] == PURCHASES[0]
+    assert batch.total_cents() == 1999 + 30 + 6000
+    assert batch.totals_by("merchant_category") == {"Groceries": 2029, "Entertainment": 6000}
+    assert batch.date_range() == ("2025-01-02", "2025-01-05")
+    # "Safeway" and "Groceries" are stored once each
+    assert batch.table.strings.count("Safeway") == 1
+    assert isinstance(next(batch.records()), Transaction)
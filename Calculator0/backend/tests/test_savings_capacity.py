@@ -0,0 +1,64 @@
+import sys
+from pathlib import Path
+
+# Add backend root so imports like savings_capacity work when running from tests/
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import numpy as np
+import pytest
+
+from savings_capacity import capacity_arrays, estimate_capacity, flatten
+
+
+def weekly_customer(customer_id, grocery_amounts, coffee=None, start_week=0):
+    """One grocery purchase (and optionally a coffee) per week, starting on a Monday"""
+    purchases = []
+    for week, amount in enumerate(grocery_amounts, start=start_week):
+        day = f"2025-{1 + (week * 7) // 28:02d}-{1 + (week * 7) % 28:02d}"
+        purchases.append({"purchase_date": day, "amount": amount, "merchant_name": "Safeway", "merchant_category": "Groceries"})
+        if coffee:
+            purchases.append({"purchase_date": day, "amount": coffee, "merchant_name": "Starbucks", "merchant_category": "Coffee"})
+    return {"customer_id": customer_id, "purchases": purchases,
+            "deposits": [{"transaction_date": purchases[0]["purchase_date"], "amount": 1000}]}
+
+
+def test_steady_spend_leaves_no_room():
+    result = estimate_capacity([weekly_customer("steady", [100] * 8, coffee=5)], sigma=1.0, max_share=1.0)[0]
+    assert result["capacity"] == 0
+    assert result["by_category"] == {}
+
+
+def test_capacity_is_band_capped_per_category():
+    amounts = [80, 120, 80, 120, 80, 120, 80, 120]
+    result = estimate_capacity([weekly_customer("varied", amounts)], period="week", sigma=0.5, max_share=1.0)[0]
+    std = float(np.std(amounts, ddof=1))
+    assert result["by_category"]["GROCERIES"] == pytest.approx(0.5 * std, abs=0.01)
+    assert result["capacity"] == result["by_category"]["GROCERIES"]
+
+
+def test_share_cap_and_short_history():
+    sparse = weekly_customer("sparse", [0, 300, 0, 0, 300, 0])
+    short = weekly_customer("short", [50, 150])
+    results = estimate_capacity([sparse, short], sigma=3.0, max_share=0.25)
+    assert results[0]["capacity"] == pytest.approx(0.25 * 600 / 6, abs=0.01)
+    assert results[1]["insufficient_history"] and results[1]["capacity"] == 0
+
+
+def test_population_matches_individual_estimates():
+    population = [weekly_customer(f"c{i}", [50 + 10 * ((i + w) % 4) for w in range(10)], coffee=i, start_week=i)
+                  for i in range(6)]
+    batch = estimate_capacity(population)
+    assert batch == [estimate_capacity([customer])[0] for customer in population]
+
+
+def test_chunks_sized_by_history_match_one_tensor():
+    population = [weekly_customer(f"c{i}", [40 + 7 * ((i * w) % 5) for w in range(4 + 3 * (i % 4))], coffee=i % 3,
+                                  start_week=i % 5) for i in range(11)]
+    population.append({"customer_id": "empty", "purchases": [], "deposits": []})
+    purchases, deposits = flatten(population)
+
+    whole = capacity_arrays(purchases, deposits, len(population), chunk=len(population))
+    for chunk in (1, 3, 5):
+        chunked = capacity_arrays(purchases, deposits, len(population), chunk=chunk)
+        for name, values in whole.items():
+            np.testing.assert_allclose(chunked[name], values, atol=1e-9)
@@ -0,0 +1,50 @@
+import json
+import sys
+from pathlib import Path
+
+import pytest
+
+# Add backend root so imports like serialization work when running from tests/
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import serialization
+
+DATA = {"customer_id": "c1", "name": "José", "amounts": [12.5, 0.1, 3], "nested": {"b": 1, "a": None}}
+
+
+@pytest.fixture(params=["auto", "json"])
+def backend(request, monkeypatch):
+    monkeypatch.setattr(serialization, "JSON_BACKEND", request.param)
+    monkeypatch.setattr(serialization, "_resolved", False)
+    monkeypatch.setattr(serialization, "_orjson", None)
+    return serialization.backend()
+
+
+def test_compact_and_pretty_round_trip(backend):
+    compact = serialization.dumps(DATA)
+    assert isinstance(compact, bytes)
+    assert b" " not in compact.replace("José".encode(), b"")
+    assert serialization.loads(compact) == DATA
+    assert serialization.loads(compact.decode()) == DATA
+
+    pretty = serialization.dumps(DATA, pretty=True)
+    assert b'\n  "customer_id"' in pretty
+    assert json.loads(pretty) == DATA
+
+
+def test_values_orjson_refuses_fall_back(backend):
+    big = {"id": 2 ** 70, 1: "int key"}
+    assert serialization.loads(serialization.dumps(big)) == {"id": 2 ** 70, "1": "int key"}
+    assert serialization.dumps({"when": object()}, default=lambda o: "x") == b'{"when":"x"}'
+
+
+def test_canonical_is_stable_and_backend_independent(backend):
+    assert serialization.canonical({"b": [1, 2], "a": "é"}) == '{"a":"\\u00e9","b":[1,2]}'
+    assert serialization.canonical(DATA) == json.dumps(DATA, sort_keys=True, separators=(",", ":"), default=str)
+
+
+def test_dump_file(tmp_path, backend):
+    path = tmp_path / "out.json"
+    serialization.dump_file(DATA, str(path), pretty=True)
+    assert serialization.load_file(str(path)) == DATA
+    assert not (tmp_path / "out.json.tmp").exists()
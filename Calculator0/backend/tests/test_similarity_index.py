@@ -0,0 +1,91 @@
+import sys
+from pathlib import Path
+
+import numpy as np
+
+# Add backend root so imports like similarity_index work when running from tests/
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from benchmarks.profiles import generate_profiles
+from similarity_index import DIMENSIONS, SimilarityIndex, feature_vector
+
+
+def unit_vectors(count, seed=0):
+    vectors = np.abs(np.random.default_rng(seed).normal(size=(count, DIMENSIONS))).astype(np.float32)
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+def test_severe_profile_query():
+    profiles = generate_profiles()
+    index = SimilarityIndex()
+    for name, data in profiles.items():
+        vector = feature_vector(data)
+        assert vector.shape == (DIMENSIONS,)
+        assert abs(float(np.linalg.norm(vector)) - 1) < 1e-5
+        index.upsert(name, vector)
+
+    found = index.search(index.vector("Jennifer Lee"), k=5)
+    assert found[0][0] == "Jennifer Lee"
+    assert found[0][1] > 0.999
+    assert [score for _, score in found] == sorted((score for _, score in found), reverse=True)
+    assert "Jennifer Lee" not in [c for c, _ in index.most_similar("Jennifer Lee", k=4)]
+
+
+def test_incremental_updates():
+    vectors = unit_vectors(50)
+    index = SimilarityIndex()
+    index.upsert_many([f"c{i}" for i in range(50)], vectors)
+
+    # Re-scoring overwrites in place; removing moves the last row into the gap
+    index.upsert("c3", vectors[7])
+    assert len(index) == 50
+    assert {c for c, _ in index.search(vectors[7], k=2)} == {"c3", "c7"}
+    index.remove("c7")
+    index.remove("c49")
+    assert len(index) == 48
+    assert index.search(vectors[7], k=1)[0][0] == "c3"
+    assert np.allclose(index.vector("c48"), vectors[48])
+
+
+def test_partitioned_search_matches_exact():
+    vectors = unit_vectors(5000)
+    index = SimilarityIndex(exact_limit=1000, lists=32, probes=8)
+    index.upsert_many([f"c{i}" for i in range(5000)], vectors)
+    queries = vectors[:50]
+
+    exact = index.search_many(queries, k=10, exact=True)
+    approx = index.search_many(queries, k=10)  # above exact_limit: partitioned
+    assert index.centroids is not None
+    recall = np.mean([len({c for c, _ in a} & {c for c, _ in e}) / 10 for a, e in zip(approx, exact)])
+    assert recall > 0.8
+    assert all(a[0][0] == f"c{i}" for i, a in enumerate(approx))
+
+    # Updates after training are re-assigned and found by the partitioned search
+    index.upsert("new", -vectors[0] + 2 * vectors[1])
+    assert "new" in [c for c, _ in index.search(index.vector("new"), k=1)]
+
+
+def test_save_and_load_without_pickle(tmp_path):
+    vectors = unit_vectors(3000)
+    index = SimilarityIndex(exact_limit=1000)
+    index.upsert_many([f"c{i}" for i in range(3000)], vectors)
+    before = index.search_many(vectors[:20], k=5)  # trains the partitions
+
+    path = str(tmp_path / "index.npz")
+    index.save(path)
+    assert np.load(path)["ids"].dtype.kind == "U"
+
+    loaded = SimilarityIndex.load(path, exact_limit=1000)
+    assert loaded.ids == index.ids
+    assert np.array_equal(loaded.centroids, index.centroids)
+    assert loaded.search_many(vectors[:20], k=5) == before
+
+
+def test_default_probes_scale_with_the_partitions():
+    vectors = unit_vectors(5000)
+    index = SimilarityIndex(exact_limit=1000, lists=80, probes=0)
+    index.upsert_many([f"c{i}" for i in range(5000)], vectors)
+    exact = index.search_many(vectors[:50], k=10, exact=True)
+    approx = index.search_many(vectors[:50], k=10)
+    recall = np.mean([len({c for c, _ in a} & {c for c, _ in e}) / 10 for a, e in zip(approx, exact)])
+    assert recall > 0.9
@@ -0,0 +1,110 @@
+import io
+import json
+import random
+import sys
+from pathlib import Path
+
+# Add backend root so imports like statement_report work when running from tests/
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import statement_report
+from statement_report import build_statement, write_json, write_text
+
+CUSTOMER = {"customer_id": "c1", "first_name": "Sarah", "last_name": "Johnson", "address": {"city": "Austin"}}
+ACCOUNT = {"nickname": "Checking", "balance": 100.0, "rewards": 5}
+
+
+def make_rows(n, date_key, seed=0):
+    rng = random.Random(seed)
+    rows = [{date_key: f"2025-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}",
+             "amount": round(rng.uniform(1, 100), 2), "description": "x"} for _ in range(n)]
+    rng.shuffle(rows)
+    return rows
+
+
+def test_top_k_matches_full_sort():
+    purchases = make_rows(5000, "purchase_date")
+    deposits = make_rows(300, "transaction_date", seed=1)
+    statement = build_statement(CUSTOMER, ACCOUNT, purchases, deposits, limit=20)
+
+    expected = sorted(purchases, key=lambda r: r["purchase_date"])[:20]
+    assert [r["purchase_date"] for r in statement["purchases"]["rows"]] == [r["purchase_date"] for r in expected]
+    assert statement["purchases"]["summary"]["count"] == 5000
+    assert statement["totals"]["spent"] == round(sum(r["amount"] for r in purchases), 2)
+
+    newest = build_statement(CUSTOMER, ACCOUNT, purchases, deposits, limit=3, newest=True)
+    assert newest["purchases"]["rows"][0]["purchase_date"] == max(r["purchase_date"] for r in purchases)
+
+
+def test_date_range_filters_rows_and_totals():
+    purchases = make_rows(1000, "purchase_date")
+    statement = build_statement(CUSTOMER, ACCOUNT, purchases, [], start="2025-03-01", end="2025-03-31", limit=None)
+
+    in_march = [r for r in purchases if r["purchase_date"].startswith("2025-03")]
+    assert statement["purchases"]["summary"]["count"] == len(in_march)
+    assert len(statement["purchases"]["rows"]) == len(in_march)
+    assert statement["deposits"]["summary"]["first_date"] is None
+
+
+def test_text_and_json_output():
+    statement = build_statement(CUSTOMER, ACCOUNT, make_rows(5, "purchase_date"), [], limit=2)
+
+    text = io.StringIO()
+    write_text(statement, text)
+    assert "📦 PURCHASES (5 total):" in text.getvalue()
+    assert "No deposits found." in text.getvalue()
+
+    out = io.StringIO()
+    write_json(statement, out)
+    assert json.loads(out.getvalue())["customer"]["name"] == "Sarah Johnson"
+
+
+def test_fetch_keeps_the_endpoint_query(monkeypatch):
+    import requests
+
+    urls = []
+
+    class Response:
+        def json(self):
+            return []
+
+    monkeypatch.setattr(requests, "get", lambda url: urls.append(url) or Response())
+    monkeypatch.setattr(statement_report, "API_KEY", "k")
+    statement_report.fetch("/customers")
+    statement_report.fetch("/customers?page=2")
+    assert urls == [f"{statement_report.BASE_URL}/customers?key=k", f"{statement_report.BASE_URL}/customers?page=2&key=k"]
+
+
+def test_local_and_api_sources_cover_the_same_accounts(tmp_path, monkeypatch):
+    api = {
+        "/customers/c1/accounts": [{"_id": "chk", "nickname": "Checking", "balance": 100.0, "rewards": 5},
+                                   {"_id": "cc", "nickname": "Visa", "balance": -40.0, "rewards": 10}],
+        "/accounts/chk/purchases": [{"_id": "p1", "purchase_date": "2025-03-01", "amount": 20}],
+        "/accounts/chk/deposits": [{"_id": "d1", "transaction_date": "2025-03-02", "amount": 500}],
+        "/accounts/cc/purchases": {"results": [{"_id": "p2", "purchase_date": "2025-03-03", "amount": 80},
+                                               {"_id": "p3", "purchase_date": "2025-03-04", "amount": None}]},
+        "/accounts/cc/deposits": [],
+    }
+    monkeypatch.setattr(statement_report, "fetch", lambda endpoint: api[endpoint])
+    accounts, purchases, deposits = statement_report.load_remote("c1")
+
+    # The raw dump encryption.py writes for the same customer
+    dump = {"account": {"account_id": "chk", "nickname": "Checking", "balance": 100.0, "rewards": 5},
+            "accounts": [{"account_id": "chk", "nickname": "Checking", "balance": 100.0, "rewards": 5},
+                         {"account_id": "cc", "nickname": "Visa", "balance": -40.0, "rewards": 10}],
+            "purchases": [dict(p) for p in purchases], "deposits": [dict(d) for d in deposits]}
+    (tmp_path / "customer_c1_raw.json").write_text(json.dumps(dump))
+    local = statement_report.load_local("c1", str(tmp_path))
+
+    for only, spent, balance in ((None, 100, 60.0), ("cc", 80, -40.0)):
+        remote_statement = build_statement(CUSTOMER, *statement_report.scope_records(accounts, purchases, deposits, only))
+        local_statement = build_statement(CUSTOMER, *statement_report.scope_records(*local, only=only))
+        assert remote_statement["totals"] == local_statement["totals"]
+        assert remote_statement["account"] == local_statement["account"]
+        assert remote_statement["totals"]["spent"] == spent
+        assert remote_statement["account"]["balance"] == balance
+    assert statement_report.scope_records(accounts, purchases, deposits, "sav") is None
+
+    out = io.StringIO()
+    write_text(build_statement(CUSTOMER, *statement_report.scope_records(*local)), out)
+    assert "Account: Checking, Visa" in out.getvalue()
@@ -45,13 +45,13 @@ export const api = {
     return response.json();
   },
 
-  // Run analysis
-  runAnalysis: async () => {
+  // Run abuse analysis (served from the backend cache when the data is unchanged)
+  runAnalysis: async (transactions: any) => {
     const { userId, password } = await api.getCredentials();
     const response = await fetch(`${API_BASE}/analysis/run`, {
       method: 'POST',
       headers: { 'Content-Type': 'application/json' },
-      body: JSON.stringify({ user_id: userId, password })
+      body: JSON.stringify({ user_id: userId, password, transactions })
     });
     return response.json();
   }